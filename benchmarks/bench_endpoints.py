@@ -0,0 +1,205 @@
+"""Benchmark: heavy endpoints against a synthetic repo farm, results as JSON.
+
+Builds (or reuses) a farm from benchmarks/farm.py and points the app at it.
+The farm has N repos with M commits each, worktrees, stashes, dirty files and
+bare remotes. The harness then drives these through an in-process ASGI client:
+  /projects, /stats, /wt/{name}/list, /git/{name}/log
+Per-repo endpoints cycle through the farm's repos. For each endpoint it
+reports:
+  p50/p95/mean/max latency over --rounds requests (after one warm-up),
+  the first (cold) request,
+  git subprocesses per request and failed git calls (from core.metrics),
+  peak Python heap during one traced request (tracemalloc),
+plus the process max RSS. By default the fingerprint caches stay on (the
+steady state of a running dashboard). --cold drops the git info and worktree
+caches before every request, measuring the uncached path.
+
+Results go to --out as JSON, tagged with the package version, dashboard
+commit, git and Python versions. --compare old.json prints the change
+against an earlier run, so regressions show up between versions.
+
+Usage: uv run python benchmarks/bench_endpoints.py [--repos 50] [--commits 200]
+           [--rounds 30] [--farm DIR] [--cold] [--out results.json] [--compare old.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from farm import add_spec_arguments, build_farm, spec_from_args
+
+ENDPOINTS = [
+    ("projects", "/projects"),
+    ("stats", "/stats"),
+    ("wt_list", "/wt/{name}/list"),
+    ("git_log", "/git/{name}/log?limit=50"),
+]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return sorted_values[max(0, math.ceil(p * len(sorted_values)) - 1)]
+
+
+def git_calls() -> tuple[int, int]:
+    """(all, failed) git subprocesses recorded so far."""
+    from my_repos_dashboard.core.metrics import metrics
+    outcomes = dict(metrics.git_outcomes)
+    return sum(outcomes.values()), sum(n for (_, outcome), n in outcomes.items() if outcome != "ok")
+
+
+def max_rss_kb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def version_info() -> dict:
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        package = version("my-repos-dashboard")
+    except PackageNotFoundError:
+        package = None
+    here = os.path.dirname(os.path.abspath(__file__))
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here, capture_output=True, text=True)
+    git = subprocess.run(["git", "--version"], capture_output=True, text=True)
+    return {
+        "package": package,
+        "commit": commit.stdout.strip() or None,
+        "git": git.stdout.strip(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+async def run_endpoints(repos: list[str], rounds: int, cold: bool) -> dict:
+    import httpx
+    from my_repos_dashboard.core.git_cache import git_info_cache, worktree_list_cache
+    from my_repos_dashboard.main import app
+
+    async def get(client, template: str, i: int) -> float:
+        if cold:
+            git_info_cache.invalidate()
+            worktree_list_cache.invalidate()
+        url = template.format(name=repos[i % len(repos)])
+        start = time.perf_counter()
+        r = await client.get(url)
+        elapsed = time.perf_counter() - start
+        if r.status_code != 200:
+            raise RuntimeError(f"GET {url}: {r.status_code} {r.text[:200]}")
+        return elapsed
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, template in ENDPOINTS:
+            first = await get(client, template, 0)
+            calls_before, failed_before = git_calls()
+            times = sorted([await get(client, template, i) for i in range(1, rounds + 1)])
+            calls_after, failed_after = git_calls()
+
+            tracemalloc.start()
+            await get(client, template, rounds + 1)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            results[label] = {
+                "path": template,
+                "first_ms": round(first * 1000, 2),
+                "p50_ms": round(percentile(times, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(times, 0.95) * 1000, 2),
+                "mean_ms": round(sum(times) / len(times) * 1000, 2),
+                "max_ms": round(times[-1] * 1000, 2),
+                "git_procs_per_request": round((calls_after - calls_before) / rounds, 2),
+                "git_failures": failed_after - failed_before,
+                "peak_heap_kb": peak // 1024,
+            }
+    return results
+
+
+def print_results(report: dict) -> None:
+    print(f"{report['farm']['repos']} repos x {report['farm']['commits']} commits, "
+          f"{report['rounds']} rounds, {report['mode']}")
+    print(f"{'endpoint':<10} {'first':>9} {'p50':>9} {'p95':>9} {'max':>9} {'git/req':>8} {'heap KB':>8}")
+    for label, r in report["endpoints"].items():
+        print(f"{label:<10} {r['first_ms']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['max_ms']:>9.1f} {r['git_procs_per_request']:>8.1f} {r['peak_heap_kb']:>8}")
+    if report["max_rss_kb"]:
+        print(f"max RSS {report['max_rss_kb'] / 1024:.0f} MB")
+
+
+def print_comparison(report: dict, old: dict) -> None:
+    print(f"\nvs {old['versions'].get('commit') or old['timestamp']} (negative = faster/fewer)")
+    print(f"{'endpoint':<10} {'p50':>9} {'p95':>9} {'git/req':>9}")
+    for label, r in report["endpoints"].items():
+        before = old["endpoints"].get(label)
+        if not before:
+            continue
+        def change(key):
+            return (r[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+        print(f"{label:<10} {change('p50_ms'):>+8.0f}% {change('p95_ms'):>+8.0f}% "
+              f"{r['git_procs_per_request'] - before['git_procs_per_request']:>+9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_spec_arguments(parser)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--farm", help="farm directory, reused across runs (default: a temp dir)")
+    parser.add_argument("--cold", action="store_true", help="drop git caches before every request")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier --out file to compare against")
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        base = build_farm(args.farm or tmp, spec)
+        print(f"farm ready in {time.perf_counter() - start:.1f}s: {base}")
+
+        # The app reads its settings at import time. Background work would
+        # compete with the measured requests, and the single-flight TTL would
+        # turn back-to-back requests into replays of the first one.
+        os.environ["REPO_BASE_PATH"] = base
+        os.environ["REPO_WATCHER"] = "0"
+        os.environ["AUTO_FETCH_INTERVAL"] = "0"
+        os.environ["SINGLE_FLIGHT_TTL"] = "0"
+        repos = sorted(d for d in os.listdir(base) if d.startswith("repo-") and "-wt" not in d)
+        endpoints = asyncio.run(run_endpoints(repos, args.rounds, args.cold))
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "versions": version_info(),
+        "farm": asdict(spec),
+        "rounds": args.rounds,
+        "mode": "cold" if args.cold else "warm",
+        "endpoints": endpoints,
+        "max_rss_kb": max_rss_kb(),
+    }
+    print_results(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Micro-benchmark: git subprocesses per repo for the status part of get_git_info.
+
+Compares the previous command sequence (rev-parse, status, rev-list, two
+`log -1` calls, stash list) with the porcelain-v2 collector (one `status`
+plus one `log -1`) on a throwaway repo with an upstream, a stash and dirty
+files.
+
+Usage: uv run python benchmarks/bench_git_info.py [--rounds 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from unittest import mock
+
+from my_repos_dashboard.core.git_utils import get_last_commit, get_status_summary, run_git
+
+
+def legacy_status(path: str) -> dict:
+    """The pre-porcelain-v2 command sequence, kept here for comparison."""
+    branch = run_git(["rev-parse", "--abbrev-ref", "HEAD"], path)
+    status_output = run_git(["status", "--porcelain"], path) or ""
+    ab = run_git(["rev-list", "--left-right", "--count", f"{branch}...@{{u}}"], path) or ""
+    log = run_git(["log", "-1", "--pretty=format:%s|||%ar|||%H"], path) or ""
+    ts_str = run_git(["log", "-1", "--pretty=format:%ct"], path) or ""
+    stash_out = run_git(["stash", "list"], path) or ""
+    return {"branch": branch, "status": status_output, "ab": ab, "log": log, "ts": ts_str, "stash": stash_out}
+
+
+def batched_status(path: str) -> dict:
+    """The porcelain-v2 collector used by get_git_info."""
+    return {"status": get_status_summary(path), "last": get_last_commit(path)}
+
+
+def make_repo(root: str) -> str:
+    """Create a repo with an upstream, one commit ahead, a stash and dirty files."""
+    def git(*args, cwd):
+        subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+    env_ident = ["-c", "user.name=bench", "-c", "user.email=bench@example.com"]
+    remote = os.path.join(root, "remote.git")
+    repo = os.path.join(root, "repo")
+    git("init", "-q", "--bare", remote, cwd=root)
+    git("init", "-q", repo, cwd=root)
+    for i in range(3):
+        with open(os.path.join(repo, f"f{i}.txt"), "w") as f:
+            f.write(str(i))
+        git("add", ".", cwd=repo)
+        git(*env_ident, "commit", "-qm", f"commit {i}", cwd=repo)
+    git("remote", "add", "origin", remote, cwd=repo)
+    git("push", "-q", "-u", "origin", "HEAD", cwd=repo)
+    with open(os.path.join(repo, "f0.txt"), "a") as f:
+        f.write("stash me")
+    git(*env_ident, "stash", "-q", cwd=repo)
+    with open(os.path.join(repo, "f1.txt"), "a") as f:
+        f.write("dirty")
+    with open(os.path.join(repo, "new.txt"), "w") as f:
+        f.write("untracked")
+    return repo
+
+
+def measure(fn, path: str, rounds: int) -> tuple[int, float]:
+    """Return (subprocesses per call, mean milliseconds per call)."""
+    real_run = subprocess.run
+    calls = 0
+
+    def counting_run(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return real_run(*args, **kwargs)
+
+    with mock.patch("subprocess.run", counting_run):
+        fn(path)
+        per_call = calls
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn(path)
+        elapsed = time.perf_counter() - start
+    return per_call, elapsed / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        repo = make_repo(root)
+        print(f"{'collector':<10} {'procs/repo':>10} {'ms/repo':>10}")
+        for label, fn in (("legacy", legacy_status), ("batched", batched_status)):
+            procs, ms = measure(fn, repo, args.rounds)
+            print(f"{label:<10} {procs:>10} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
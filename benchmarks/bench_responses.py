@@ -0,0 +1,127 @@
+"""Benchmark: /projects response encoding and bytes on the wire.
+
+Builds a synthetic /projects payload (default 500 repos, each with embedded
+worktree lists as in worktrees=full) and times:
+  legacy  - FastAPI's default path: jsonable_encoder + json.dumps, per request
+  encoder - core.responses.dumps (orjson if installed, else compact stdlib json)
+  cached  - ProjectStore.full_body() for an unchanged snapshot (what repeated
+            /projects calls cost after the first)
+and the body size uncompressed, gzip and brotli (when installed), including
+the one-off compression time per snapshot.
+
+Usage: uv run python benchmarks/bench_responses.py [--repos 500] [--worktrees 3] [--rounds 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from my_repos_dashboard.core import responses
+from my_repos_dashboard.core.project_store import ProjectStore
+
+
+def synthetic_projects(repos: int, worktrees: int, seed: int = 7) -> list[dict]:
+    """/projects entries shaped like the real ones (worktrees=full)."""
+    rng = random.Random(seed)
+    now = int(time.time())
+    projects = []
+    for i in range(repos):
+        name = f"repo-{i:04d}"
+        wts = [{
+            "path": f"C:\\Users\\dev\\repos\\{name}-wt{j}",
+            "branch": f"fix-Oct{j:02d}-1200-{j}",
+            "branch_sha": f"{rng.getrandbits(28):07x}",
+            "status": rng.choice(["merged", "not merged", "main"]),
+            "status_color": rng.choice(["green", "yellow", "blue"]),
+            "age": f"{rng.randrange(1, 30)} days ago",
+            "is_main": j == 0,
+            "parent_branch": "main",
+            "parent_sha": f"{rng.getrandbits(28):07x}",
+        } for j in range(worktrees)]
+        projects.append({
+            "name": name,
+            "path": f"C:\\Users\\dev\\repos\\{name}",
+            "git": {
+                "branch": rng.choice(["main", "develop", f"feature/{name}"]),
+                "is_dirty": rng.random() < 0.3,
+                "staged": rng.randrange(5),
+                "unstaged": rng.randrange(10),
+                "untracked": rng.randrange(8),
+                "ahead": rng.randrange(4),
+                "behind": rng.randrange(4),
+                "last_msg": f"Fix edge case in module {rng.randrange(100)} when input is empty",
+                "last_time": f"{rng.randrange(1, 59)} minutes ago",
+                "last_hash": f"{rng.getrandbits(28):07x}",
+                "last_ts": now - rng.randrange(365 * 86400),
+                "worktree_count": worktrees,
+                "stash_count": rng.randrange(3),
+                "worktrees": wts,
+            },
+            "hasScratchpad": rng.random() < 0.2,
+            "isPinned": rng.random() < 0.05,
+        })
+    return projects
+
+
+def legacy_encode(payload: dict) -> bytes:
+    """What FastAPI's JSONResponse does for a returned dict."""
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=500)
+    parser.add_argument("--worktrees", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    projects = synthetic_projects(args.repos, args.worktrees)
+    payload = {"projects": projects}
+    store = ProjectStore()
+    store.sync(projects)
+    store.full_body()  # first call encodes; later ones are cache hits
+
+    assert json.loads(legacy_encode(payload)) == json.loads(responses.dumps(payload))
+    by_name = sorted(json.loads(store.full_body().raw)["projects"], key=lambda p: p["name"])
+    assert by_name == json.loads(legacy_encode(payload))["projects"], "store body differs from legacy"
+
+    encoder = "orjson" if responses.orjson is not None else "json (compact)"
+    timings = {
+        "legacy": timed(lambda: legacy_encode(payload), args.rounds),
+        f"encoder ({encoder})": timed(lambda: responses.dumps(payload), args.rounds),
+        "cached snapshot": timed(store.full_body, args.rounds),
+    }
+    print(f"{args.repos} repos x {args.worktrees} worktrees, mean of {args.rounds} rounds")
+    base = timings["legacy"]
+    for label, secs in timings.items():
+        print(f"{label:<24} {secs * 1000:>9.3f} ms  {base / secs:>8.1f}x")
+
+    raw = store.full_body().raw
+    print(f"\n{'body':<24} {'bytes':>10} {'ratio':>7} {'compress':>10}")
+    print(f"{'identity':<24} {len(raw):>10,} {1:>7.2f}")
+    encodings = ["gzip"] + (["br"] if responses.brotli is not None else [])
+    for encoding in encodings:
+        start = time.perf_counter()
+        data = responses.compress(raw, encoding)
+        ms = (time.perf_counter() - start) * 1000
+        print(f"{encoding:<24} {len(data):>10,} {len(data) / len(raw):>7.2f} {ms:>8.1f} ms")
+    if responses.brotli is None:
+        print("(brotli not installed: pip install my-repos-dashboard[perf])")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark: /stats aggregation, per-commit datetime loop vs stats_engine.
+
+Generates synthetic commit timestamps (default 1M commits spread over 300
+repos and one year) and times the aggregation half of /stats:
+  legacy - the previous implementation: (ts, name) tuple lists and
+           datetime.fromtimestamp per commit for every histogram
+  engine - core.stats_engine (NumPy backend if installed, else pure Python)
+
+Both produce the same weekday, hour, week-window and streak-length numbers;
+the script checks that before printing timings.
+
+Usage: uv run python benchmarks/bench_stats_engine.py [--commits 1000000] [--repos 300]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from my_repos_dashboard.core import stats_engine
+
+
+def synthetic_repos(commits: int, repos: int, seed: int = 7) -> list[tuple[str, array]]:
+    """Per-repo sorted timestamp arrays covering the last year."""
+    rng = random.Random(seed)
+    now = int(time.time())
+    per_repo = [array("q") for _ in range(repos)]
+    for _ in range(commits):
+        per_repo[rng.randrange(repos)].append(now - rng.randrange(365 * 86400))
+    return [(f"repo-{i}", array("q", sorted(ts))) for i, ts in enumerate(per_repo)]
+
+
+def legacy_aggregate(results: list[tuple[str, array]], today) -> dict:
+    """The per-commit loops /stats used before stats_engine."""
+    week_start = today - timedelta(days=6)
+    prev_start = today - timedelta(days=13)
+    all_commits_all = []
+    for name, ts in results:
+        all_commits_all.extend((t, name) for t in ts)
+
+    day_counts = defaultdict(int)
+    for ts, _ in all_commits_all:
+        day_counts[datetime.fromtimestamp(ts).weekday()] += 1
+
+    hour_counts = defaultdict(int)
+    for ts, _ in all_commits_all:
+        hour_counts[datetime.fromtimestamp(ts).hour] += 1
+
+    this_week = [0] * 7
+    last_week = [0] * 7
+    for ts, _ in all_commits_all:
+        d = datetime.fromtimestamp(ts).date()
+        if week_start <= d <= today:
+            this_week[(d - week_start).days] += 1
+        elif prev_start <= d < week_start:
+            last_week[(d - prev_start).days] += 1
+
+    unique_dates = sorted({datetime.fromtimestamp(ts).date() for ts, _ in all_commits_all}, reverse=True)
+    cur = 0
+    check = today
+    for d in unique_dates:
+        if d == check or d == check - timedelta(days=1):
+            cur += 1
+            check = d
+        elif d < check - timedelta(days=1):
+            break
+    run = best_run = 1
+    for i in range(1, len(unique_dates)):
+        if (unique_dates[i - 1] - unique_dates[i]).days == 1:
+            run += 1
+            best_run = max(best_run, run)
+        else:
+            run = 1
+
+    return {
+        "weekday": [day_counts[i] for i in range(7)],
+        "hour": [hour_counts[h] for h in range(24)],
+        "this_week": this_week,
+        "last_week": last_week,
+        "current": cur,
+        "longest": best_run,
+    }
+
+
+def engine_aggregate(results: list[tuple[str, array]], today) -> dict:
+    """The same numbers computed with stats_engine."""
+    days, hours = stats_engine.local_days_hours(stats_engine.concat([ts for _, ts in results]))
+    today_day = stats_engine.day_number(today)
+    streak = stats_engine.streaks(days, today_day)
+    return {
+        "weekday": stats_engine.weekday_counts(days),
+        "hour": stats_engine.hour_counts(hours),
+        "this_week": stats_engine.window_counts(days, today_day - 6),
+        "last_week": stats_engine.window_counts(days, today_day - 13),
+        "current": streak["current"],
+        "longest": streak["longest"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=1_000_000)
+    parser.add_argument("--repos", type=int, default=300)
+    args = parser.parse_args()
+
+    results = synthetic_repos(args.commits, args.repos)
+    today = datetime.now().date()
+    backend = "numpy" if stats_engine.np is not None else "pure-python"
+
+    timings = {}
+    outputs = {}
+    for label, fn in (("legacy", legacy_aggregate), (f"engine ({backend})", engine_aggregate)):
+        start = time.perf_counter()
+        outputs[label] = fn(results, today)
+        timings[label] = time.perf_counter() - start
+
+    legacy_out, engine_out = outputs.values()
+    assert legacy_out == engine_out, "engine output differs from legacy loop"
+
+    print(f"{args.commits:,} commits across {args.repos} repos")
+    base = timings["legacy"]
+    for label, secs in timings.items():
+        print(f"{label:<22} {secs * 1000:>10.1f} ms  {base / secs:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
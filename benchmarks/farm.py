@@ -0,0 +1,170 @@
+"""Synthetic repo farm for the endpoint benchmarks.
+
+Builds a reproducible directory of local git repos shaped like a real
+REPO_BASE_PATH:
+
+    <root>/repos/repo-0000            main checkout, M commits over the last year
+    <root>/repos/repo-0000-wt1 ...    linked worktrees (siblings, as the dashboard creates them)
+    <root>/remotes/repo-0000.git      bare remote; the checkout is a few commits ahead
+
+Each repo also gets feature branches, stashes and (for a share of repos)
+staged, modified and untracked files. History is written with one
+`git fast-import` per repo, so farms with thousands of commits build in
+seconds. The same parameters and seed always give the same farm; commit
+dates are relative to the build time, so /stats windows stay populated.
+
+A farm.json manifest records the parameters. build_farm() reuses an existing
+farm with identical parameters instead of rebuilding it.
+
+Usage: uv run python benchmarks/farm.py <dir> [--repos 50] [--commits 200] ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+_AUTHORS = [("Ada", "ada@example.com"), ("Linus", "linus@example.com"), ("Grace", "grace@example.com")]
+_GIT_ENV = {
+    "GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1", "GIT_TERMINAL_PROMPT": "0",
+}
+
+
+@dataclass(frozen=True)
+class FarmSpec:
+    """Farm parameters; also the farm.json manifest."""
+    repos: int = 50
+    commits: int = 200
+    worktrees: int = 2        # linked worktrees per repo
+    stashes: int = 1          # stash entries per repo
+    branches: int = 3         # extra local branches per repo
+    ahead: int = 2            # local commits not pushed to the remote
+    dirty: float = 0.3        # share of repos with staged/modified/untracked files
+    remotes: float = 0.8      # share of repos with a bare remote and upstream
+    seed: int = 7
+
+
+def _git(args: list, cwd: str, stdin: bytes = None) -> None:
+    subprocess.run(
+        ["git", "-c", "init.defaultBranch=main", "-c", "advice.detachedHead=false", *args],
+        cwd=cwd, input=stdin, check=True, capture_output=True,
+        env={**os.environ, **_GIT_ENV},
+    )
+
+
+def _history(rng: random.Random, commits: int) -> bytes:
+    """A fast-import stream of `commits` commits on main, oldest first."""
+    now = int(time.time())
+    stamps = sorted(now - rng.randrange(365 * 86400) for _ in range(commits))
+    out = []
+    for i, ts in enumerate(stamps):
+        name, email = rng.choice(_AUTHORS)
+        message = f"Change {i}: update module {rng.randrange(40)}\n".encode()
+        content = f"revision {i}\n{rng.getrandbits(64):016x}\n".encode()
+        out += [
+            b"commit refs/heads/main\n",
+            f"author {name} <{email}> {ts} +0000\n".encode(),
+            f"committer {name} <{email}> {ts} +0000\n".encode(),
+            b"data %d\n" % len(message), message,
+            f"M 100644 inline src/module_{i % 20}.py\n".encode(),
+            b"data %d\n" % len(content), content, b"\n",
+        ]
+    return b"".join(out)
+
+
+def _build_repo(root: str, index: int, spec: FarmSpec) -> None:
+    rng = random.Random(spec.seed * 100_003 + index)
+    name = f"repo-{index:04d}"
+    repo = os.path.join(root, "repos", name)
+    os.makedirs(repo)
+    _git(["init", "-q"], repo)
+    _git(["fast-import", "--quiet"], repo, stdin=_history(rng, spec.commits))
+    _git(["checkout", "-q", "-f", "main"], repo)
+
+    if rng.random() < spec.remotes:
+        remote = os.path.join(root, "remotes", name + ".git")
+        _git(["init", "-q", "--bare", remote], root)
+        _git(["remote", "add", "origin", remote], repo)
+        pushed = f"main~{spec.ahead}" if 0 < spec.ahead < spec.commits else "main"
+        _git(["push", "-q", "origin", f"{pushed}:refs/heads/main"], repo)
+        _git(["branch", "-q", "--set-upstream-to=origin/main", "main"], repo)
+
+    for b in range(spec.branches):
+        _git(["branch", f"feature/{name}-{b}", f"main~{min(b + 1, spec.commits - 1)}"], repo)
+    for w in range(1, spec.worktrees + 1):
+        start = f"main~{min(w, spec.commits - 1)}"
+        _git(["worktree", "add", "-q", "-b", f"{name}-wt{w}", f"../{name}-wt{w}", start], repo)
+
+    for s in range(spec.stashes):
+        with open(os.path.join(repo, "src", "module_0.py"), "a") as f:
+            f.write(f"# stashed change {s}\n")
+        _git(["stash", "-q"], repo)
+
+    if rng.random() < spec.dirty:
+        with open(os.path.join(repo, "src", "module_1.py"), "a") as f:
+            f.write("# staged\n")
+        _git(["add", "src/module_1.py"], repo)
+        with open(os.path.join(repo, "src", "module_2.py"), "a") as f:
+            f.write("# modified\n")
+        for u in range(rng.randrange(1, 4)):
+            with open(os.path.join(repo, f"untracked_{u}.txt"), "w") as f:
+                f.write("scratch\n")
+
+
+def build_farm(root: str, spec: FarmSpec, workers: int = 0) -> str:
+    """
+    Build the farm under root (or reuse it when farm.json matches spec).
+    Returns the directory to use as REPO_BASE_PATH.
+    """
+    if spec.commits < 3:
+        raise ValueError("a farm needs at least 3 commits per repo")
+    manifest = os.path.join(root, "farm.json")
+    base = os.path.join(root, "repos")
+    try:
+        with open(manifest) as f:
+            if json.load(f) == asdict(spec):
+                return base
+    except (OSError, ValueError):
+        pass
+    for sub in ("repos", "remotes"):
+        shutil.rmtree(os.path.join(root, sub), ignore_errors=True)
+    os.makedirs(os.path.join(root, "remotes"), exist_ok=True)
+    os.makedirs(base, exist_ok=True)
+    with ThreadPoolExecutor(workers or min(16, os.cpu_count() or 4)) as pool:
+        list(pool.map(lambda i: _build_repo(root, i, spec), range(spec.repos)))
+    with open(manifest, "w") as f:
+        json.dump(asdict(spec), f, indent=2)
+    return base
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """--repos, --commits ... options for every FarmSpec field."""
+    for key, default in asdict(FarmSpec()).items():
+        parser.add_argument(f"--{key}", type=type(default), default=default)
+
+
+def spec_from_args(args: argparse.Namespace) -> FarmSpec:
+    return FarmSpec(**{key: getattr(args, key) for key in asdict(FarmSpec())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    base = build_farm(args.root, spec_from_args(args))
+    print(f"REPO_BASE_PATH={base}  ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,29 +2,56 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import subprocess
+import time
+from typing import Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
-from ..core.config import BASE_PATH
-from ..core.git_utils import run_git_out
+from ..core.config import BULK_ACTION_CONCURRENCY
+from ..core.job_queue import job_queue
+from ..core.repo_registry import repo_registry
+from ..core.repo_watcher import repo_watcher
+from ..core.state_store import state_store
+from ..core.git_utils import run_git_out_async
+from ..models.schemas import BulkActionBody
+from .jobs import job_response
 
 router = APIRouter(tags=["actions"])
 
+GIT_ACTIONS = {
+    "pull": ["pull"],
+    "fetch": ["fetch", "--all"],
+    "stash": ["stash"],
+    "stash-pop": ["stash", "pop"],
+    "reset": ["reset", "--hard", "HEAD"],
+    "clean": ["clean", "-fd"],
+    "log": ["log", "--oneline", "-10"],
+}
 
-@router.get("/open/{name}")
+# reset/clean discard work; they stay single-repo actions
+BULK_ACTIONS = {"pull", "fetch", "stash", "stash-pop", "log"}
+
+# Actions whose git process may be killed mid-run by a job cancel
+INTERRUPTIBLE_ACTIONS = {"fetch", "log"}
+
+
+@router.get("/open/{name:path}")
 def open_vscode(name: str):
     """Open a repository in VS Code."""
-    full_path = os.path.join(BASE_PATH, name)
+    full_path = repo_registry.path_for(name)
     subprocess.Popen(["code", full_path], shell=True)
     return {"message": f"Opening {name}"}
 
 
-@router.get("/open-terminal/{name}")
+@router.get("/open-terminal/{name:path}")
 def open_terminal(name: str):
     """Open a PowerShell terminal in the repository directory."""
-    full_path = os.path.join(BASE_PATH, name)
+    full_path = repo_registry.path_for(name)
     subprocess.Popen(["start", "powershell", "-NoExit", "-Command", f"Set-Location '{full_path}'"], shell=True)
     return {"message": f"Opening terminal in {name}"}
 
@@ -36,10 +63,10 @@ def open_worktree_path(path: str):
     return {"message": f"Opening {path}"}
 
 
-@router.get("/readme/{name}")
+@router.get("/readme/{name:path}")
 def get_readme(name: str):
     """Fetch the README.md content for a repository."""
-    full_path = os.path.join(BASE_PATH, name)
+    full_path = repo_registry.path_for(name)
     for file in os.listdir(full_path):
         if file.lower() == "readme.md":
             with open(os.path.join(full_path, file), "r", encoding="utf-8") as f:
@@ -47,20 +74,93 @@ def get_readme(name: str):
     return {"content": "No README.md found in this repo."}
 
 
-@router.post("/git/{name}/{action}")
-def git_action(name: str, action: str):
-    """Run a basic git action (pull, fetch, stash, stash-pop, reset, clean, log)."""
-    full_path = os.path.join(BASE_PATH, name)
-    commands = {
-        "pull": ["pull"],
-        "fetch": ["fetch", "--all"],
-        "stash": ["stash"],
-        "stash-pop": ["stash", "pop"],
-        "reset": ["reset", "--hard", "HEAD"],
-        "clean": ["clean", "-fd"],
-        "log": ["log", "--oneline", "-10"],
-    }
-    if action not in commands:
+@router.post("/git/{name:path}/{action}")
+async def git_action(name: str, action: str, background: bool = False):
+    """
+    Run a basic git action (pull, fetch, stash, stash-pop, reset, clean, log).
+    Queued behind other jobs on the repo; ?background=1 returns the job id.
+    """
+    full_path = repo_registry.path_for(name)
+    if action not in GIT_ACTIONS:
         return {"success": False, "output": "Unknown action"}
-    ok, out = run_git_out(commands[action], full_path, timeout=30)
+    job = job_queue.submit(
+        f"git-{action}", name, _run_git_action, full_path, action,
+        interruptible=action in INTERRUPTIBLE_ACTIONS,
+    )
+    return await job_response(job, background)
+
+
+async def _run_git_action(full_path: str, action: str) -> dict:
+    ok, out = await run_git_out_async(GIT_ACTIONS[action], full_path, timeout=30)
+    # clean/reset only touch the working tree, which the fingerprint can't see;
+    # the watcher recomputes this repo and pushes the delta to the grid
+    repo_watcher.notify(full_path)
     return {"success": ok, "output": out}
+
+
+def _bulk_targets(repos) -> list[tuple[str, Optional[str]]]:
+    """Resolve "all", "pinned" or a name list to (name, path or None if unknown)."""
+    entries = [e for e in repo_registry.entries() if e.kind != "folder"]
+    if repos == "all":
+        return [(e.name, e.path) for e in entries]
+    if repos == "pinned":
+        pinned = state_store.pinned()
+        return [(e.name, e.path) for e in entries if e.name in pinned]
+    by_name = {e.name: e.path for e in entries}
+    return [(name, by_name.get(name)) for name in dict.fromkeys(repos)]
+
+
+@router.post("/git-bulk")
+async def git_bulk_action(body: BulkActionBody):
+    """
+    Run one git action (pull, fetch, stash, stash-pop, log) across many repos:
+    repos is a list of names, "all" or "pinned". Up to BULK_ACTION_CONCURRENCY
+    repos run at once. Streams NDJSON, one record per line:
+
+        {"type": "start", "action": ..., "total": n}
+        {"type": "result", "name": ..., "success": ..., "output": ..., "ms": ...}
+        {"type": "done", "succeeded": ..., "failed": ...}
+
+    Results arrive in completion order. Each finished repo's cached status is
+    invalidated, and the watcher pushes its new state to the grid.
+    """
+    if body.action not in BULK_ACTIONS:
+        raise HTTPException(400, f"Action not available in bulk: {body.action}")
+    targets = _bulk_targets(body.repos)
+    args = GIT_ACTIONS[body.action]
+    slots = asyncio.Semaphore(max(1, BULK_ACTION_CONCURRENCY))
+
+    async def run_one(name: str, path: Optional[str]) -> dict:
+        if path is None:
+            return {"type": "result", "name": name, "success": False, "output": "Repo not found", "ms": 0}
+        # The repo lock keeps bulk work from racing a queued merge on the same repo
+        async with job_queue.repo_lock(name), slots:
+            started = time.perf_counter()
+            ok, out = await run_git_out_async(args, path, timeout=30)
+            ms = round((time.perf_counter() - started) * 1000)
+        repo_watcher.notify(path)
+        return {"type": "result", "name": name, "success": ok, "output": out, "ms": ms}
+
+    async def stream():
+        yield json.dumps({"type": "start", "action": body.action, "total": len(targets)}) + "\n"
+        tasks = [asyncio.ensure_future(run_one(name, path)) for name, path in targets]
+        succeeded = failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result["success"]:
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield json.dumps(result) + "\n"
+        finally:
+            # Client went away: don't start the remaining repos
+            for task in tasks:
+                task.cancel()
+        yield json.dumps({"type": "done", "succeeded": succeeded, "failed": failed}) + "\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,69 +2,127 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-import subprocess
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
-from ..core.config import COMMANDS_FILE, BASE_PATH
+from ..core.command_jobs import CommandJob, command_jobs
+from ..core.repo_registry import repo_registry
+from ..core.state_store import state_store
 from ..models.schemas import CommandsBody, RunCommandBody
 
 router = APIRouter(tags=["commands"])
 
 
-def load_commands() -> dict:
-    """Load commands from the commands.json file."""
-    try:
-        if os.path.exists(COMMANDS_FILE):
-            with open(COMMANDS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {}
+@router.get("/commands/{name:path}")
+def get_commands(name: str):
+    """Get saved commands for a repo."""
+    return {"commands": state_store.commands(name)}
 
 
-def save_commands(data: dict):
-    """Save commands to the commands.json file."""
-    with open(COMMANDS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+# Declared before set_commands: {name:path} would also match ".../run"
+@router.post("/commands/{name:path}/run")
+def run_command(name: str, body: RunCommandBody):
+    """
+    Start a shell command inside a repo directory as a background job.
+    Output is read from /command-jobs/{job_id} or streamed from
+    /command-jobs/{job_id}/stream.
+    """
+    repo_path = repo_registry.path_for(name)
+    if not os.path.isdir(repo_path):
+        raise HTTPException(404, "Repo not found")
+    job = command_jobs.start(name, repo_path, body.cmd, body.timeout)
+    return {"success": job.status != "failed", "job_id": job.id, "job": job.summary(), "output": job.error or ""}
 
 
-@router.get("/commands/{name}")
-def get_commands(name: str):
-    """Get saved commands for a repo."""
-    all_cmds = load_commands()
-    return {"commands": all_cmds.get(name, [])}
+def _get_job(job_id: str) -> CommandJob:
+    job = command_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.get("/command-jobs")
+def list_command_jobs(name: Optional[str] = None):
+    """Running and recently finished command jobs, optionally for one repo."""
+    return {"jobs": [j.summary() for j in command_jobs.list(name)]}
+
+
+@router.get("/command-jobs/{job_id}")
+def get_command_job(job_id: str, after: int = 0):
+    """A job's status and the retained output lines after sequence number `after`."""
+    job = _get_job(job_id)
+    lines, dropped = job.lines_after(after)
+    return {**job.summary(), "dropped": dropped, "output": [list(line) for line in lines]}
 
 
-@router.post("/commands/{name}")
+@router.get("/command-jobs/{job_id}/stream")
+async def stream_command_job(
+    job_id: str,
+    request: Request,
+    after: int = 0,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events stream of a job's output. Each message carries the
+    lines produced since the previous one as [seq, stream, text] and uses
+    the last seq as its id, so a reconnecting EventSource resumes where it
+    left off. A final "end" event carries the job summary.
+    """
+    job = _get_job(job_id)
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+
+    async def stream():
+        nonlocal after
+        wake = job.subscribe()
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                wake.clear()
+                # Read status first: lines appended before the job finished
+                # are then guaranteed to be in this batch
+                done = job.done
+                lines, dropped = job.lines_after(after)
+                if dropped:
+                    yield f"event: gap\ndata: {json.dumps({'dropped': dropped})}\n\n"
+                if lines:
+                    after = lines[-1][0]
+                    yield f"id: {after}\ndata: {json.dumps({'lines': [list(l) for l in lines]})}\n\n"
+                if done:
+                    yield f"event: end\ndata: {json.dumps(job.summary())}\n\n"
+                    return
+                if await request.is_disconnected():
+                    return
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            job.unsubscribe(wake)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/command-jobs/{job_id}/cancel")
+def cancel_command_job(job_id: str):
+    """Stop a running job and the processes it started."""
+    job = _get_job(job_id)
+    if not job.cancel():
+        return {"success": False, "output": f"Job already {job.status}"}
+    return {"success": True, "output": "Cancelling"}
+
+
+@router.post("/commands/{name:path}")
 def set_commands(name: str, body: CommandsBody):
     """Save commands for a repo."""
-    all_cmds = load_commands()
-    all_cmds[name] = body.commands
-    save_commands(all_cmds)
+    state_store.set_commands(name, body.commands)
     return {"success": True}
-
-
-@router.post("/commands/{name}/run")
-def run_command(name: str, body: RunCommandBody):
-    """Run a shell command inside a repo directory."""
-    repo_path = os.path.join(BASE_PATH, name)
-    if not os.path.isdir(repo_path):
-        raise HTTPException(404, "Repo not found")
-    try:
-        result = subprocess.run(
-            body.cmd,
-            cwd=repo_path,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
-        out = result.stdout or result.stderr or "(no output)"
-        return {"success": result.returncode == 0, "output": out, "returncode": result.returncode}
-    except subprocess.TimeoutExpired:
-        return {"success": False, "output": "Command timed out after 60s"}
-    except Exception as e:
-        return {"success": False, "output": str(e)}
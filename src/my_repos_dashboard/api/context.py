@@ -9,14 +9,15 @@ import subprocess
 
 from fastapi import APIRouter, HTTPException
 
-from ..core.config import BASE_PATH
+from ..core.job_queue import job_queue
+from ..core.repo_registry import repo_registry
+from ..core.singleflight import endpoint_flights
+from ..core.state_store import state_store
 from ..models.schemas import ScratchpadBody
+from .jobs import job_response
 
 router = APIRouter(tags=["context"])
 
-# Storage directory outside of repos
-CONTEXT_DIR = os.path.join(BASE_PATH, ".my_dashboard", "repos")
-
 # Prompt for Claude to analyze repo state
 CAPTURE_PROMPT = """You are capturing context for a developer returning to this codebase.
 
@@ -36,47 +37,22 @@ Look at:
 Be specific and brief. Focus on what a developer needs to know to continue."""
 
 
-def get_context_path(name: str) -> str:
-    """Get the context directory path for a repo."""
-    return os.path.join(CONTEXT_DIR, name)
-
-
-def get_context_file(name: str) -> str:
-    """Get the context.json file path for a repo."""
-    return os.path.join(get_context_path(name), "context.json")
-
-
-def get_scratchpad_file(name: str) -> str:
-    """Get the scratch.md file path for a repo."""
-    return os.path.join(get_context_path(name), "scratch.md")
-
-
-@router.get("/repo/{name}/last-session")
+@router.get("/repo/{name:path}/last-session")
 def get_last_session(name: str):
     """Get the last captured context for a repo."""
-    context_file = get_context_file(name)
-    if not os.path.exists(context_file):
-        return {"context": None}
-
-    try:
-        with open(context_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return {"context": data}
-    except Exception:
-        return {"context": None}
+    return {"context": state_store.context(name)}
 
 
-@router.post("/repo/{name}/capture-context")
-def capture_context(name: str):
-    """Capture context using Claude to analyze repo state."""
-    repo_path = os.path.join(BASE_PATH, name)
+@router.post("/repo/{name:path}/capture-context")
+async def capture_context(name: str, background: bool = False):
+    """
+    Capture context using Claude to analyze repo state. The Claude call runs
+    as a queued job; ?background=1 returns the job id instead of waiting.
+    """
+    repo_path = repo_registry.path_for(name)
     if not os.path.isdir(repo_path):
         raise HTTPException(404, "Repo not found")
 
-    # Ensure context directory exists
-    context_path = get_context_path(name)
-    os.makedirs(context_path, exist_ok=True)
-
     # Check if git repo
     if not os.path.exists(os.path.join(repo_path, ".git")):
         raise HTTPException(400, "Not a git repository")
@@ -96,6 +72,12 @@ def capture_context(name: str):
                 "and ensure it's in your PATH, or install via npm: npm install -g @anthropic-ai/claude-cli"
             )
 
+    job = job_queue.submit("capture-context", name, _capture_context, name, repo_path, claude_exe)
+    return await job_response(job, background)
+
+
+def _capture_context(name: str, repo_path: str, claude_exe: str) -> dict:
+    """Run the Claude CLI in the repo and save the parsed context."""
     try:
         # Run claude command with timeout
         import sys
@@ -138,10 +120,7 @@ def capture_context(name: str):
         from datetime import datetime
         context_data["capturedAt"] = datetime.now().isoformat()
 
-        # Save to context.json
-        context_file = get_context_file(name)
-        with open(context_file, "w", encoding="utf-8") as f:
-            json.dump(context_data, f, indent=2)
+        state_store.set_context(name, context_data)
 
         return {"success": True, "context": context_data}
 
@@ -153,31 +132,17 @@ def capture_context(name: str):
         raise HTTPException(500, f"Capture failed: {str(e)}")
 
 
-@router.get("/repo/{name}/scratchpad")
+@router.get("/repo/{name:path}/scratchpad")
 def get_scratchpad(name: str):
     """Get the scratchpad content for a repo."""
-    scratchpad_file = get_scratchpad_file(name)
-    if not os.path.exists(scratchpad_file):
-        return {"content": ""}
-
-    try:
-        with open(scratchpad_file, "r", encoding="utf-8") as f:
-            content = f.read()
-        return {"content": content}
-    except Exception:
-        return {"content": ""}
+    return {"content": state_store.scratchpad(name)}
 
 
-@router.post("/repo/{name}/scratchpad")
+@router.post("/repo/{name:path}/scratchpad")
 def save_scratchpad(name: str, body: ScratchpadBody):
     """Save the scratchpad content for a repo."""
-    context_path = get_context_path(name)
-    os.makedirs(context_path, exist_ok=True)
-
-    scratchpad_file = get_scratchpad_file(name)
-    with open(scratchpad_file, "w", encoding="utf-8") as f:
-        f.write(body.content)
-
+    state_store.set_scratchpad(name, body.content)
+    endpoint_flights.invalidate()  # /projects reports hasScratchpad
     return {"success": True}
 
 
@@ -0,0 +1,142 @@
+"""Diagnostics API endpoints exposing internal cache and performance counters."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..core.auto_fetch import auto_fetch
+from ..core.command_jobs import command_jobs
+from ..core.commit_index import commit_index
+from ..core.commit_log import commit_log
+from ..core.commit_search import commit_search
+from ..core.fast_status import fast_status
+from ..core.git_cache import git_info_cache, worktree_list_cache
+from ..core.git_utils import git_procs
+from ..core.job_queue import job_queue
+from ..core.metrics import metrics
+from ..core.project_store import project_stores
+from ..core.recent_files import recent_files
+from ..core.repo_registry import repo_registry
+from ..core.repo_watcher import repo_watcher
+from ..core.singleflight import endpoint_flights
+from ..core.state_store import state_store
+
+router = APIRouter(tags=["diagnostics"])
+
+
+@router.get("/diagnostics/git-cache")
+def git_cache_stats():
+    """Hit/miss counters of the per-repo git info and worktree list caches."""
+    return {**git_info_cache.stats(), "worktree_lists": worktree_list_cache.stats()}
+
+
+@router.post("/diagnostics/git-cache/clear")
+def clear_git_cache():
+    """Drop every cached git info entry (next /projects rescans all repos)."""
+    git_info_cache.invalidate()
+    worktree_list_cache.invalidate()
+    return {"success": True}
+
+
+@router.get("/diagnostics/commit-index")
+def commit_index_stats():
+    """Size and walk counters of the persistent commit timestamp index."""
+    return commit_index.stats()
+
+
+@router.get("/diagnostics/commit-log")
+def commit_log_stats():
+    """Cached commits and git loads of the paginated history cache."""
+    return commit_log.stats()
+
+
+@router.get("/diagnostics/search")
+def commit_search_stats():
+    """Size and indexing passes of the commit search index."""
+    return commit_search.stats()
+
+
+@router.get("/diagnostics/recent-files")
+def recent_files_stats():
+    """Hit rate, truncations and prewarming of the hover file-list cache."""
+    return recent_files.stats()
+
+
+@router.get("/diagnostics/fast-status")
+def fast_status_stats():
+    """Status mode, latest check timings and git settings per repo."""
+    return fast_status.stats()
+
+
+@router.get("/diagnostics/repo-registry")
+def repo_registry_stats():
+    """Entry counts by kind and scan/hit counters of the repo registry."""
+    return repo_registry.stats()
+
+
+@router.get("/diagnostics/watcher")
+def watcher_stats():
+    """State and counters of the background repo watcher."""
+    return repo_watcher.stats()
+
+
+@router.get("/diagnostics/git-procs")
+def git_procs_stats():
+    """Running/waiting counts of the process-wide git process limiter."""
+    return git_procs.stats()
+
+
+@router.get("/diagnostics/single-flight")
+def single_flight_stats():
+    """Coalesced/computed request counters for /projects and /stats."""
+    return endpoint_flights.stats()
+
+
+@router.get("/diagnostics/command-jobs")
+def command_jobs_stats():
+    """Running/retained counts of custom command jobs."""
+    return command_jobs.stats()
+
+
+@router.get("/diagnostics/jobs")
+def job_queue_stats():
+    """Queued/running counts of the mutation job queue."""
+    return job_queue.stats()
+
+
+@router.get("/diagnostics/auto-fetch")
+def auto_fetch_stats():
+    """Background fetch scheduler counters and per-repo last fetch/backoff state."""
+    return auto_fetch.stats()
+
+
+@router.get("/diagnostics/project-store")
+def project_store_stats():
+    """Version and change counters of the /projects snapshot stores."""
+    return {mode: store.stats() for mode, store in project_stores.items()}
+
+
+@router.get("/diagnostics/state")
+def state_store_stats():
+    """Row counts and reload/write counters of the dashboard state store."""
+    return state_store.stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Git latency histograms, per-endpoint/per-repo counters and gauges in Prometheus text format."""
+    procs = git_procs.stats()
+    cache = git_info_cache.stats()
+    jobs = job_queue.stats()
+    extra = {
+        "dashboard_git_procs_active": ("gauge", "Git subprocesses running now.", procs["active"]),
+        "dashboard_git_procs_waiting": ("gauge", "Callers waiting for a git process slot.", procs["waiting"]),
+        "dashboard_git_procs_peak": ("gauge", "Most git subprocesses seen at once.", procs["peak"]),
+        "dashboard_git_info_cache_hits_total": ("counter", "Git info served from the fingerprint cache.", cache["hits"]),
+        "dashboard_git_info_cache_misses_total": ("counter", "Git info recomputed with git.", cache["misses"]),
+        "dashboard_single_flight_coalesced_total": ("counter", "Requests served by joining an in-flight computation.", endpoint_flights.stats()["coalesced"]),
+        "dashboard_jobs_queued": ("gauge", "Jobs waiting for a worker or repo lock.", jobs["queued"]),
+        "dashboard_jobs_running": ("gauge", "Jobs running now.", jobs["running"]),
+    }
+    return PlainTextResponse(metrics.prometheus(extra), media_type="text/plain; version=0.0.4")
@@ -1,43 +1,56 @@
-"""Git-specific API endpoints for log, branches, recent files, and details."""
+"""Git-specific API endpoints for log, branches, recent files, status mode and details."""
 
 from __future__ import annotations
 
+import asyncio
 import os
+import time
+from typing import Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 
-from ..core.config import BASE_PATH
-from ..core.git_utils import run_git
+from ..core.commit_log import UnknownCursor, commit_log
+from ..core.fast_status import fast_status
+from ..core.git_cache import git_info_cache
+from ..core.git_native import relative_time
+from ..core.recent_files import recent_files
+from ..core.repo_registry import repo_registry
+from ..core.git_utils import run_git_async
+from ..core.state_store import state_store
+from ..models.schemas import PrewarmBody, StatusModeBody
 
 router = APIRouter(tags=["git"])
 
 
-@router.get("/git/{name}/log")
-def git_log(name: str, limit: int = 20):
-    """Get git log as structured data."""
-    full_path = os.path.join(BASE_PATH, name)
-    log_output = run_git(["log", f"-{limit}", "--pretty=format:%H|||%s|||%cr|||%an"], full_path)
-    if not log_output:
-        return {"commits": []}
-
-    commits = []
-    for line in log_output.splitlines():
-        parts = line.split("|||")
-        if len(parts) == 4:
-            commits.append({
-                "hash": parts[0][:7],
-                "message": parts[1],
-                "date": parts[2],
-                "author": parts[3],
-            })
-    return {"commits": commits}
-
-
-@router.get("/git/{name}/branches")
-def git_branches(name: str, limit: int = 5):
+@router.get("/git/{name:path}/log")
+async def git_log(name: str, limit: int = 20, after: Optional[str] = None):
+    """
+    HEAD's history as structured data, newest first, `limit` commits per page.
+    Pass the previous page's "next" SHA as `after` for the following page;
+    "next" is null on the last page. Pages come from the persistent commit
+    log cache, so scrolling costs at most one git call per uncached page.
+    """
+    full_path = repo_registry.path_for(name)
+    try:
+        page = await asyncio.to_thread(commit_log.page, name, full_path, after, limit)
+    except UnknownCursor:
+        raise HTTPException(409, "History changed since this page was loaded; reload the log")
+    now = int(time.time())
+    commits = [{
+        "hash": c.sha[:7],
+        "sha": c.sha,
+        "message": c.subject,
+        "date": relative_time(c.committer_ts, now),
+        "author": c.author,
+    } for c in page["commits"]]
+    return {"commits": commits, "next": page["next"], "head": page["head"]}
+
+
+@router.get("/git/{name:path}/branches")
+async def git_branches(name: str, limit: int = 5):
     """Get the latest git branches as structured data."""
-    full_path = os.path.join(BASE_PATH, name)
-    branch_output = run_git(["branch", f"-{limit}"], full_path)
+    full_path = repo_registry.path_for(name)
+    branch_output = await run_git_async(["branch", f"-{limit}"], full_path)
     if not branch_output:
         return {"branches": []}
 
@@ -55,51 +68,72 @@ def git_branches(name: str, limit: int = 5):
     return {"branches": branches}
 
 
-@router.get("/git/{name}/recent-files")
-def git_recent_files(name: str, depth: int = 1):
-    """Return files changed in the last N commits, with change type (M/A/D/R)."""
-    full_path = os.path.join(BASE_PATH, name)
+@router.get("/git/{name:path}/recent-files")
+async def git_recent_files(name: str, depth: int = 1):
+    """
+    Files changed in the last N commits, newest first, with change type
+    (M/A/D/T), at most 20. Cached per HEAD SHA and depth, so repeat hovers
+    cost no git call until HEAD moves; "truncated" is set when more paths
+    changed than are listed.
+    """
+    full_path = repo_registry.path_for(name)
     if not os.path.isdir(os.path.join(full_path, ".git")):
         return {"files": []}
-    out = run_git(["diff", "--name-status", f"HEAD~{depth}..HEAD"], full_path) or ""
-    if not out:
-        # Fewer than depth commits — diff from first commit
-        out = run_git(["diff", "--name-status", "--root", "HEAD"], full_path) or ""
-    files = []
-    seen = set()
-    for line in out.splitlines():
-        parts = line.split("\t", 1)
-        if len(parts) == 2:
-            status, path = parts[0][0], parts[1]  # M/A/D/R first char
-            if path not in seen:
-                seen.add(path)
-                files.append({"status": status, "path": path})
-    return {"files": files[:20]}  # cap at 20
-
-
-@router.get("/git/{name}/details")
-def get_git_details(name: str):
+    result = await asyncio.to_thread(recent_files.get, full_path, depth)
+    return {"files": result["files"], "truncated": result["truncated"]}
+
+
+@router.post("/recent-files/prewarm")
+async def prewarm_recent_files(body: PrewarmBody):
+    """
+    Warm the recent-files cache for the repos the grid shows first, in the
+    background. Not under /git/{name}/ so it can't be taken for a repo action.
+    """
+    paths = []
+    for name in body.repos[:50]:
+        full_path = repo_registry.path_for(name)
+        if os.path.isdir(os.path.join(full_path, ".git")):
+            paths.append(full_path)
+    return {"queued": recent_files.schedule_prewarm(paths, body.depth)}
+
+
+@router.get("/git/{name:path}/status-mode")
+async def get_status_mode(name: str):
+    """The repo's status mode ("fast" or "full") and what chose it (override, default, auto)."""
+    full_path = repo_registry.path_for(name)
+    mode, why = fast_status.mode_for(full_path)
+    return {"mode": mode, "why": why, "override": state_store.status_mode(name)}
+
+
+@router.put("/git/{name:path}/status-mode")
+async def set_status_mode(name: str, body: StatusModeBody):
+    """Pin the repo to fast or full status checks, or "default" to follow FAST_STATUS."""
+    full_path = repo_registry.path_for(name)
+    state_store.set_status_mode(name, None if body.mode == "default" else body.mode)
+    git_info_cache.invalidate(full_path)
+    mode, why = fast_status.mode_for(full_path)
+    return {"success": True, "mode": mode, "why": why}
+
+
+@router.get("/git/{name:path}/details")
+async def get_git_details(name: str):
     """Get detailed git information including branches and commits."""
-    full_path = os.path.join(BASE_PATH, name)
+    full_path = repo_registry.path_for(name)
     if not os.path.isdir(os.path.join(full_path, ".git")):
         return {"error": "Not a git repository"}
 
     # 1. Get branches
-    branch_out = run_git(["branch"], full_path) or ""
+    branch_out = await run_git_async(["branch"], full_path) or ""
     branches = [b.strip() for b in branch_out.splitlines()]
 
-    # 2. Get the last 10 commits with a specific format: Hash|Subject|Time|Author
-    log_out = run_git(["log", "-n", "10", "--pretty=format:%h|%s|%ar|%an"], full_path) or ""
-    commits = []
-    if log_out:
-        for line in log_out.splitlines():
-            parts = line.split("|", 3)
-            if len(parts) == 4:
-                commits.append({
-                    "hash": parts[0],
-                    "message": parts[1],
-                    "time": parts[2],
-                    "author": parts[3]
-                })
+    # 2. The last 10 commits, from the commit log cache
+    page = await asyncio.to_thread(commit_log.page, name, full_path, None, 10)
+    now = int(time.time())
+    commits = [{
+        "hash": c.sha[:7],
+        "message": c.subject,
+        "time": relative_time(c.author_ts, now),
+        "author": c.author,
+    } for c in page["commits"]]
 
     return {"branches": branches, "commits": commits}
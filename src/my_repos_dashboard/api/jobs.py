@@ -0,0 +1,53 @@
+"""Job queue API endpoints: status, results and cancellation of queued operations."""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from fastapi import APIRouter, HTTPException
+
+from ..core.job_queue import Job, job_queue
+
+router = APIRouter(tags=["jobs"])
+
+
+async def job_response(job: Job, background: bool) -> Any:
+    """
+    Handler result for a queued job: its id right away with ?background=1,
+    otherwise the job's own result once it has run.
+    """
+    if background:
+        return {"success": True, "job_id": job.id, "job": job.summary()}
+    return await job.wait()
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.get("/jobs")
+def list_jobs(repo: Optional[str] = None, active: bool = False):
+    """Queued, running and recently finished jobs, optionally for one repo."""
+    jobs = job_queue.list(repo)
+    if active:
+        jobs = [j for j in jobs if not j.done]
+    return {"jobs": [j.summary() for j in jobs]}
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """A job's status, and its result once finished."""
+    return _get_job(job_id).summary()
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Cancel a queued job (or a running one that is safe to interrupt)."""
+    ok, out = job_queue.cancel(_get_job(job_id))
+    return {"success": ok, "output": out}
+
+
+__all__ = ["router", "job_response"]
@@ -2,127 +2,195 @@
 
 from __future__ import annotations
 
-import os
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import bisect
+import json
 from datetime import datetime, timedelta
+from typing import Literal, Optional
 
 import fastapi
-from fastapi import APIRouter
-
-from ..core.config import BASE_PATH
-from ..core.git_utils import run_git
-from ..core.worktree_ops import get_git_info
-from .pinned import load_pinned
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from ..core import stats_engine
+from ..core.commit_index import commit_index
+from ..core.project_store import project_stores
+from ..core.repo_registry import RepoEntry, repo_registry
+from ..core.responses import EncodedBody
+from ..core.repo_watcher import repo_watcher
+from ..core.singleflight import endpoint_flights
+from ..core.state_store import state_store
+from ..core.worktree_ops import get_git_info_async
 
 router = APIRouter(tags=["projects"])
 
-# Scratchpad storage directory
-SCRATCHPAD_DIR = os.path.join(BASE_PATH, ".my_dashboard", "repos")
-
 
 @router.get("/projects")
-def get_projects():
-    """Get all projects with git information."""
-    folders = [
-        f for f in os.listdir(BASE_PATH)
-        if os.path.isdir(os.path.join(BASE_PATH, f)) and f != "my-dashboard"
-    ]
-
-    # Load pinned repos for filtering and sorting
-    pinned = load_pinned()
-
-    def process(name):
-        full_path = os.path.join(BASE_PATH, name)
-        result = {"name": name, "path": full_path, "git": get_git_info(full_path)}
+async def get_projects(request: Request, worktrees: Literal["full", "count"] = "full", since: Optional[int] = None):
+    """
+    Get all projects with git information, plus the snapshot version.
+    worktrees=count skips the per-repo worktree list (and its merge status
+    checks) and reports git.worktree_count; the list is served on demand by
+    /wt/{name}/list.
+    since=<version> returns only the repos changed after that version, the
+    names of removed repos and the current order (see core.project_store).
+    Bodies are gzip/brotli-compressed per Accept-Encoding and carry an ETag.
+    """
+    await endpoint_flights.run(("projects", worktrees), lambda: _scan_projects(worktrees))
+    store = project_stores[worktrees]
+    body = store.full_body() if since is None else store.delta_body(since)
+    return body.response(request, {"Cache-Control": "no-cache"})
+
+
+async def _process_project(entry: RepoEntry, pinned: frozenset[str], scratch: frozenset[str], worktrees: str) -> dict:
+    """One /projects entry: git info, scratchpad flag and pin state."""
+    name, full_path = entry.name, entry.path
+    git = await get_git_info_async(full_path, worktrees) if entry.kind != "folder" else None
+    return {
+        "name": name,
+        "path": full_path,
+        "git": git,
+        "hasScratchpad": name in scratch,
+        "isPinned": name in pinned,
+    }
 
-        # Check if scratchpad has content
-        scratchpad_file = os.path.join(SCRATCHPAD_DIR, name, "scratch.md")
-        result["hasScratchpad"] = False
-        if os.path.exists(scratchpad_file):
-            try:
-                with open(scratchpad_file, "r", encoding="utf-8") as f:
-                    content = f.read().strip()
-                    result["hasScratchpad"] = bool(content)
-            except Exception:
-                result["hasScratchpad"] = False
 
-        # Check if repo is pinned
-        result["isPinned"] = name in pinned
+async def _scan_projects(worktrees: str) -> int:
+    """Scan all repos into the snapshot store (shared by coalesced requests)."""
+    entries = repo_registry.entries()
+
+    # Pin and scratchpad flags come from the in-memory state store
+    pinned, scratch = state_store.pinned(), state_store.scratchpad_names()
+
+    # All repos are scanned concurrently; git_procs bounds the git processes
+    projects = list(await asyncio.gather(*(_process_project(e, pinned, scratch, worktrees) for e in entries)))
+
+    return project_stores[worktrees].sync(projects)
+
+
+@router.get("/projects/stream")
+async def stream_projects(worktrees: Literal["full", "count"] = "full"):
+    """
+    NDJSON variant of /projects that emits each repo as soon as it is scanned,
+    so one slow repo doesn't hold back the whole grid. Records, one per line:
+
+        {"type": "start", "total": n}
+        {"type": "project", "project": {...}}    # completion order, n times
+        {"type": "order", "names": [...], "version": v}   # final /projects ordering
+    """
+    entries = repo_registry.entries()
+    pinned, scratch = state_store.pinned(), state_store.scratchpad_names()
+
+    async def stream():
+        yield json.dumps({"type": "start", "total": len(entries)}) + "\n"
+        tasks = [asyncio.ensure_future(_process_project(e, pinned, scratch, worktrees)) for e in entries]
+        projects = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                project = await next_done
+                projects.append(project)
+                yield json.dumps({"type": "project", "project": project}) + "\n"
+        finally:
+            # Client went away: stop scanning the remaining repos
+            for task in tasks:
+                task.cancel()
+        store = project_stores[worktrees]
+        version = store.sync(projects)
+        yield json.dumps({"type": "order", "names": store.names(), "version": version}) + "\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/projects/events")
+async def project_events(request: Request):
+    """
+    Server-Sent Events stream of per-repo git info deltas from the background
+    watcher, so the grid only needs a full /projects load once.
+    """
+    queue = repo_watcher.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            repo_watcher.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        return result
 
-    with ThreadPoolExecutor(max_workers=min(len(folders), 12)) as executor:
-        projects = list(executor.map(process, folders))
+@router.get("/stats")
+async def get_stats(request: Request, days: int = 7):
+    """Get advanced statistics including streaks, heatmap, and week-over-week comparison."""
+    body = await endpoint_flights.run(("stats", days), lambda: _encoded_stats(days))
+    return body.response(request, {"Cache-Control": "no-cache"})
 
-    # Sort: pinned repos first, then by last_ts (most recent first)
-    projects.sort(key=lambda p: (
-        not p.get("isPinned", False),  # Pinned repos first (False sorts after True)
-        p["git"]["last_ts"] if p["git"] else 0  # Then by timestamp (reverse)
-    ), reverse=True)
 
-    return {"projects": projects}
+async def _encoded_stats(days: int) -> EncodedBody:
+    # Encoded once per computation; coalesced and TTL callers share the bytes
+    return EncodedBody.from_obj(await _compute_stats(days))
 
 
-@router.get("/stats")
-def get_stats(days: int = 7):
-    """Get advanced statistics including streaks, heatmap, and week-over-week comparison."""
+async def _compute_stats(days: int):
+    """Build the /stats payload (shared by coalesced requests)."""
     now = datetime.now()
     today = now.date()
-    since_main = (now - timedelta(days=days)).strftime("%Y-%m-%d")
     week_start = today - timedelta(days=6)   # rolling 7 days ending today
     prev_start = today - timedelta(days=13)  # the 7 days before that
 
-    folders = [
-        f for f in os.listdir(BASE_PATH)
-        if os.path.isdir(os.path.join(BASE_PATH, f)) and f != "my-dashboard"
-    ]
+    repos = [e for e in repo_registry.entries() if e.kind != "folder"]
 
-    # ── collect per-repo data in parallel ─────────────────────────────────────
-    def collect_repo(folder):
-        repo_path = os.path.join(BASE_PATH, folder)
-        if not os.path.exists(os.path.join(repo_path, ".git")):
-            return None
+    cur_cutoff = (now - timedelta(days=days)).timestamp()
+    year_cutoff = (now - timedelta(days=365)).timestamp()
 
-        # Current period (for ranking / day-of-week chart)
-        cur_out = run_git(["log", f"--since={since_main}", "--pretty=format:%ct"], repo_path) or ""
-        cur_ts = [int(t) for t in cur_out.splitlines() if t.strip().isdigit()]
+    # ── collect per-repo data concurrently ────────────────────────────────────
+    async def collect_repo(entry: RepoEntry):
+        folder, repo_path = entry.name, entry.path
 
-        # 1-year history for streaks + hour heatmap + week comparison
-        all_out = run_git(["log", "--since=1 year ago", "--pretty=format:%ct"], repo_path) or ""
-        all_ts = [int(t) for t in all_out.splitlines() if t.strip().isdigit()]
+        # Both windows are slices of the persistent commit index, which only
+        # walks commits added since the last request
+        ts = await asyncio.to_thread(commit_index.since, folder, repo_path, min(cur_cutoff, year_cutoff))
+        all_ts = ts[bisect.bisect_left(ts, year_cutoff):]
+        cur_ts = ts[bisect.bisect_left(ts, cur_cutoff):]
 
-        # Uncommitted work snapshot
-        status_out = run_git(["status", "--porcelain"], repo_path) or ""
-        lines = status_out.splitlines()
-        staged = sum(1 for l in lines if l and l[0] in "MADRC")
-        modified = sum(1 for l in lines if l and l[1] in "MD")
-        untracked = sum(1 for l in lines if l.startswith("??"))
+        # Uncommitted work snapshot (shares the /projects git info cache)
+        info = await get_git_info_async(repo_path, worktrees="count") or {}
 
         return {
             "name": folder,
             "cur_ts": cur_ts,
             "all_ts": all_ts,
-            "is_dirty": bool(status_out),
-            "staged": staged,
-            "modified": modified,
-            "untracked": untracked,
+            "is_dirty": info.get("is_dirty", False),
+            "staged": info.get("staged", 0),
+            "modified": info.get("unstaged", 0),
+            "untracked": info.get("untracked", 0),
         }
 
-    with ThreadPoolExecutor(max_workers=min(len(folders), 12)) as ex:
-        results = [r for r in ex.map(collect_repo, folders) if r]
+    results = list(await asyncio.gather(*(collect_repo(e) for e in repos)))
 
     # ── aggregate ──────────────────────────────────────────────────────────────
-    all_commits = []   # (ts, name) — current period only
-    all_commits_all = []   # (ts, name) — full 1-year
+    # Timestamps stay in int64 buffers; stats_engine buckets them into local
+    # days/hours once per buffer instead of calling fromtimestamp per commit.
     repo_activity = []
     dirty_repos = total_staged = total_modified = total_untracked = 0
 
     for r in results:
-        if r["cur_ts"]:
-            all_commits.extend((ts, r["name"]) for ts in r["cur_ts"])
+        if len(r["cur_ts"]):
             repo_activity.append({"name": r["name"], "commits": len(r["cur_ts"]), "cur_ts": r["cur_ts"]})
-        all_commits_all.extend((ts, r["name"]) for ts in r["all_ts"])
         if r["is_dirty"]:
             dirty_repos += 1
             total_staged += r["staged"]
@@ -130,19 +198,22 @@ def get_stats(days: int = 7):
             total_untracked += r["untracked"]
 
     repo_activity.sort(key=lambda x: x["commits"], reverse=True)
-    total_commits = len(all_commits)
+    total_commits = sum(r["commits"] for r in repo_activity)
+
+    cur_days, _ = stats_engine.local_days_hours(stats_engine.concat([r["cur_ts"] for r in results]))
+    year_days, year_hours = stats_engine.local_days_hours(stats_engine.concat([r["all_ts"] for r in results]))
+    today_day = stats_engine.day_number(today)
+    week_start_day = stats_engine.day_number(week_start)
 
     # ── day-of-week distribution (current period) ──────────────────────────────
     day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    day_counts = defaultdict(int)
-    for ts, _ in all_commits:
-        day_counts[datetime.fromtimestamp(ts).weekday()] += 1
+    day_counts = stats_engine.weekday_counts(cur_days)
 
     day_distribution = []
     most_active_day = "No commits"
     most_active_pct = 0
     if total_commits:
-        best = max(day_counts, key=lambda k: day_counts[k])
+        best = max(range(7), key=lambda k: day_counts[k])
         most_active_day = day_names[best]
         most_active_pct = round(day_counts[best] / total_commits * 100)
         for i in range(7):
@@ -153,27 +224,20 @@ def get_stats(days: int = 7):
             })
 
     # ── hour-of-day heatmap (full 1-year history) ──────────────────────────────
-    hour_counts = defaultdict(int)
-    for ts, _ in all_commits_all:
-        hour_counts[datetime.fromtimestamp(ts).hour] += 1
+    hour_counts = stats_engine.hour_counts(year_hours)
     hour_distribution = [{"hour": h, "count": hour_counts[h]} for h in range(24)]
 
     # ── this week vs last week ─────────────────────────────────────────────────
-    this_week = [0] * 7
-    last_week = [0] * 7
-    for ts, _ in all_commits_all:
-        d = datetime.fromtimestamp(ts).date()
-        if week_start <= d <= today:
-            this_week[(d - week_start).days] += 1
-        elif prev_start <= d < week_start:
-            last_week[(d - prev_start).days] += 1
+    this_week = stats_engine.window_counts(year_days, week_start_day)
+    last_week = stats_engine.window_counts(year_days, stats_engine.day_number(prev_start))
     week_labels = [(week_start + timedelta(days=i)).strftime("%a") for i in range(7)]
 
     # ── latest commit ──────────────────────────────────────────────────────────
+    # Index slices are sorted ascending, so each repo's newest commit is last
     latest_commit = latest_repo = None
-    if all_commits:
-        latest_ts, latest_repo = max(all_commits, key=lambda x: x[0])
-        secs = int((now - datetime.fromtimestamp(latest_ts)).total_seconds())
+    if repo_activity:
+        latest_ts, latest_repo = max((r["cur_ts"][-1], r["name"]) for r in repo_activity)
+        secs = int(now.timestamp() - latest_ts)
         if secs < 60:
             latest_commit = f"{secs}s ago"
         elif secs < 3600:
@@ -184,49 +248,16 @@ def get_stats(days: int = 7):
             latest_commit = f"{secs // 86400}d ago"
 
     # ── streaks (longest + current) — computed from 1-year history ────────────
-    longest_streak = current_streak_val = 0
-    streak_start_date = streak_end_date = None
-
-    if all_commits_all:
-        unique_dates = sorted(
-            {datetime.fromtimestamp(ts).date() for ts, _ in all_commits_all},
-            reverse=True
-        )
-
-        # Current streak — walk back from today
-        cur = 0
-        check = today
-        for d in unique_dates:
-            if d == check or d == check - timedelta(days=1):
-                cur += 1
-                check = d
-            elif d < check - timedelta(days=1):
-                break
-        current_streak_val = cur
-
-        # Longest streak ever
-        run = best_run = 1
-        best_end = unique_dates[0]
-        for i in range(1, len(unique_dates)):
-            if (unique_dates[i-1] - unique_dates[i]).days == 1:
-                run += 1
-                if run > best_run:
-                    best_run = run
-                    best_end = unique_dates[i-1]
-            else:
-                run = 1
-        longest_streak = best_run
-        streak_end_date = best_end
-        streak_start_date = best_end - timedelta(days=best_run - 1)
+    streak = stats_engine.streaks(year_days, today_day)
+    longest_streak = streak["longest"]
+    current_streak_val = streak["current"]
+    streak_start_date = stats_engine.day_to_date(streak["start"]) if streak["start"] is not None else None
+    streak_end_date = stats_engine.day_to_date(streak["end"]) if streak["end"] is not None else None
 
     # ── top repos enriched with daily sparkline ───────────────────────────────
     top_repos = []
     for r in repo_activity[:5]:
-        spark = [0] * 7
-        for ts in r["cur_ts"]:
-            d = datetime.fromtimestamp(ts).date()
-            if week_start <= d <= today:
-                spark[(d - week_start).days] += 1
+        spark = stats_engine.window_counts(stats_engine.local_days(r["cur_ts"]), week_start_day)
         top_repos.append({"name": r["name"], "commits": r["commits"], "spark": spark})
 
     return {
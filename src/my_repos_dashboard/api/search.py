@@ -0,0 +1,43 @@
+"""Commit search API: ranked full-text hits across every repo."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from ..core.commit_search import SearchQueryError, commit_search
+from ..core.git_native import relative_time
+
+router = APIRouter(tags=["search"])
+
+
+@router.get("/search")
+async def search_commits(q: str, limit: int = 50):
+    """
+    Commits matching q across all repos, best match first. Words are
+    prefix-matched; repo:, author:, path:, since: and until: filter.
+    Served from the local index, which is brought up to date in the
+    background (see "index" for its state).
+    """
+    commit_search.schedule_refresh()
+    start = time.perf_counter()
+    try:
+        hits = await asyncio.to_thread(commit_search.search, q, limit)
+    except SearchQueryError as e:
+        raise HTTPException(400, str(e))
+    took = (time.perf_counter() - start) * 1000
+    now = int(time.time())
+    for hit in hits:
+        hit["hash"] = hit["sha"][:7]
+        hit["date"] = relative_time(hit["ts"], now)
+    return {"query": q, "hits": hits, "took_ms": round(took, 1), "index": commit_search.stats()}
+
+
+@router.post("/search/reindex")
+async def reindex_search(name: Optional[str] = None):
+    """Rebuild the index for one repo (or all), dropping unreachable commits."""
+    added = await asyncio.to_thread(commit_search.reindex, name)
+    return {"success": True, "indexed": added}
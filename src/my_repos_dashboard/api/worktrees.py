@@ -2,44 +2,76 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 
-from ..core.config import BASE_PATH
-from ..core.git_utils import run_git, run_git_out
-from ..core.worktree_ops import get_worktrees_for_repo
+from ..core.repo_registry import repo_registry
+from ..core.git_cache import repo_fingerprint
+from ..core.job_queue import job_queue
+from ..core.repo_watcher import repo_watcher
+from ..core.responses import etag_matches
+from ..core.git_utils import run_git, run_git_out, get_current_branch_async
+from ..core.worktree_ops import get_worktrees_for_repo_async
 from ..models.schemas import CreateWT, RemoveWTBody, MergeWTBody
+from .jobs import job_response
 
 router = APIRouter(tags=["worktrees"])
 
 
-@router.get("/wt/{name}/list")
-def wt_list(name: str):
-    """List all worktrees for a repo with full merge status, age, SHA."""
-    repo_path = os.path.join(BASE_PATH, name)
+def _worktree_list_etag(fingerprint, worktrees: list[dict]) -> str:
+    """
+    ETag from the repo fingerprint (HEAD, refs, .git/worktrees admin dirs)
+    plus the worktree ages, the only part of the list not derived from .git.
+    """
+    state = (fingerprint, [w["age"] for w in worktrees])
+    return '"' + hashlib.sha1(repr(state).encode("utf-8")).hexdigest()[:20] + '"'
+
+
+@router.get("/wt/{name:path}/list")
+async def wt_list(name: str, request: Request, response: Response):
+    """
+    List all worktrees for a repo with full merge status, age, SHA.
+    Supports If-None-Match: unchanged lists get 304 Not Modified.
+    """
+    repo_path = repo_registry.path_for(name)
     if not os.path.isdir(repo_path):
         raise HTTPException(404, "Repo not found")
-    worktrees = get_worktrees_for_repo(repo_path)
-    current = run_git(["rev-parse", "--abbrev-ref", "HEAD"], repo_path) or ""
+    # Fingerprint first: if the repo changes while the list is built, the
+    # ETag describes the older state and the next request gets a fresh body.
+    # The list itself is cached by fingerprint, so unchanged repos run no git.
+    fingerprint = await asyncio.to_thread(repo_fingerprint, repo_path)
+    worktrees = await get_worktrees_for_repo_async(repo_path)
+    etag = _worktree_list_etag(fingerprint, worktrees)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    current = await get_current_branch_async(repo_path)
     return {"worktrees": worktrees, "current_branch": current}
 
 
-@router.get("/wt/{name}/default-suffix")
-def wt_default_suffix(name: str):
+@router.get("/wt/{name:path}/default-suffix")
+async def wt_default_suffix(name: str):
     """Return the default chronological branch suffix (mirrors wtm.py naming)."""
-    repo_path = os.path.join(BASE_PATH, name)
-    worktrees = get_worktrees_for_repo(repo_path)
+    repo_path = repo_registry.path_for(name)
+    worktrees = await get_worktrees_for_repo_async(repo_path)
     counter = max(0, len(worktrees) - 1)
     suffix = datetime.now().strftime(f"fix-%b%d-%H%M-{counter}")
     return {"suffix": suffix}
 
 
-@router.post("/wt/{name}/create")
-def wt_create(name: str, body: CreateWT):
-    """Create a new worktree at BASE_PATH/suffix with a new branch named suffix."""
-    repo_path = os.path.join(BASE_PATH, name)
+@router.post("/wt/{name:path}/create")
+async def wt_create(name: str, body: CreateWT, background: bool = False):
+    """
+    Create a new worktree next to the repo (BASE_PATH/suffix for top-level
+    repos, BASE_PATH/group/suffix for nested ones) with a new branch named suffix.
+    Queued behind other jobs on the repo; ?background=1 returns the job id.
+    """
+    repo_path = repo_registry.path_for(name)
     if not os.path.isdir(repo_path):
         raise HTTPException(404, "Repo not found")
 
@@ -47,18 +79,29 @@ def wt_create(name: str, body: CreateWT):
     if not suffix:
         raise HTTPException(400, "suffix is required")
 
-    new_path = os.path.join(BASE_PATH, suffix)
+    job = job_queue.submit("wt-create", name, _create_worktree, repo_path, suffix)
+    return await job_response(job, background)
+
+
+def _create_worktree(repo_path: str, suffix: str) -> dict:
+    new_path = os.path.join(os.path.dirname(repo_path), suffix)
     ok, out = run_git_out(["worktree", "add", new_path, "-b", suffix], repo_path, timeout=20)
+    repo_watcher.notify(repo_path)
     return {"success": ok, "output": out, "path": new_path, "branch": suffix}
 
 
-@router.post("/wt/{name}/remove")
-def wt_remove(name: str, body: RemoveWTBody):
+@router.post("/wt/{name:path}/remove")
+async def wt_remove(name: str, body: RemoveWTBody, background: bool = False):
     """Force-remove a worktree and optionally delete its branch. Prunes after."""
-    repo_path = os.path.join(BASE_PATH, name)
+    repo_path = repo_registry.path_for(name)
     if not os.path.isdir(repo_path):
         raise HTTPException(404, "Repo not found")
 
+    job = job_queue.submit("wt-remove", name, _remove_worktree, repo_path, body)
+    return await job_response(job, background)
+
+
+def _remove_worktree(repo_path: str, body: RemoveWTBody) -> dict:
     ok, out = run_git_out(
         ["worktree", "remove", "--force", body.worktree_path], repo_path, timeout=15
     )
@@ -66,6 +109,7 @@ def wt_remove(name: str, body: RemoveWTBody):
         return {"success": False, "output": out}
 
     run_git(["worktree", "prune"], repo_path)
+    repo_watcher.notify(repo_path)
 
     branch_out = ""
     if body.delete_branch and body.branch and body.branch not in ("N/A", None):
@@ -79,17 +123,23 @@ def wt_remove(name: str, body: RemoveWTBody):
     }
 
 
-@router.post("/wt/{name}/merge")
-def wt_merge(name: str, body: MergeWTBody):
+@router.post("/wt/{name:path}/merge")
+async def wt_merge(name: str, body: MergeWTBody, background: bool = False):
     """
     Merge a worktree's branch into the repo's current branch.
     Optionally clean up worktree + branch after successful merge.
-    Mirrors wtm.py merge_worktree() logic.
+    Mirrors wtm.py merge_worktree() logic. Merges on one repo run one at a
+    time; ?background=1 returns the job id instead of waiting.
     """
-    repo_path = os.path.join(BASE_PATH, name)
+    repo_path = repo_registry.path_for(name)
     if not os.path.isdir(repo_path):
         raise HTTPException(404, "Repo not found")
 
+    job = job_queue.submit("wt-merge", name, _merge_worktree, repo_path, body)
+    return await job_response(job, background)
+
+
+def _merge_worktree(repo_path: str, body: MergeWTBody) -> dict:
     current = run_git(["rev-parse", "--abbrev-ref", "HEAD"], repo_path)
     if not current:
         return {"success": False, "output": "Cannot determine current branch"}
@@ -98,6 +148,7 @@ def wt_merge(name: str, body: MergeWTBody):
         return {"success": False, "output": f"Cannot merge '{body.branch}' into itself"}
 
     ok, out = run_git_out(["merge", body.branch], repo_path, timeout=30)
+    repo_watcher.notify(repo_path)
     if not ok:
         return {"success": False, "output": out, "merged_into": current}
 
@@ -0,0 +1,281 @@
+"""Background `git fetch` scheduler keeping ahead/behind counts fresh.
+
+The ahead/behind numbers on the cards compare HEAD with @{u}. Those are
+only as recent as the last fetch. This scheduler fetches every repo with a
+remote once per AUTO_FETCH_INTERVAL:
+
+- Staggered: first fetches are spread across the interval (not all at
+  startup), and a repo fetched recently, e.g. by hand, waits for
+  FETCH_HEAD + interval.
+- Rate-limited: at most AUTO_FETCH_CONCURRENCY fetches at once, with a
+  gap between starts. Every fetch also counts against GIT_MAX_PROCS.
+- Polite: nothing starts while requests are queued for a git process or
+  the load average is high (POSIX). Due repos simply wait for the next tick.
+- Backoff: a failing repo (offline remote, expired credentials) is
+  retried after 2x, 4x ... the interval, capped at _MAX_BACKOFF.
+
+Fetches never prompt: GIT_TERMINAL_PROMPT=0 and GCM_INTERACTIVE=never.
+Each fetch holds the repo's job_queue lock, like /git-bulk, so it never
+runs alongside a queued merge or pull on the same repo.
+Linked worktrees share their main repo's refs, so each common git dir is
+fetched once. New remote-tracking refs change the repo fingerprint, and the
+watcher pushes the updated ahead/behind counts to the grid.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import re
+import time
+from typing import Optional
+
+from .config import AUTO_FETCH_CONCURRENCY, AUTO_FETCH_INTERVAL
+from .git_native import resolve_git_dirs
+from .git_utils import git_procs, run_git_out_async
+from .job_queue import job_queue
+from .repo_registry import RepoRegistry, repo_registry
+
+_TICK = 5.0             # seconds between scheduling passes
+_START_GAP = 1.0        # min seconds between two fetch starts
+_FIRST_DELAY = 60.0     # nothing is fetched in the first minute after startup
+_MAX_BACKOFF = 6 * 3600
+_FETCH_TIMEOUT = 120
+_MAX_LOAD = 0.75        # 1-minute load average per CPU above which fetches wait
+_FETCH_ENV = {"GIT_TERMINAL_PROMPT": "0", "GCM_INTERACTIVE": "never"}
+_REMOTE_RE = re.compile(r'^\s*\[remote\s+"', re.MULTILINE)
+
+
+def _has_remote(common_dir: str) -> bool:
+    try:
+        with open(os.path.join(common_dir, "config"), "r", encoding="utf-8", errors="replace") as f:
+            return bool(_REMOTE_RE.search(f.read()))
+    except OSError:
+        return False
+
+
+def _fetch_head_mtime(common_dir: str) -> Optional[float]:
+    try:
+        return os.stat(os.path.join(common_dir, "FETCH_HEAD")).st_mtime
+    except OSError:
+        return None
+
+
+class _FetchTarget:
+    """Schedule state for one common git dir."""
+
+    __slots__ = ("name", "path", "common_dir", "next_due", "last_fetch",
+                 "last_attempt", "last_ok", "last_error", "failures", "has_remote")
+
+    def __init__(self, name: str, path: str, common_dir: str, next_due: float):
+        self.name = name
+        self.path = path
+        self.common_dir = common_dir
+        self.next_due = next_due
+        self.last_fetch = _fetch_head_mtime(common_dir)
+        self.last_attempt: Optional[float] = None
+        self.last_ok: Optional[bool] = None
+        self.last_error: Optional[str] = None
+        self.failures = 0
+        self.has_remote = True
+
+    def summary(self, now: float) -> dict:
+        return {
+            "name": self.name,
+            "has_remote": self.has_remote,
+            "last_fetch": self.last_fetch,
+            "last_attempt": self.last_attempt,
+            "last_ok": self.last_ok,
+            "last_error": self.last_error,
+            "failures": self.failures,
+            "next_in": round(max(0.0, self.next_due - now), 1),
+        }
+
+
+class AutoFetchScheduler:
+    """Periodic, staggered, concurrency-limited fetches with per-repo backoff."""
+
+    def __init__(
+        self,
+        registry: RepoRegistry = repo_registry,
+        interval: float = AUTO_FETCH_INTERVAL,
+        concurrency: int = AUTO_FETCH_CONCURRENCY,
+    ):
+        self.registry = registry
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self._targets: dict[str, _FetchTarget] = {}   # common dir -> target
+        self._dirs: dict[str, Optional[str]] = {}      # repo path -> common dir
+        self._running: set[str] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._fetch_tasks: set[asyncio.Task] = set()
+        self._started_at = 0.0
+        self.fetches = 0
+        self.failures = 0
+        self.deferred = 0
+        self.scheduler_errors = 0
+        self.last_scheduler_error: Optional[str] = None
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+    async def start(self) -> None:
+        if self._task or self.interval <= 0:
+            return
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._started_at = time.time()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop scheduling and cancel in-flight fetches (their git processes are killed)."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        tasks = list(self._fetch_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ── scheduling ────────────────────────────────────────────────────────────
+    def _sync_targets(self) -> None:
+        """Add targets for new repos and drop the ones that disappeared."""
+        now = time.time()
+        groups: dict[str, list] = {}
+        for entry in self.registry.entries():
+            if entry.kind == "folder":
+                continue
+            if entry.path not in self._dirs:
+                dirs = resolve_git_dirs(entry.path)
+                self._dirs[entry.path] = dirs[1] if dirs else None
+            common_dir = self._dirs[entry.path]
+            if common_dir:
+                groups.setdefault(common_dir, []).append(entry)
+
+        new = [d for d in groups if d not in self._targets]
+        first_pass = not self._targets
+        for i, common_dir in enumerate(new):
+            # Prefer the main checkout over its linked worktrees for naming
+            entries = groups[common_dir]
+            entry = next((e for e in entries if e.kind == "repo"), entries[0])
+            if first_pass:
+                # Spread the initial round evenly over one interval
+                due = self._started_at + min(_FIRST_DELAY, self.interval) + self.interval * i / max(1, len(new))
+            else:
+                due = now + random.uniform(0, self.interval)
+            target = _FetchTarget(entry.name, entry.path, common_dir, due)
+            if target.last_fetch:
+                target.next_due = max(due, target.last_fetch + self.interval)
+            self._targets[common_dir] = target
+
+        for common_dir in set(self._targets) - set(groups):
+            del self._targets[common_dir]
+        for path in set(self._dirs) - {e.path for es in groups.values() for e in es}:
+            del self._dirs[path]
+
+    def _busy(self) -> bool:
+        """True while interactive git work is queued or the machine is loaded."""
+        if git_procs.stats()["waiting"]:
+            return True
+        if hasattr(os, "getloadavg"):
+            try:
+                return os.getloadavg()[0] / (os.cpu_count() or 1) > _MAX_LOAD
+            except OSError:
+                return False
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._sync_targets)
+                now = time.time()
+                due = sorted(
+                    (t for t in self._targets.values()
+                     if t.next_due <= now and t.common_dir not in self._running),
+                    key=lambda t: t.next_due,
+                )
+                for target in due:
+                    if self._busy():
+                        self.deferred += 1
+                        break
+                    await self._slots.acquire()
+                    self._running.add(target.common_dir)
+                    task = asyncio.create_task(self._fetch(target))
+                    self._fetch_tasks.add(task)
+                    task.add_done_callback(self._fetch_tasks.discard)
+                    await asyncio.sleep(_START_GAP)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep scheduling; the error shows up in /diagnostics/auto-fetch
+                self.scheduler_errors += 1
+                self.last_scheduler_error = f"{type(e).__name__}: {e}"
+            await asyncio.sleep(_TICK)
+
+    async def _fetch(self, target: _FetchTarget) -> None:
+        try:
+            now = time.time()
+            target.last_attempt = now
+            target.has_remote = await asyncio.to_thread(_has_remote, target.common_dir)
+            if not target.has_remote:
+                target.next_due = now + self.interval
+                return
+            # Same per-repo lock as /git-bulk and queued jobs (merge, pull)
+            async with job_queue.repo_lock(target.name):
+                ok, out = await run_git_out_async(
+                    ["fetch", "--all"], target.path, timeout=_FETCH_TIMEOUT, env=_FETCH_ENV
+                )
+            now = time.time()
+            target.last_ok = ok
+            if ok:
+                self.fetches += 1
+                target.failures = 0
+                target.last_error = None
+                target.last_fetch = now
+                target.next_due = now + self.interval
+            else:
+                self.failures += 1
+                target.failures += 1
+                target.last_error = out[-500:]
+                backoff = min(self.interval * 2 ** target.failures, _MAX_BACKOFF)
+                target.next_due = now + backoff * random.uniform(0.9, 1.1)
+        finally:
+            self._running.discard(target.common_dir)
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Scheduler counters plus per-repo fetch state for diagnostics."""
+        now = time.time()
+        return {
+            "running": self._task is not None,
+            "interval": self.interval,
+            "concurrency": self.concurrency,
+            "in_flight": len(self._running),
+            "targets": len(self._targets),
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "deferred": self.deferred,
+            "scheduler_errors": self.scheduler_errors,
+            "last_scheduler_error": self.last_scheduler_error,
+            "repos": sorted((t.summary(now) for t in self._targets.values()), key=lambda r: r["name"]),
+        }
+
+
+# Process-wide scheduler, started by the app's startup hook
+auto_fetch = AutoFetchScheduler()
+
+
+async def start_auto_fetch() -> None:
+    """Startup hook: start fetching unless AUTO_FETCH_INTERVAL=0."""
+    await auto_fetch.start()
+
+
+async def stop_auto_fetch() -> None:
+    """Shutdown hook."""
+    await auto_fetch.stop()
+
+
+__all__ = ["AutoFetchScheduler", "auto_fetch", "start_auto_fetch", "stop_auto_fetch"]
@@ -0,0 +1,272 @@
+"""Background jobs for the custom commands run from repo cards.
+
+A command starts as a shell process in the repo directory and returns a job
+id right away. Two reader threads push stdout/stderr lines into a bounded
+ring buffer (COMMAND_OUTPUT_LINES per job), numbered with a sequence number
+so a client can resume with "lines after N". A supervisor thread enforces
+COMMAND_TIMEOUT and cancellation by terminating the whole process group,
+since build and test commands usually spawn children of their own.
+
+Async readers (the SSE endpoint) register an asyncio.Event that the threads
+set whenever new output or the final status arrives.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+from .config import COMMAND_OUTPUT_LINES, COMMAND_TIMEOUT
+
+# Finished jobs kept for late readers; older ones are dropped on the next start
+_KEEP_FINISHED = 50
+# Longest chunk read as one line (progress bars may never print a newline)
+_MAX_LINE = 8192
+# Seconds between terminate and kill when stopping a job
+_KILL_GRACE = 3.0
+
+
+def _signal_tree(proc: subprocess.Popen, hard: bool) -> None:
+    """Terminate (or kill) the shell and everything it started."""
+    try:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/T", "/F", "/PID", str(proc.pid)],
+                capture_output=True,
+                timeout=10,
+            )
+        else:
+            os.killpg(proc.pid, signal.SIGKILL if hard else signal.SIGTERM)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    if hard:
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+
+class CommandJob:
+    """One running or finished command and its retained output."""
+
+    def __init__(self, repo: str, cwd: str, cmd: str, timeout: float, max_lines: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.repo = repo
+        self.cwd = cwd
+        self.cmd = cmd
+        self.timeout = timeout
+        self.status = "running"  # running | succeeded | failed | timeout | cancelled
+        self.returncode: Optional[int] = None
+        self.error: Optional[str] = None
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self._lines: deque = deque(maxlen=max(1, max_lines))
+        self._next_seq = 1
+        self._stop_reason: Optional[str] = None
+        self._lock = threading.Lock()
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._proc: Optional[subprocess.Popen] = None
+
+    # ── process ──────────────────────────────────────────────────────────────
+    def start(self) -> None:
+        """Spawn the shell process and its reader/supervisor threads."""
+        kwargs = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        try:
+            self._proc = subprocess.Popen(
+                self.cmd,
+                cwd=self.cwd,
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                errors="replace",
+                **kwargs,
+            )
+        except Exception as e:
+            self.error = str(e)
+            self._finish("failed", None)
+            return
+        threading.Thread(target=self._supervise, daemon=True, name=f"cmd-{self.id}").start()
+
+    def _pump(self, stream, name: str) -> None:
+        with stream:
+            for line in iter(lambda: stream.readline(_MAX_LINE), ""):
+                self._append(name, line.rstrip("\r\n"))
+
+    def _supervise(self) -> None:
+        proc = self._proc
+        readers = [
+            threading.Thread(target=self._pump, args=(proc.stdout, "stdout"), daemon=True),
+            threading.Thread(target=self._pump, args=(proc.stderr, "stderr"), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        deadline = self.started + self.timeout if self.timeout > 0 else None
+        kill_at = None
+        while True:
+            try:
+                returncode = proc.wait(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            now = time.time()
+            if self._stop_reason is None and deadline is not None and now >= deadline:
+                self._stop_reason = "timeout"
+            if self._stop_reason and kill_at is None:
+                _signal_tree(proc, hard=False)
+                kill_at = now + _KILL_GRACE
+            elif kill_at is not None and now >= kill_at:
+                _signal_tree(proc, hard=True)
+
+        # Children that outlive the shell can hold the pipes open; don't wait forever
+        for reader in readers:
+            reader.join(timeout=_KILL_GRACE)
+        if self._stop_reason:
+            status = self._stop_reason
+        else:
+            status = "succeeded" if returncode == 0 else "failed"
+        if self._stop_reason == "timeout":
+            self._append("stderr", f"Command timed out after {self.timeout:g}s")
+        self._finish(status, returncode)
+
+    def cancel(self) -> bool:
+        """Ask the supervisor to stop the process; False if already finished."""
+        if self.status != "running" or self._proc is None:
+            return False
+        if self._stop_reason is None:
+            self._stop_reason = "cancelled"
+        _signal_tree(self._proc, hard=False)
+        return True
+
+    def _finish(self, status: str, returncode: Optional[int]) -> None:
+        with self._lock:
+            self.returncode = returncode
+            self.finished = time.time()
+            self.status = status
+        self._wake()
+
+    # ── output ───────────────────────────────────────────────────────────────
+    def _append(self, stream: str, text: str) -> None:
+        with self._lock:
+            self._lines.append((self._next_seq, stream, text))
+            self._next_seq += 1
+        self._wake()
+
+    def lines_after(self, seq: int = 0) -> tuple[list[tuple[int, str, str]], int]:
+        """
+        Retained lines with a sequence number above seq, plus how many lines
+        after seq were already dropped from the ring buffer.
+        """
+        with self._lock:
+            lines = [line for line in self._lines if line[0] > seq]
+            first = self._lines[0][0] if self._lines else self._next_seq
+        return lines, max(0, first - seq - 1)
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    # ── async readers ────────────────────────────────────────────────────────
+    def subscribe(self) -> asyncio.Event:
+        """Event set (from any thread) whenever output or status changes."""
+        event = asyncio.Event()
+        self._waiters.add((asyncio.get_running_loop(), event))
+        return event
+
+    def unsubscribe(self, event: asyncio.Event) -> None:
+        self._waiters = {w for w in self._waiters if w[1] is not event}
+
+    def _wake(self) -> None:
+        for loop, event in list(self._waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop already closed
+                self._waiters.discard((loop, event))
+
+    def summary(self) -> dict:
+        """JSON-ready description of the job (without output)."""
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "repo": self.repo,
+            "cmd": self.cmd,
+            "status": self.status,
+            "success": self.status == "succeeded",
+            "returncode": self.returncode,
+            "error": self.error,
+            "started": self.started,
+            "finished": self.finished,
+            "duration": round(end - self.started, 3),
+            "timeout": self.timeout,
+            "lines": self._next_seq - 1,
+        }
+
+
+class CommandJobs:
+    """Registry of command jobs, newest last."""
+
+    def __init__(self, max_lines: int = COMMAND_OUTPUT_LINES, keep_finished: int = _KEEP_FINISHED):
+        self.max_lines = max_lines
+        self.keep_finished = keep_finished
+        self._jobs: dict[str, CommandJob] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+
+    def start(self, repo: str, cwd: str, cmd: str, timeout: Optional[float] = None) -> CommandJob:
+        """Start cmd in cwd and return its job."""
+        job = CommandJob(repo, cwd, cmd, COMMAND_TIMEOUT if timeout is None else timeout, self.max_lines)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self.started += 1
+        job.start()
+        return job
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[CommandJob]:
+        return self._jobs.get(job_id)
+
+    def list(self, repo: Optional[str] = None) -> list[CommandJob]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j for j in jobs if repo is None or j.repo == repo]
+
+    def cancel_all(self) -> None:
+        """Stop every running job (server shutdown)."""
+        for job in self.list():
+            job.cancel()
+
+    def stats(self) -> dict:
+        """Counters for diagnostics."""
+        jobs = self.list()
+        return {
+            "started": self.started,
+            "running": sum(1 for j in jobs if not j.done),
+            "retained": len(jobs),
+            "max_lines": self.max_lines,
+            "timeout": COMMAND_TIMEOUT,
+        }
+
+
+# Process-wide job registry for the commands API
+command_jobs = CommandJobs()
+
+
+__all__ = ["CommandJob", "CommandJobs", "command_jobs"]
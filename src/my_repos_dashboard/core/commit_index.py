@@ -0,0 +1,157 @@
+"""Persistent per-repo index of commit timestamps for the stats endpoint.
+
+Each repo gets two files under .my_dashboard/commit_index/:
+  <key>.ts   - committer timestamps of every commit reachable from HEAD,
+               sorted ascending, stored as a raw int64 array
+  <key>.json - {"tip": <HEAD sha when indexed>, "count": n, "byteorder": ...}
+
+On refresh only old_tip..new_tip is walked; a full walk happens only the
+first time or when history was rewritten (old tip no longer an ancestor).
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import os
+import sys
+import tempfile
+import threading
+from array import array
+from typing import Optional
+from urllib.parse import quote
+
+from .config import BASE_PATH
+from .git_utils import get_branch_sha, run_git
+
+INDEX_DIR = os.path.join(BASE_PATH, ".my_dashboard", "commit_index")
+_FORMAT_VERSION = 1
+
+
+def _index_key(name: str) -> str:
+    """Filesystem-safe file stem for a repo name."""
+    return quote(name, safe="")
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Replace path with data; each writer gets its own temp file, so concurrent saves can't tear it."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _parse_timestamps(output: str) -> list[int]:
+    return [int(t) for t in output.split() if t.isdigit()]
+
+
+class CommitIndex:
+    """Sorted commit timestamps per repo, persisted on disk and memoized in memory."""
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        self.index_dir = index_dir
+        self._mem: dict[str, tuple[str, array]] = {}
+        self._lock = threading.Lock()
+        self.full_walks = 0
+        self.incremental_walks = 0
+
+    def _paths(self, name: str) -> tuple[str, str]:
+        stem = os.path.join(self.index_dir, _index_key(name))
+        return f"{stem}.json", f"{stem}.ts"
+
+    def _load(self, name: str) -> Optional[tuple[str, array]]:
+        meta_path, ts_path = self._paths(name)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != _FORMAT_VERSION:
+                return None
+            ts = array("q")
+            with open(ts_path, "rb") as f:
+                ts.frombytes(f.read())
+        except (OSError, ValueError):
+            return None
+        if meta.get("byteorder") != sys.byteorder:
+            ts.byteswap()
+        if len(ts) != meta.get("count"):
+            return None  # torn write: rebuild
+        return meta["tip"], ts
+
+    def _save(self, name: str, tip: str, ts: array) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        meta_path, ts_path = self._paths(name)
+        _atomic_write(ts_path, ts.tobytes())
+        meta = {"version": _FORMAT_VERSION, "tip": tip, "count": len(ts), "byteorder": sys.byteorder}
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def timestamps(self, name: str, repo_path: str) -> array:
+        """
+        Return all commit timestamps reachable from HEAD, sorted ascending.
+        Costs no git process when HEAD hasn't moved since the last call.
+        """
+        tip = get_branch_sha("HEAD", repo_path)
+        if not tip:
+            return array("q")
+
+        with self._lock:
+            cached = self._mem.get(name)
+        if cached is None:
+            cached = self._load(name)
+        if cached and cached[0] == tip:
+            with self._lock:
+                self._mem[name] = cached
+            return cached[1]
+
+        ts = None
+        if cached and run_git(["merge-base", "--is-ancestor", cached[0], tip], repo_path) is not None:
+            out = run_git(["log", "--pretty=format:%ct", f"{cached[0]}..{tip}"], repo_path, timeout=60)
+            if out is not None:
+                new_ts = sorted(_parse_timestamps(out))
+                ts = array("q", heapq.merge(cached[1], new_ts))
+                self.incremental_walks += 1
+        if ts is None:
+            out = run_git(["log", "--pretty=format:%ct", tip], repo_path, timeout=120)
+            if out is None:
+                return array("q")
+            ts = array("q", sorted(_parse_timestamps(out)))
+            self.full_walks += 1
+
+        try:
+            self._save(name, tip, ts)
+        except OSError:
+            pass  # index stays memory-only; rebuilt next process start
+        with self._lock:
+            self._mem[name] = (tip, ts)
+        return ts
+
+    def since(self, name: str, repo_path: str, cutoff: float) -> array:
+        """Timestamps >= cutoff (a slice of the sorted index)."""
+        ts = self.timestamps(name, repo_path)
+        return ts[bisect.bisect_left(ts, cutoff):]
+
+    def stats(self) -> dict:
+        """Walk counters for diagnostics."""
+        with self._lock:
+            repos = len(self._mem)
+            commits = sum(len(ts) for _, ts in self._mem.values())
+        return {
+            "repos": repos,
+            "commits": commits,
+            "full_walks": self.full_walks,
+            "incremental_walks": self.incremental_walks,
+        }
+
+
+# Process-wide index shared by all endpoints
+commit_index = CommitIndex()
+
+
+__all__ = ["CommitIndex", "commit_index", "INDEX_DIR"]
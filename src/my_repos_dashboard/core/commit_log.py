@@ -0,0 +1,289 @@
+"""Persistent per-repo cache of parsed commit records for the history API.
+
+/git/{name}/log pages through HEAD's history with a cursor (after=<sha>).
+The records come from this cache. It is filled lazily, a chunk at a time, so
+a repo with 100k commits only has what was actually scrolled through:
+
+- A page inside the cached range costs no git process at all.
+- A page past the end costs one `git log --skip=<n> -n <chunk> <base>`,
+  which loads at least the whole page.
+- When HEAD moves forward, one `git log old..new` loads the new commits.
+  They are added in front as a new batch; nothing already cached is re-read.
+- Rewritten history (reset, rebase, branch switch) starts a new cache.
+
+The order is git log's for the original tip, with each later batch of new
+commits in front. None of the new commits is an ancestor of an older one,
+so children still come before their parents.
+
+Each repo gets two files under .my_dashboard/commit_log/:
+  <key>.log  - NUL-separated fields, append-only:
+               batch, sha, author_ts, committer_ts, author, subject
+               (batch 0 = history of the base tip in git log order,
+               1.. = commits that arrived later, each batch newest first)
+  <key>.json - {"base": <tip the batch-0 history starts at>, "head": <tip>,
+               "count": n, "complete": <all of base's history loaded>, ...}
+Records past "count" are the remains of a torn append and are ignored.
+
+git output is read with -z and NUL field separators, so subjects and names
+may contain any character.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from typing import NamedTuple, Optional
+from urllib.parse import quote
+
+from .config import BASE_PATH
+from .git_utils import get_branch_sha, run_git
+
+LOG_DIR = os.path.join(BASE_PATH, ".my_dashboard", "commit_log")
+_FORMAT_VERSION = 1
+# Commits loaded per git call beyond the cached range (at least one page)
+_CHUNK = 500
+_MAX_PAGE = 500
+_GIT_FORMAT = "--format=%H%x00%at%x00%ct%x00%an%x00%s"
+_FIELDS = 5
+
+
+class CommitRecord(NamedTuple):
+    sha: str
+    author_ts: int
+    committer_ts: int
+    author: str
+    subject: str
+
+
+class UnknownCursor(Exception):
+    """after=<sha> is not in HEAD's cached history (HEAD moved or rewrote)."""
+
+
+def _log_key(name: str) -> str:
+    """Filesystem-safe file stem for a repo name."""
+    return quote(name, safe="")
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Replace path with data; each writer gets its own temp file, so concurrent saves can't tear it."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _parse_log(output: str) -> list[CommitRecord]:
+    """Parse `git log -z` output in _GIT_FORMAT."""
+    if not output:
+        return []
+    fields = output.split("\x00")
+    records = []
+    for i in range(0, len(fields) - _FIELDS + 1, _FIELDS):
+        sha, a_ts, c_ts, author, subject = fields[i:i + _FIELDS]
+        records.append(CommitRecord(sha.strip(), int(a_ts or 0), int(c_ts or 0), author, subject))
+    return records
+
+
+def _encode(batch: int, records: list[CommitRecord]) -> bytes:
+    out = []
+    for r in records:
+        out += [str(batch), r.sha, str(r.author_ts), str(r.committer_ts), r.author, r.subject]
+    return "".join(field + "\x00" for field in out).encode("utf-8")
+
+
+class _RepoLog:
+    """One repo's cached history: batches newest first, then the base history."""
+
+    __slots__ = ("base", "head", "complete", "batches", "records", "positions")
+
+    def __init__(self, base: str, head: str, complete: bool, batches: list[list[CommitRecord]]):
+        self.base = base
+        self.head = head
+        self.complete = complete
+        self.batches = batches  # batches[0] = base history; later = newer commits
+        self.records: list[CommitRecord] = []
+        self.positions: dict[str, int] = {}
+        self.reindex()
+
+    def reindex(self) -> None:
+        self.records = [r for batch in reversed(self.batches) for r in batch]
+        self.positions = {r.sha: i for i, r in enumerate(self.records)}
+
+    @property
+    def count(self) -> int:
+        return sum(len(b) for b in self.batches)
+
+
+class CommitLog:
+    """Cursor-paginated HEAD history per repo, persisted on disk and memoized in memory."""
+
+    def __init__(self, log_dir: str = LOG_DIR):
+        self.log_dir = log_dir
+        self._mem: dict[str, _RepoLog] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.page_hits = 0
+        self.git_loads = 0
+
+    def _repo_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _paths(self, name: str) -> tuple[str, str]:
+        stem = os.path.join(self.log_dir, _log_key(name))
+        return f"{stem}.json", f"{stem}.log"
+
+    # ── persistence ──────────────────────────────────────────────────────────
+    def _load(self, name: str) -> Optional[_RepoLog]:
+        meta_path, log_path = self._paths(name)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != _FORMAT_VERSION:
+                return None
+            with open(log_path, "rb") as f:
+                fields = f.read().decode("utf-8").split("\x00")
+        except (OSError, ValueError):
+            return None
+        batches: list[list[CommitRecord]] = []
+        count = meta.get("count", 0)
+        for i in range(0, min(len(fields) - 1, count * (_FIELDS + 1)), _FIELDS + 1):
+            batch, sha, a_ts, c_ts, author, subject = fields[i:i + _FIELDS + 1]
+            b = int(batch)
+            while len(batches) <= b:
+                batches.append([])
+            batches[b].append(CommitRecord(sha, int(a_ts), int(c_ts), author, subject))
+        log = _RepoLog(meta["base"], meta["head"], meta["complete"], batches or [[]])
+        if log.count != count:
+            return None  # truncated file: rebuild
+        return log
+
+    def _save_meta(self, name: str, log: _RepoLog) -> None:
+        meta = {
+            "version": _FORMAT_VERSION,
+            "base": log.base,
+            "head": log.head,
+            "count": log.count,
+            "complete": log.complete,
+        }
+        _atomic_write(self._paths(name)[0], json.dumps(meta).encode("utf-8"))
+
+    def _persist(self, name: str, log: _RepoLog, batch: int, records: list[CommitRecord], rewrite: bool) -> None:
+        """Append records (or rewrite the whole file), then commit the new count."""
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            log_path = self._paths(name)[1]
+            if rewrite:
+                _atomic_write(log_path, b"".join(_encode(b, recs) for b, recs in enumerate(log.batches)))
+            else:
+                with open(log_path, "ab") as f:
+                    f.write(_encode(batch, records))
+            self._save_meta(name, log)
+        except OSError:
+            pass  # cache stays memory-only; rebuilt next process start
+
+    # ── git ──────────────────────────────────────────────────────────────────
+    def _git_log(self, repo_path: str, *args: str) -> Optional[list[CommitRecord]]:
+        self.git_loads += 1
+        out = run_git(["log", "-z", _GIT_FORMAT, *args], repo_path, timeout=60)
+        return None if out is None else _parse_log(out)
+
+    def _current(self, name: str, repo_path: str, tip: str) -> Optional[_RepoLog]:
+        """The cached log brought up to date with tip (caller holds the repo lock)."""
+        log = self._mem.get(name) or self._load(name)
+        if log is not None and log.head == tip:
+            self._mem[name] = log
+            return log
+
+        if log is not None and run_git(["merge-base", "--is-ancestor", log.head, tip], repo_path) is not None:
+            new = self._git_log(repo_path, f"{log.head}..{tip}")
+            if new is None:
+                return None
+            log.head = tip
+            if new:
+                log.batches.append(new)
+                log.reindex()
+            self._persist(name, log, len(log.batches) - 1, new, rewrite=False)
+            self._mem[name] = log
+            return log
+
+        # First use or rewritten history: start over from tip
+        log = _RepoLog(tip, tip, False, [[]])
+        self._mem[name] = log
+        self._persist(name, log, 0, [], rewrite=True)
+        return log
+
+    def _extend(self, name: str, repo_path: str, log: _RepoLog, needed: int) -> None:
+        """Load at least `needed` more commits of the base history (one git call)."""
+        base = log.batches[0]
+        more = self._git_log(repo_path, f"--skip={len(base)}", f"-n{max(needed, _CHUNK)}", log.base)
+        if more is None:
+            return
+        if len(more) < max(needed, _CHUNK):
+            log.complete = True
+        base.extend(more)
+        log.reindex()
+        self._persist(name, log, 0, more, rewrite=False)
+
+    # ── public API ───────────────────────────────────────────────────────────
+    def page(self, name: str, repo_path: str, after: Optional[str] = None, limit: int = 50) -> dict:
+        """
+        Up to `limit` commits of HEAD's history, newest first, starting after
+        the commit `after` (a full SHA from a previous page's "next").
+        Raises UnknownCursor when `after` isn't in HEAD's history any more.
+        """
+        limit = max(1, min(limit, _MAX_PAGE))
+        tip = get_branch_sha("HEAD", repo_path)
+        if not tip:
+            return {"head": None, "commits": [], "next": None}
+
+        with self._repo_lock(name):
+            log = self._current(name, repo_path, tip)
+            if log is None:
+                return {"head": tip, "commits": [], "next": None}
+            if after:
+                start = log.positions.get(after)
+                if start is None:
+                    raise UnknownCursor(after)
+                start += 1
+            else:
+                start = 0
+            missing = start + limit - len(log.records)
+            if missing > 0 and not log.complete:
+                self._extend(name, repo_path, log, missing)
+            else:
+                self.page_hits += 1
+            records = log.records[start:start + limit]
+            more = start + limit < len(log.records) or not log.complete
+        return {
+            "head": tip,
+            "commits": records,
+            "next": records[-1].sha if records and more else None,
+        }
+
+    def stats(self) -> dict:
+        """Cache counters for diagnostics."""
+        with self._lock:
+            logs = list(self._mem.values())
+        return {
+            "repos": len(logs),
+            "commits": sum(len(log.records) for log in logs),
+            "page_hits": self.page_hits,
+            "git_loads": self.git_loads,
+        }
+
+
+# Process-wide cache shared by the log and details endpoints
+commit_log = CommitLog()
+
+
+__all__ = ["CommitLog", "CommitRecord", "UnknownCursor", "commit_log", "LOG_DIR"]
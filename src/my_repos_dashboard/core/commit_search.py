@@ -0,0 +1,343 @@
+"""Full-text commit search across every repo under BASE_PATH.
+
+Commits are indexed in an SQLite FTS5 table at
+.my_dashboard/search.db. Subject, author and touched paths are searchable;
+repo, SHA and timestamp are stored alongside. Hits are ranked by bm25
+(subject matches weigh most, then author, then paths), newest first on ties.
+
+Indexing is incremental. For every repo (linked worktrees share their main
+repo's history, so each common git dir is indexed once), the index
+remembers the tips it last walked: local branches plus HEAD. A pass then:
+- skips repos whose git fingerprint didn't change (no git process);
+- else reads the current tips with one `git for-each-ref`;
+- walks only new commits, `git log <tips> --not <old tips>`, with
+  touched paths from --name-only -z.
+A repo's first pass indexes at most _MAX_INITIAL commits.
+
+Passes run in the background every SEARCH_INDEX_INTERVAL seconds. A search
+also starts one when the last pass is older than _STALE_AFTER. The search
+itself only reads the index, so it never waits for git.
+
+Query syntax for /search?q=: words are prefix-matched and ANDed. Filters:
+  repo:<name>     author:<name>     path:<fragment>
+  since:YYYY-MM-DD     until:YYYY-MM-DD
+Commits that stop being reachable (rebased away, deleted branches) stay
+searchable until the repo is reindexed (POST /search/reindex).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shlex
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from .config import BASE_PATH, SEARCH_INDEX_INTERVAL
+from .git_cache import repo_fingerprint
+from .git_native import resolve_git_dirs
+from .git_utils import get_branch_sha, run_git
+from .metrics import background_task
+from .repo_registry import RepoRegistry, repo_registry
+
+DB_PATH = os.path.join(BASE_PATH, ".my_dashboard", "search.db")
+_SCHEMA_VERSION = "1"
+_MAX_INITIAL = 20000
+_STALE_AFTER = 30.0
+_MAX_PATHS = 200            # paths stored per commit (huge merges/imports are truncated)
+_GIT_FORMAT = "--format=%x1e%H%x00%at%x00%an%x00%s"
+_WEIGHTS = "10.0, 4.0, 2.0"  # bm25 column weights: subject, author, paths
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS repos (name TEXT PRIMARY KEY, tips TEXT NOT NULL, "
+    "commits INTEGER NOT NULL, indexed_at REAL NOT NULL)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS commits USING fts5("
+    "subject, author, paths, repo UNINDEXED, sha UNINDEXED, ts UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+]
+
+
+class SearchQueryError(ValueError):
+    """Malformed /search query (bad filter value)."""
+
+
+def _parse_log(output: str) -> list[tuple[str, int, str, str, list[str]]]:
+    """(sha, author_ts, author, subject, paths) from `git log -z --name-only` in _GIT_FORMAT."""
+    commits = []
+    for chunk in output.split("\x1e"):
+        fields = chunk.split("\x00")
+        if len(fields) < 4:
+            continue
+        sha, ts, author, subject = fields[:4]
+        paths = [p.lstrip("\n") for p in fields[4:] if p.strip()]
+        commits.append((sha, int(ts or 0), author, subject, paths))
+    return commits
+
+
+def _phrase(text: str) -> str:
+    """An FTS5 prefix phrase for user text (quotes escaped)."""
+    return '"' + text.replace('"', '""') + '"*'
+
+
+def _day(value: str, key: str) -> float:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").timestamp()
+    except ValueError:
+        raise SearchQueryError(f"{key}: expects YYYY-MM-DD, got {value!r}")
+
+
+def parse_query(q: str) -> dict:
+    """Split a search string into an FTS5 MATCH expression and SQL filters."""
+    try:
+        words = shlex.split(q)
+    except ValueError:  # unbalanced quote
+        words = q.replace('"', " ").split()
+    terms: list[str] = []
+    filters: dict = {}
+    for word in words:
+        key, sep, value = word.partition(":")
+        key = key.lower()
+        if sep and value and key in ("repo", "since", "until"):
+            filters[key] = _day(value, key) if key != "repo" else value
+        elif sep and value and key == "author":
+            terms.append(f"author : {_phrase(value)}")
+        elif sep and value and key == "path":
+            terms.append(f"paths : {_phrase(value)}")
+        elif word.strip():
+            terms.append(_phrase(word))
+    if "until" in filters:
+        filters["until"] += 86400  # inclusive day
+    return {"match": " AND ".join(terms), **filters}
+
+
+class CommitSearch:
+    """SQLite FTS5 commit index with incremental, fingerprint-gated refreshes."""
+
+    def __init__(self, db_path: str = DB_PATH, registry: RepoRegistry = repo_registry,
+                 interval: float = SEARCH_INDEX_INTERVAL):
+        self.db_path = db_path
+        self.registry = registry
+        self.interval = interval
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._fingerprints: dict[str, Optional[tuple]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.last_refresh = 0.0
+        self.passes = 0
+        self.indexed = 0
+        self.searches = 0
+
+    # ── storage ──────────────────────────────────────────────────────────────
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection (WAL: searches don't block on indexing)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+                row = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+                if row is None:
+                    conn.execute("INSERT INTO meta VALUES ('schema', ?)", (_SCHEMA_VERSION,))
+            self._local.conn = conn
+        return conn
+
+    # ── indexing ─────────────────────────────────────────────────────────────
+    def _repos(self) -> dict[str, str]:
+        """Repo name -> path, one entry per common git dir (main checkout preferred)."""
+        groups: dict[str, list] = {}
+        for entry in self.registry.entries():
+            if entry.kind == "folder":
+                continue
+            dirs = resolve_git_dirs(entry.path)
+            if dirs:
+                groups.setdefault(dirs[1], []).append(entry)
+        repos = {}
+        for entries in groups.values():
+            entry = next((e for e in entries if e.kind == "repo"), entries[0])
+            repos[entry.name] = entry.path
+        return repos
+
+    def _index_repo(self, conn: sqlite3.Connection, name: str, path: str) -> int:
+        """Index the repo's new commits; returns how many were added."""
+        fingerprint = repo_fingerprint(path)
+        if fingerprint is not None and self._fingerprints.get(name) == fingerprint:
+            return 0
+        refs = run_git(["for-each-ref", "--format=%(objectname)", "refs/heads"], path)
+        head = get_branch_sha("HEAD", path)
+        tips = sorted(set((refs or "").split()) | ({head} if head else set()))
+        row = conn.execute("SELECT tips FROM repos WHERE name = ?", (name,)).fetchone()
+        old_tips = row[0].split() if row else []
+        if tips == old_tips:
+            self._fingerprints[name] = fingerprint
+            return 0
+
+        args = ["log", "-z", "--name-only", _GIT_FORMAT, *tips]
+        if old_tips:
+            args += ["--ignore-missing", "--not", *old_tips]
+        else:
+            args.insert(1, f"-n{_MAX_INITIAL}")
+        out = run_git(args, path, timeout=300) if tips else ""
+        if out is None:
+            return 0
+        commits = _parse_log(out)
+        with conn:
+            conn.executemany(
+                "INSERT INTO commits (subject, author, paths, repo, sha, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                [(subject, author, "\n".join(paths[:_MAX_PATHS]), name, sha, ts)
+                 for sha, ts, author, subject, paths in commits],
+            )
+            conn.execute(
+                "INSERT INTO repos VALUES (?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "tips = excluded.tips, commits = commits + ?, indexed_at = excluded.indexed_at",
+                (name, " ".join(tips), len(commits), time.time(), len(commits)),
+            )
+        self._fingerprints[name] = fingerprint
+        return len(commits)
+
+    def refresh(self) -> int:
+        """One indexing pass over every repo. Returns the number of new commits."""
+        with self._write_lock:
+            conn = self._conn()
+            repos = self._repos()
+            added = 0
+            for name, path in repos.items():
+                try:
+                    added += self._index_repo(conn, name, path)
+                except (OSError, sqlite3.Error):
+                    continue
+            gone = [r[0] for r in conn.execute("SELECT name FROM repos") if r[0] not in repos]
+            for name in gone:
+                self._drop(conn, name)
+            self.passes += 1
+            self.indexed += added
+            self.last_refresh = time.time()
+            return added
+
+    def _drop(self, conn: sqlite3.Connection, name: str) -> None:
+        with conn:
+            conn.execute("DELETE FROM commits WHERE repo = ?", (name,))
+            conn.execute("DELETE FROM repos WHERE name = ?", (name,))
+        self._fingerprints.pop(name, None)
+
+    def reindex(self, name: Optional[str] = None) -> int:
+        """Forget one repo (or all) and index again from scratch."""
+        with self._write_lock:
+            conn = self._conn()
+            names = [name] if name else [r[0] for r in conn.execute("SELECT name FROM repos")]
+            for n in names:
+                self._drop(conn, n)
+        return self.refresh()
+
+    # ── search ───────────────────────────────────────────────────────────────
+    def search(self, q: str, limit: int = 50) -> list[dict]:
+        """Ranked hits for a query (see the module docstring for its syntax)."""
+        self.searches += 1
+        query = parse_query(q)
+        where, params = [], []
+        if query["match"]:
+            where.append("commits MATCH ?")
+            params.append(query["match"])
+        if "repo" in query:
+            where.append("repo = ?")
+            params.append(query["repo"])
+        if "since" in query:
+            where.append("ts >= ?")
+            params.append(query["since"])
+        if "until" in query:
+            where.append("ts < ?")
+            params.append(query["until"])
+        if not where:
+            return []
+        order = f"bm25(commits, {_WEIGHTS}), ts DESC" if query["match"] else "ts DESC"
+        sql = (f"SELECT repo, sha, ts, author, subject, paths FROM commits "
+               f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?")
+        try:
+            rows = self._conn().execute(sql, (*params, max(1, min(limit, 500)))).fetchall()
+        except sqlite3.OperationalError as e:  # FTS5 syntax the quoting didn't cover
+            raise SearchQueryError(str(e))
+        return [
+            {"repo": repo, "sha": sha, "ts": ts, "author": author, "subject": subject,
+             "paths": paths.split("\n") if paths else []}
+            for repo, sha, ts, author, subject, paths in rows
+        ]
+
+    # ── background passes ────────────────────────────────────────────────────
+    def schedule_refresh(self) -> None:
+        """Start a background pass if the index is stale and none is running."""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        if time.time() - self.last_refresh < _STALE_AFTER:
+            return
+        self._refresh_task = background_task(asyncio.to_thread(self.refresh))
+
+    async def start(self) -> None:
+        if self._task or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._refresh_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = self._refresh_task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        """Index size and pass counters for diagnostics."""
+        try:
+            conn = self._conn()
+            repos, commits = conn.execute("SELECT count(*), coalesce(sum(commits), 0) FROM repos").fetchone()
+        except sqlite3.Error:
+            repos = commits = None
+        return {
+            "repos": repos,
+            "commits": commits,
+            "passes": self.passes,
+            "indexed": self.indexed,
+            "searches": self.searches,
+            "last_refresh": self.last_refresh or None,
+            "indexing": bool(self._refresh_task and not self._refresh_task.done()) or self._write_lock.locked(),
+            "interval": self.interval,
+        }
+
+
+# Process-wide index, refreshed by the app's startup hook
+commit_search = CommitSearch()
+
+
+async def start_commit_search() -> None:
+    """Startup hook: index in the background unless SEARCH_INDEX_INTERVAL=0."""
+    await commit_search.start()
+
+
+async def stop_commit_search() -> None:
+    """Shutdown hook."""
+    await commit_search.stop()
+
+
+__all__ = [
+    "CommitSearch", "SearchQueryError", "commit_search", "parse_query",
+    "start_commit_search", "stop_commit_search", "DB_PATH",
+]
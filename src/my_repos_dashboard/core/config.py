@@ -22,9 +22,76 @@ except ImportError:
     STATIC_DIR = Path(__file__).parent.parent / "static"
 
 BASE_PATH = os.getenv("REPO_BASE_PATH", r"C:\Users\user\Desktop\test\0_my_repo")
+# How many directory levels below BASE_PATH to search for repos
+# (core.repo_registry). 1 = direct children only; 2 = BASE_PATH/group/repo.
+REPO_SCAN_DEPTH = int(os.getenv("REPO_SCAN_DEPTH", "1"))
+# Pre-database state files, imported once into .my_dashboard/state.db
+# (core.state_store)
 COMMANDS_FILE = os.path.join(BASE_PATH, "commands.json")
 PINNED_FILE = os.path.join(BASE_PATH, ".my_dashboard", "pinned_repos.json")
 
+# Max age (seconds) of a cached get_git_info() result whose .git fingerprint is
+# unchanged. Working-tree edits don't touch .git, so this bounds staleness of
+# the dirty counters. Set to 0 to rely on fingerprints alone.
+GIT_INFO_CACHE_TTL = float(os.getenv("GIT_INFO_CACHE_TTL", "60"))
+
+# Read HEAD, refs and commit objects in-process instead of spawning git where
+# possible (core.git_native). Set to 0 to always use the git CLI.
+GIT_NATIVE_READER = os.getenv("GIT_NATIVE_READER", "1") not in ("0", "false", "False")
+
+# Background repo watcher (core.repo_watcher) pushing /projects/events deltas.
+# WATCH_INTERVAL is the fingerprint poll period; WATCH_SWEEP_INTERVAL is how
+# long a full round-robin re-check of working trees takes (0 disables it).
+REPO_WATCHER = os.getenv("REPO_WATCHER", "1") not in ("0", "false", "False")
+WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "2"))
+WATCH_SWEEP_INTERVAL = float(os.getenv("WATCH_SWEEP_INTERVAL", "300"))
+
+# Max number of git processes running at once across all requests, the
+# watcher and background work (core.git_utils.git_procs).
+GIT_MAX_PROCS = int(os.getenv("GIT_MAX_PROCS", str(min(16, (os.cpu_count() or 4) * 2))))
+
+# Background `git fetch` of every repo with a remote (core.auto_fetch), so the
+# ahead/behind counts stay current. AUTO_FETCH_INTERVAL is seconds between
+# fetches of one repo (0 disables); AUTO_FETCH_CONCURRENCY caps parallel fetches.
+AUTO_FETCH_INTERVAL = float(os.getenv("AUTO_FETCH_INTERVAL", "900"))
+AUTO_FETCH_CONCURRENCY = int(os.getenv("AUTO_FETCH_CONCURRENCY", "2"))
+
+# Repos processed at once by the bulk git action endpoint (/git-bulk). Each
+# repo's git process also counts against GIT_MAX_PROCS.
+BULK_ACTION_CONCURRENCY = int(os.getenv("BULK_ACTION_CONCURRENCY", "8"))
+
+# Worker threads for queued mutations (core.job_queue): merges, worktree
+# create/remove, git actions and context capture. Jobs on the same repo always
+# run one at a time.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# Custom commands run as background jobs (core.command_jobs). COMMAND_TIMEOUT
+# is the default limit in seconds (0 = none); COMMAND_OUTPUT_LINES is how many
+# of the latest output lines each job keeps for the UI.
+COMMAND_TIMEOUT = float(os.getenv("COMMAND_TIMEOUT", "1800"))
+COMMAND_OUTPUT_LINES = int(os.getenv("COMMAND_OUTPUT_LINES", "5000"))
+
+# Seconds a freshly computed /projects or /stats result is reused for identical
+# requests (core.singleflight). Concurrent identical requests always share one
+# computation; 0 disables reuse after it finishes.
+SINGLE_FLIGHT_TTL = float(os.getenv("SINGLE_FLIGHT_TTL", "1"))
+
+# Commit search index (core.commit_search): seconds between background passes
+# that index new commits of every repo. 0 = refresh only when a search runs.
+SEARCH_INDEX_INTERVAL = float(os.getenv("SEARCH_INDEX_INTERVAL", "300"))
+
+# Fast status mode (core.fast_status): dirty checks skip the untracked-file
+# walk and count untracked files in a deferred pass backed by git's untracked
+# cache (and fsmonitor where the built-in daemon exists). "auto" uses it for
+# repos whose full `git status` took at least FAST_STATUS_THRESHOLD seconds;
+# "on"/"off" apply to every repo. Per-repo overrides: /git/{name}/status-mode.
+FAST_STATUS = os.getenv("FAST_STATUS", "auto").lower()
+FAST_STATUS_THRESHOLD = float(os.getenv("FAST_STATUS_THRESHOLD", "0.5"))
+# Let fast mode write core.untrackedCache/core.fsmonitor into a repo's
+# .git/config when the repo has no value yet. Off: the untracked cache is
+# enabled per git call (-c) and fsmonitor is not used.
+FAST_STATUS_WRITE_CONFIG = os.getenv("FAST_STATUS_WRITE_CONFIG", "0") not in ("0", "false", "False")
+
 
 # Create FastAPI app instance
 app = FastAPI()
@@ -51,7 +118,25 @@ __all__ = [
     "PROJECT_ROOT",
     "STATIC_DIR",
     "BASE_PATH",
+    "REPO_SCAN_DEPTH",
     "COMMANDS_FILE",
     "PINNED_FILE",
+    "GIT_INFO_CACHE_TTL",
+    "GIT_NATIVE_READER",
+    "REPO_WATCHER",
+    "WATCH_INTERVAL",
+    "WATCH_SWEEP_INTERVAL",
+    "GIT_MAX_PROCS",
+    "AUTO_FETCH_INTERVAL",
+    "AUTO_FETCH_CONCURRENCY",
+    "BULK_ACTION_CONCURRENCY",
+    "JOB_WORKERS",
+    "COMMAND_TIMEOUT",
+    "COMMAND_OUTPUT_LINES",
+    "SINGLE_FLIGHT_TTL",
+    "SEARCH_INDEX_INTERVAL",
+    "FAST_STATUS",
+    "FAST_STATUS_THRESHOLD",
+    "FAST_STATUS_WRITE_CONFIG",
     "app",
 ]
@@ -0,0 +1,245 @@
+"""Fast dirty checks for repos whose working tree is expensive to walk.
+
+A plain `git status` walks the whole working tree looking for untracked
+files. In repos with node_modules-style trees that walk dominates the cost
+of get_git_info, and so of /projects and /stats. In fast mode the check is
+split in two:
+
+  quick     - `git status --untracked-files=no`: branch, divergence and
+              staged/modified counts, no untracked walk. It answers every
+              git info recompute.
+  untracked - the full count, run later in the background, at most every
+              _RECOUNT_AFTER seconds per repo. Until it lands, the quick
+              result carries the last known count. When the count changes,
+              the repo's git info is recomputed (through the watcher when
+              it runs), so the grid catches up on its own.
+
+On first use in fast mode, git's untracked cache is turned on for the
+repo's status runs with `-c core.untrackedCache=true`; nothing is written
+to its config. With FAST_STATUS_WRITE_CONFIG=1, core.untrackedCache is
+set in .git/config instead, and core.fsmonitor too where git has the
+built-in daemon (macOS, Windows). Values the repo already has are never
+changed, and /diagnostics/fast-status shows what was chosen per repo.
+The deferred count is the one status run without --no-optional-locks, so
+git can store the untracked cache in the index. Later counts then only
+re-read directories whose mtime changed.
+
+Which repos use it: a per-repo override in the state store
+("fast"/"full", set with PUT /git/{name}/status-mode) or else FAST_STATUS.
+"on" and "off" apply to every repo. "auto" switches a repo to fast mode,
+for the rest of the process, once one of its full checks took at least
+FAST_STATUS_THRESHOLD seconds.
+
+Every check is timed per repo and kind (core.metrics.observe_status), so
+/metrics shows a repo's status time before and after the switch. Only the
+git process is timed, not the wait for a git_procs slot: a repo must not
+be switched because other work kept it queued.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+from .config import FAST_STATUS, FAST_STATUS_THRESHOLD, FAST_STATUS_WRITE_CONFIG
+from .git_cache import git_info_cache
+from .git_utils import (
+    get_status_summary_timed_async,
+    run_git_async,
+    run_git_out_async,
+    run_git_timed_async,
+)
+from .metrics import background_task, metrics
+from .repo_registry import repo_registry
+from .state_store import state_store
+
+MODES = ("fast", "full")
+# Minimum seconds between deferred untracked counts of one repo
+_RECOUNT_AFTER = 30
+_COUNT_TIMEOUT = 120
+_ON = ("1", "on", "true", "yes")
+_OFF = ("0", "off", "false", "no")
+
+
+class _RepoStatus:
+    """What fast_status remembers about one repo."""
+
+    __slots__ = ("slow", "settings", "options", "untracked", "counted_at", "counting", "last")
+
+    def __init__(self):
+        self.slow = False          # a full check hit the threshold ("auto")
+        self.settings: Optional[dict] = None  # git settings after enabling
+        self.options: tuple = ()   # -c options for fast-mode status runs
+        self.untracked: Optional[int] = None
+        self.counted_at = 0.0
+        self.counting = False
+        self.last: dict[str, float] = {}  # kind -> seconds of the latest check
+
+
+class FastStatus:
+    """Chooses full or quick+deferred status per repo and runs it."""
+
+    def __init__(
+        self,
+        default: str = FAST_STATUS,
+        threshold: float = FAST_STATUS_THRESHOLD,
+        write_config: bool = FAST_STATUS_WRITE_CONFIG,
+    ):
+        self.default = "on" if default in _ON else "off" if default in _OFF else "auto"
+        self.threshold = threshold
+        self.write_config = write_config
+        self._repos: dict[str, _RepoStatus] = {}
+        self._lock = threading.Lock()
+        self._tasks: set[asyncio.Task] = set()
+        self._fsmonitor: Optional[bool] = None
+        # Called with a repo path when a deferred count changed its untracked
+        # number; the watcher hooks in here. Default: drop the cached info.
+        self.on_change: Optional[Callable[[str], None]] = None
+
+    def _repo(self, path: str) -> _RepoStatus:
+        with self._lock:
+            repo = self._repos.get(path)
+            if repo is None:
+                repo = self._repos[path] = _RepoStatus()
+            return repo
+
+    def mode_for(self, path: str) -> tuple[str, str]:
+        """(mode, why): "fast" or "full", and whether the override, FAST_STATUS or auto chose it."""
+        override = state_store.status_mode(repo_registry.name_for(path))
+        if override in MODES:
+            return override, "override"
+        if self.default != "auto":
+            return ("fast" if self.default == "on" else "full"), "default"
+        return ("fast" if self._repo(path).slow else "full"), "auto"
+
+    # ── checks ───────────────────────────────────────────────────────────────
+    async def summary_async(self, path: str) -> Optional[dict]:
+        """get_status_summary for path, in the repo's status mode."""
+        repo = self._repo(path)
+        mode, why = self.mode_for(path)
+        if mode == "full":
+            status, seconds = await get_status_summary_timed_async(path)
+            self._observe(path, repo, "full", seconds)
+            if status is not None:
+                repo.untracked = status["untracked"]
+                repo.counted_at = time.monotonic()
+                if why == "auto" and seconds is not None and seconds >= self.threshold:
+                    repo.slow = True
+            return status
+
+        if repo.settings is None:
+            await self._enable(path, repo)
+        status, seconds = await get_status_summary_timed_async(
+            path, untracked=False, options=repo.options
+        )
+        self._observe(path, repo, "quick", seconds)
+        if status is None:
+            return None
+        if repo.untracked is not None:
+            status["untracked"] = repo.untracked
+            status["is_dirty"] = status["is_dirty"] or repo.untracked > 0
+        self._schedule_count(path, repo)
+        return status
+
+    def _observe(self, path: str, repo: _RepoStatus, kind: str, seconds: Optional[float]) -> None:
+        if seconds is None:  # ran in a thread: no subprocess-only timing
+            return
+        repo.last[kind] = seconds
+        metrics.observe_status(path, kind, seconds)
+
+    def _schedule_count(self, path: str, repo: _RepoStatus) -> None:
+        if repo.counting or time.monotonic() - repo.counted_at < _RECOUNT_AFTER:
+            return
+        repo.counting = True
+        task = background_task(self._count_untracked(path, repo))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _count_untracked(self, path: str, repo: _RepoStatus) -> None:
+        """The deferred full count; updates the index's untracked cache."""
+        try:
+            output, seconds = await run_git_timed_async(
+                [*repo.options, "status", "--porcelain=v2", "--untracked-files=normal"],
+                path, timeout=_COUNT_TIMEOUT,
+            )
+            self._observe(path, repo, "untracked", seconds)
+            if output is None:
+                return
+            count = sum(1 for line in output.splitlines() if line.startswith("? "))
+            changed = count != (repo.untracked or 0)
+            repo.untracked = count
+            repo.counted_at = time.monotonic()
+            if changed:
+                if self.on_change is not None:
+                    self.on_change(path)
+                else:
+                    git_info_cache.invalidate(path)
+        finally:
+            repo.counting = False
+
+    # ── git settings ─────────────────────────────────────────────────────────
+    async def _fsmonitor_supported(self, path: str) -> bool:
+        """Whether this git has the built-in fsmonitor daemon (checked once)."""
+        if self._fsmonitor is None:
+            _, output = await run_git_out_async(["fsmonitor--daemon", "status"], path)
+            self._fsmonitor = "not supported" not in output and "is not a git command" not in output
+        return self._fsmonitor
+
+    async def _enable(self, path: str, repo: _RepoStatus) -> None:
+        """
+        Turn on untrackedCache (and fsmonitor if available) unless the repo
+        already sets them: in .git/config with write_config, else untrackedCache
+        per call (repo.options) and no fsmonitor. Fills repo.settings with
+        the repo's value, "true (written)", "true (per call)", "not written",
+        "unsupported" or "unset" (the write failed).
+        """
+        settings = {}
+        options: list[str] = []
+        for key in ("core.untrackedCache", "core.fsmonitor"):
+            current = await run_git_async(["config", "--get", key], path)
+            if current is not None:
+                settings[key] = current
+            elif key == "core.untrackedCache" and not self.write_config:
+                options += ["-c", f"{key}=true"]
+                settings[key] = "true (per call)"
+            elif not self.write_config:
+                settings[key] = "not written"
+            elif key == "core.fsmonitor" and not await self._fsmonitor_supported(path):
+                settings[key] = "unsupported"
+            elif await run_git_async(["config", key, "true"], path) is not None:
+                settings[key] = "true (written)"
+            else:
+                settings[key] = "unset"
+        repo.options = tuple(options)
+        repo.settings = settings
+
+    def stats(self) -> dict:
+        """Mode, timings and git settings per repo seen so far."""
+        with self._lock:
+            repos = sorted(self._repos.items())
+        per_repo = {}
+        for path, repo in repos:
+            mode, why = self.mode_for(path)
+            per_repo[repo_registry.name_for(path)] = {
+                "mode": mode,
+                "why": why,
+                "last_ms": {kind: round(s * 1000, 2) for kind, s in repo.last.items()},
+                "untracked": repo.untracked,
+                "settings": repo.settings,
+            }
+        return {
+            "default": self.default,
+            "threshold": self.threshold,
+            "write_config": self.write_config,
+            "fsmonitor_daemon": self._fsmonitor,
+            "repos": per_repo,
+        }
+
+
+# Process-wide status chooser shared by get_git_info and the watcher
+fast_status = FastStatus()
+
+
+__all__ = ["FastStatus", "MODES", "fast_status"]
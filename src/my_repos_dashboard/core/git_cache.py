@@ -0,0 +1,168 @@
+"""Fingerprint-keyed cache for per-repo git info.
+
+A repo's fingerprint is built from stat() calls on the files git rewrites
+whenever branch, index, refs, stash or worktree state changes. Comparing
+fingerprints costs a handful of syscalls, so unchanged repos are served
+without spawning any git process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from .config import GIT_INFO_CACHE_TTL
+from .git_native import resolve_git_dirs
+from .metrics import timed_phase
+
+
+def _stat_sig(path: str) -> Optional[tuple[int, int]]:
+    """Return (mtime_ns, size) for a path, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _tree_sig(path: str) -> tuple[int, int, int]:
+    """
+    Summarize a directory tree as (entry_count, newest_mtime_ns, total_size).
+    Ref updates rename a lockfile over the ref, so any update bumps the newest
+    mtime; deletions change the entry count.
+    """
+    count = newest = total = 0
+    stack = [path]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                count += 1
+                newest = max(newest, st.st_mtime_ns)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    total += st.st_size
+    return count, newest, total
+
+
+@timed_phase("fs")
+def repo_fingerprint(path: str) -> Optional[tuple]:
+    """
+    Cheap filesystem fingerprint of a repo's git state.
+    Returns None if path is not a repo or worktree.
+    """
+    dirs = resolve_git_dirs(path)
+    if not dirs:
+        return None
+    git_dir, common_dir = dirs
+    return (
+        _stat_sig(os.path.join(git_dir, "HEAD")),
+        _stat_sig(os.path.join(git_dir, "index")),
+        _stat_sig(os.path.join(git_dir, "logs", "HEAD")),
+        _stat_sig(os.path.join(common_dir, "packed-refs")),
+        _stat_sig(os.path.join(common_dir, "refs", "stash")),
+        _stat_sig(os.path.join(common_dir, "logs", "refs", "stash")),
+        _stat_sig(os.path.join(common_dir, "config")),
+        _tree_sig(os.path.join(common_dir, "refs")),
+        _tree_sig(os.path.join(common_dir, "worktrees")),
+    )
+
+
+class GitInfoCache:
+    """Thread-safe map of repo path -> (fingerprint, stored_at, git info)."""
+
+    def __init__(self, ttl: float = GIT_INFO_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[tuple, float, Optional[dict]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, path: str) -> tuple[str, Optional[tuple], float, bool, Optional[dict]]:
+        """Return (key, fingerprint, now, hit, info) and count the hit/miss."""
+        key = os.path.normcase(os.path.abspath(path))
+        fingerprint = repo_fingerprint(path)
+        now = time.monotonic()
+        if fingerprint is None:
+            return key, None, now, False, None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == fingerprint and (self.ttl <= 0 or now - entry[1] < self.ttl):
+                self.hits += 1
+                return key, fingerprint, now, True, entry[2]
+            self.misses += 1
+        return key, fingerprint, now, False, None
+
+    def _store(self, key: str, fingerprint: tuple, stored_at: float, info: Optional[dict]) -> None:
+        # Store the fingerprint taken *before* computing: if the repo changes
+        # mid-scan the next call sees a mismatch and recomputes.
+        with self._lock:
+            self._entries[key] = (fingerprint, stored_at, info)
+
+    def get_or_compute(self, path: str, compute: Callable[[str], Optional[dict]]) -> Optional[dict]:
+        """Return the cached info for path if its fingerprint is unchanged, else recompute."""
+        key, fingerprint, now, hit, info = self._lookup(path)
+        if hit:
+            return info
+        info = compute(path)
+        if fingerprint is not None:
+            self._store(key, fingerprint, now, info)
+        return info
+
+    async def get_or_compute_async(
+        self, path: str, compute: Callable[[str], Awaitable[Optional[dict]]]
+    ) -> Optional[dict]:
+        """
+        get_or_compute for a coroutine compute function. The fingerprint
+        (a few stats plus a walk of refs/) runs in a worker thread so it
+        doesn't stall the event loop.
+        """
+        key, fingerprint, now, hit, info = await asyncio.to_thread(self._lookup, path)
+        if hit:
+            return info
+        info = await compute(path)
+        if fingerprint is not None:
+            self._store(key, fingerprint, now, info)
+        return info
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop the entry for one repo, or every entry when path is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.normcase(os.path.abspath(path)), None)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for diagnostics."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+            }
+
+
+# Process-wide cache shared by all endpoints
+git_info_cache = GitInfoCache()
+
+# Worktree lists with merge status. They depend only on .git state, which the
+# fingerprint fully covers, so entries never expire on age.
+worktree_list_cache = GitInfoCache(ttl=0)
+
+
+__all__ = ["repo_fingerprint", "GitInfoCache", "git_info_cache", "worktree_list_cache"]
@@ -0,0 +1,446 @@
+"""In-process reader for git refs and commit objects (no subprocess).
+
+Covers the read-only lookups on the /projects hot path: resolving HEAD,
+loose refs and packed-refs, and reading a commit's subject, author and
+timestamps from loose objects or pack files (via the v2 .idx fanout table,
+including delta-compressed entries).
+
+Anything unusual (SHA-256 repos, alternates, reftable, corrupt data)
+raises NativeReadError. Callers catch it and fall back to `git`.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Optional, Tuple
+
+_HEX_LEN = 40
+_OBJ_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+_OFS_DELTA = 6
+_REF_DELTA = 7
+_MAX_SYMREF_DEPTH = 5
+_MAX_DELTA_DEPTH = 64
+
+
+class NativeReadError(Exception):
+    """The native reader can't answer; fall back to the git CLI."""
+
+
+def resolve_git_dirs(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Locate the git directories of a repo or linked worktree without running git.
+    Returns (git_dir, common_dir) or None when path has no .git entry.
+      git_dir    - per-worktree dir holding HEAD, index, logs/HEAD
+      common_dir - shared dir holding refs, packed-refs, objects, worktrees/
+    """
+    dot_git = os.path.join(path, ".git")
+    if os.path.isdir(dot_git):
+        git_dir = dot_git
+    elif os.path.isfile(dot_git):
+        # Linked worktree: ".git" is a file containing "gitdir: <path>"
+        try:
+            with open(dot_git, "r", encoding="utf-8") as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if not line.startswith("gitdir:"):
+            return None
+        git_dir = os.path.normpath(os.path.join(path, line[len("gitdir:"):].strip()))
+    else:
+        return None
+
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+    return git_dir, common_dir
+
+
+def _is_sha(value: str) -> bool:
+    return len(value) == _HEX_LEN and all(c in "0123456789abcdef" for c in value)
+
+
+# ── refs ──────────────────────────────────────────────────────────────────────
+
+# packed-refs path -> ((mtime_ns, size), {refname: sha})
+_packed_cache: dict[str, tuple[tuple[int, int], dict[str, str]]] = {}
+_packed_lock = threading.Lock()
+
+
+def _packed_refs(common_dir: str) -> dict[str, str]:
+    """Parse packed-refs, cached until the file's mtime/size changes."""
+    path = os.path.join(common_dir, "packed-refs")
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    sig = (st.st_mtime_ns, st.st_size)
+    with _packed_lock:
+        cached = _packed_cache.get(path)
+        if cached and cached[0] == sig:
+            return cached[1]
+
+    refs: dict[str, str] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                # Skip the header and peeled "^<sha>" lines of annotated tags
+                if line.startswith(("#", "^")):
+                    continue
+                sha, _, name = line.strip().partition(" ")
+                if _is_sha(sha) and name:
+                    refs[name] = sha
+    except OSError:
+        return {}
+    with _packed_lock:
+        _packed_cache[path] = (sig, refs)
+    return refs
+
+
+def _read_ref_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def resolve_ref(git_dir: str, common_dir: str, refname: str) -> Optional[str]:
+    """
+    Resolve a full ref name (HEAD, refs/heads/main, ...) to a SHA.
+    Returns None if the ref doesn't exist.
+    """
+    if os.path.exists(os.path.join(common_dir, "reftable")):
+        raise NativeReadError("reftable backend")
+
+    for _ in range(_MAX_SYMREF_DEPTH):
+        # HEAD and other pseudo-refs are per-worktree; refs/* are shared
+        base = common_dir if refname.startswith("refs/") else git_dir
+        value = _read_ref_file(os.path.join(base, refname))
+        if value is None:
+            return _packed_refs(common_dir).get(refname)
+        if value.startswith("ref:"):
+            refname = value[4:].strip()
+            continue
+        if _is_sha(value):
+            return value
+        raise NativeReadError(f"unrecognized ref content in {refname}")
+    raise NativeReadError("symbolic ref loop")
+
+
+def read_head(git_dir: str) -> tuple[Optional[str], Optional[str]]:
+    """
+    Return (branch, detached_sha) from HEAD.
+    branch is the short name for a symbolic HEAD, otherwise None.
+    """
+    value = _read_ref_file(os.path.join(git_dir, "HEAD"))
+    if value is None:
+        raise NativeReadError("missing HEAD")
+    if value.startswith("ref:"):
+        target = value[4:].strip()
+        if target.startswith("refs/heads/"):
+            return target[len("refs/heads/"):], None
+        return target, None
+    if _is_sha(value):
+        return None, value
+    raise NativeReadError("unrecognized HEAD content")
+
+
+def rev_parse(path: str, name: str) -> Optional[str]:
+    """
+    Resolve a branch/tag/ref name the way `git rev-parse <name>` does for
+    plain names (no revision syntax such as ~, ^ or @{u}).
+    Returns None only for an unborn HEAD. Any other name that no ref
+    matches (abbreviated SHAs, describe output ...) raises NativeReadError,
+    so callers ask git.
+    """
+    dirs = resolve_git_dirs(path)
+    if not dirs:
+        raise NativeReadError("not a git repository")
+    git_dir, common_dir = dirs
+    if any(c in name for c in "~^:@{}") or not name:
+        raise NativeReadError("revision syntax not supported")
+    if _is_sha(name):
+        return name
+
+    if name == "HEAD" or name.endswith("_HEAD"):
+        candidates = [name]
+    else:
+        # Same precedence as git's ref_rev_parse_rules; the bare name only
+        # matters for full ref names (pseudo-refs are handled above)
+        candidates = [name] if name.startswith("refs/") else []
+        candidates += [
+            f"refs/{name}",
+            f"refs/tags/{name}",
+            f"refs/heads/{name}",
+            f"refs/remotes/{name}",
+            f"refs/remotes/{name}/HEAD",
+        ]
+    for candidate in candidates:
+        sha = resolve_ref(git_dir, common_dir, candidate)
+        if sha:
+            return sha
+    if name == "HEAD":
+        return None  # symbolic HEAD to a branch with no commits yet
+    raise NativeReadError(f"can't resolve {name!r} natively")
+
+
+# ── objects ───────────────────────────────────────────────────────────────────
+
+def _objects_dir(common_dir: str) -> str:
+    objects = os.path.join(common_dir, "objects")
+    if os.path.exists(os.path.join(objects, "info", "alternates")):
+        raise NativeReadError("alternates not supported")
+    return objects
+
+
+def _read_loose(objects: str, sha: str) -> Optional[tuple[str, bytes]]:
+    path = os.path.join(objects, sha[:2], sha[2:])
+    try:
+        with open(path, "rb") as f:
+            raw = zlib.decompress(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, zlib.error) as e:
+        raise NativeReadError(f"bad loose object {sha}: {e}")
+    header, _, body = raw.partition(b"\0")
+    obj_type, _, _ = header.decode("ascii", "replace").partition(" ")
+    return obj_type, body
+
+
+def _idx_lookup(idx_path: str, sha_bin: bytes) -> Optional[int]:
+    """Binary-search a v2 pack index for sha_bin; return its pack offset."""
+    with open(idx_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as idx:
+        if idx[:8] != b"\377tOc\0\0\0\2":
+            raise NativeReadError("unsupported pack index version")
+        fanout = 8
+        first = sha_bin[0]
+        lo = struct.unpack_from(">I", idx, fanout + (first - 1) * 4)[0] if first else 0
+        hi = struct.unpack_from(">I", idx, fanout + first * 4)[0]
+        total = struct.unpack_from(">I", idx, fanout + 255 * 4)[0]
+        names = fanout + 256 * 4
+        while lo < hi:
+            mid = (lo + hi) // 2
+            cur = idx[names + mid * 20:names + mid * 20 + 20]
+            if cur < sha_bin:
+                lo = mid + 1
+            elif cur > sha_bin:
+                hi = mid
+            else:
+                offsets = names + total * 20 + total * 4
+                offset = struct.unpack_from(">I", idx, offsets + mid * 4)[0]
+                if offset & 0x80000000:
+                    large = offsets + total * 4
+                    offset = struct.unpack_from(">Q", idx, large + (offset & 0x7FFFFFFF) * 8)[0]
+                return offset
+    return None
+
+
+def _inflate_at(pack, offset: int) -> bytes:
+    """Decompress the zlib stream starting at offset in an open pack file."""
+    pack.seek(offset)
+    d = zlib.decompressobj()
+    out = []
+    while not d.eof:
+        chunk = pack.read(16384)
+        if not chunk:
+            raise NativeReadError("truncated pack entry")
+        out.append(d.decompress(chunk))
+    return b"".join(out)
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Apply a git delta (copy/insert instruction stream) to base."""
+    pos = 0
+
+    def varint() -> int:
+        nonlocal pos
+        value = shift = 0
+        while True:
+            byte = delta[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value
+
+    varint()  # base size
+    varint()  # result size
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            copy_off = copy_len = 0
+            for i in range(4):
+                if op & (1 << i):
+                    copy_off |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (1 << (4 + i)):
+                    copy_len |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[copy_off:copy_off + (copy_len or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise NativeReadError("invalid delta opcode")
+    return bytes(out)
+
+
+def _read_pack_entry(objects: str, pack, offset: int, depth: int = 0) -> tuple[str, bytes]:
+    if depth > _MAX_DELTA_DEPTH:
+        raise NativeReadError("delta chain too deep")
+    pack.seek(offset)
+    byte = pack.read(1)[0]
+    obj_type = (byte >> 4) & 7
+    pos = offset + 1
+    while byte & 0x80:
+        byte = pack.read(1)[0]
+        pos += 1
+
+    if obj_type in _OBJ_TYPES:
+        return _OBJ_TYPES[obj_type], _inflate_at(pack, pos)
+
+    if obj_type == _OFS_DELTA:
+        byte = pack.read(1)[0]
+        pos += 1
+        rel = byte & 0x7F
+        while byte & 0x80:
+            byte = pack.read(1)[0]
+            pos += 1
+            rel = ((rel + 1) << 7) | (byte & 0x7F)
+        delta = _inflate_at(pack, pos)
+        base_type, base = _read_pack_entry(objects, pack, offset - rel, depth + 1)
+        return base_type, _apply_delta(base, delta)
+
+    if obj_type == _REF_DELTA:
+        base_sha = pack.read(20).hex()
+        delta = _inflate_at(pack, pos + 20)
+        base_type, base = read_object_from(objects, base_sha, depth + 1)
+        return base_type, _apply_delta(base, delta)
+
+    raise NativeReadError(f"unknown pack object type {obj_type}")
+
+
+def read_object_from(objects: str, sha: str, depth: int = 0) -> tuple[str, bytes]:
+    """Read (type, body) of an object from a loose file or any pack."""
+    loose = _read_loose(objects, sha)
+    if loose:
+        return loose
+
+    sha_bin = bytes.fromhex(sha)
+    pack_dir = os.path.join(objects, "pack")
+    try:
+        idx_files = [f for f in os.listdir(pack_dir) if f.endswith(".idx")]
+    except OSError:
+        idx_files = []
+    for idx_name in idx_files:
+        try:
+            offset = _idx_lookup(os.path.join(pack_dir, idx_name), sha_bin)
+        except (OSError, ValueError, struct.error) as e:
+            raise NativeReadError(f"bad pack index {idx_name}: {e}")
+        if offset is None:
+            continue
+        try:
+            with open(os.path.join(pack_dir, idx_name[:-4] + ".pack"), "rb") as pack:
+                return _read_pack_entry(objects, pack, offset, depth)
+        except (OSError, IndexError, zlib.error) as e:
+            raise NativeReadError(f"bad pack entry for {sha}: {e}")
+    raise NativeReadError(f"object {sha} not found")
+
+
+def parse_commit(body: bytes) -> dict:
+    """
+    Parse a raw commit object body.
+    subject follows git's %s: the first paragraph with newlines joined by spaces.
+    """
+    header, _, message = body.partition(b"\n\n")
+    info = {"tree": "", "parents": [], "author": "", "author_ts": 0, "committer_ts": 0}
+    for line in header.split(b"\n"):
+        if line.startswith(b" "):
+            continue  # continuation of a multi-line header (gpgsig)
+        key, _, value = line.partition(b" ")
+        if key == b"tree":
+            info["tree"] = value.decode("ascii")
+        elif key == b"parent":
+            info["parents"].append(value.decode("ascii"))
+        elif key in (b"author", b"committer"):
+            # "Name <email> 1700000000 +0100"
+            ident, _, tail = value.rpartition(b">")
+            parts = tail.split()
+            ts = int(parts[0]) if parts and parts[0].isdigit() else 0
+            if key == b"author":
+                info["author"] = ident.partition(b" <")[0].decode("utf-8", "replace")
+                info["author_ts"] = ts
+            else:
+                info["committer_ts"] = ts
+    first_para = message.decode("utf-8", "replace").lstrip("\n").split("\n\n", 1)[0]
+    info["subject"] = " ".join(l.strip() for l in first_para.splitlines()).strip()
+    return info
+
+
+def read_commit(path: str, sha: str) -> dict:
+    """Read and parse the commit sha from the repo/worktree at path."""
+    dirs = resolve_git_dirs(path)
+    if not dirs:
+        raise NativeReadError("not a git repository")
+    obj_type, body = read_object_from(_objects_dir(dirs[1]), sha)
+    if obj_type != "commit":
+        raise NativeReadError(f"{sha} is a {obj_type}, not a commit")
+    info = parse_commit(body)
+    info["sha"] = sha
+    return info
+
+
+def relative_time(ts: int, now: int) -> str:
+    """Format a timestamp like git's --date=relative (%ar/%cr)."""
+    diff = now - ts
+    if diff < 0:
+        return "in the future"
+
+    def ago(n: int, unit: str) -> str:
+        return f"{n} {unit}{'' if n == 1 else 's'} ago"
+
+    if diff < 90:
+        return ago(diff, "second")
+    diff = (diff + 30) // 60
+    if diff < 90:
+        return ago(diff, "minute")
+    diff = (diff + 30) // 60
+    if diff < 36:
+        return ago(diff, "hour")
+    diff = (diff + 12) // 24
+    if diff < 14:
+        return ago(diff, "day")
+    if diff < 70:
+        return ago((diff + 3) // 7, "week")
+    if diff < 365:
+        return ago((diff + 15) // 30, "month")
+    if diff < 1825:
+        total_months = (diff * 12 * 2 + 365) // (365 * 2)
+        years, months = divmod(total_months, 12)
+        if months:
+            return f"{years} year{'' if years == 1 else 's'}, {ago(months, 'month')}"
+        return ago(years, "year")
+    return ago((diff + 183) // 365, "year")
+
+
+__all__ = [
+    "NativeReadError",
+    "resolve_git_dirs",
+    "resolve_ref",
+    "read_head",
+    "rev_parse",
+    "read_object_from",
+    "parse_commit",
+    "read_commit",
+    "relative_time",
+]
@@ -2,21 +2,146 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
 from typing import Optional, Tuple
 
+from .config import GIT_MAX_PROCS, GIT_NATIVE_READER
+from .metrics import metrics, timed_phase
+from .git_native import NativeReadError, read_commit, read_head, resolve_git_dirs, rev_parse, relative_time
+
+
+class GitProcessLimiter:
+    """
+    Process-wide cap on simultaneously running git processes.
+
+    Shared by the blocking runners (request threads, the commit index) and
+    the asyncio runners (async routes, the watcher), so the cap holds no
+    matter how many dashboard clients are connected. Waiters are served
+    FIFO; an async waiter is woken on its own event loop.
+    """
+
+    def __init__(self, limit: int = GIT_MAX_PROCS):
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: deque = deque()
+        self.peak = 0
+        self.waits = 0
+        self.spawned = 0
+
+    def _take(self) -> None:
+        self._active += 1
+        self.spawned += 1
+        self.peak = max(self.peak, self._active)
+
+    def acquire(self) -> None:
+        """Block the calling thread until a slot is free."""
+        with self._lock:
+            if self._active < self.limit:
+                self._take()
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+            self.waits += 1
+        event.wait()
+
+    async def acquire_async(self) -> None:
+        """Wait on the running event loop until a slot is free."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit:
+                self._take()
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+            self.waits += 1
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            if handed_over:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the oldest waiter if any."""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                self.spawned += 1
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(_resolve, future)
+                    return
+                except RuntimeError:
+                    continue  # waiter's loop is closed
+            self._active -= 1
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        """Counters for diagnostics."""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self._active,
+                "waiting": len(self._waiters),
+                "peak": self.peak,
+                "waits": self.waits,
+                "spawned": self.spawned,
+            }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+# Process-wide limiter shared by every git call
+git_procs = GitProcessLimiter()
+
 
 def run_git(args: list, cwd: str, timeout: int = 10) -> Optional[str]:
     """Run a git command. Returns stdout string or None on failure."""
     try:
-        result = subprocess.run(
-            ["git"] + args,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
+        with git_procs.slot(), metrics.git_call(args, cwd) as call:
+            result = subprocess.run(
+                ["git"] + args,
+                cwd=cwd,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            if result.returncode == 0:
+                call.outcome = "ok"
         if result.returncode == 0:
             return result.stdout.strip()
         return None
@@ -24,43 +149,372 @@ def run_git(args: list, cwd: str, timeout: int = 10) -> Optional[str]:
         return None
 
 
-def run_git_out(args: list, cwd: str, timeout: int = 10) -> Tuple[bool, str]:
+def _git_env(env: Optional[dict]) -> Optional[dict]:
+    """The process environment with env's variables added (None = inherit)."""
+    return {**os.environ, **env} if env else None
+
+
+def run_git_out(args: list, cwd: str, timeout: int = 10, env: Optional[dict] = None) -> Tuple[bool, str]:
     """Run a git command. Returns (success, output) always."""
     try:
-        result = subprocess.run(
-            ["git"] + args,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
+        with git_procs.slot(), metrics.git_call(args, cwd) as call:
+            result = subprocess.run(
+                ["git"] + args,
+                cwd=cwd,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                env=_git_env(env),
+            )
+            if result.returncode == 0:
+                call.outcome = "ok"
         out = result.stdout.strip() or result.stderr.strip()
         return result.returncode == 0, out
     except Exception as e:
         return False, str(e)
 
 
+async def _exec_git_async(
+    args: list, cwd: str, timeout: float, env: Optional[dict] = None
+) -> Optional[Tuple[int, str, str]]:
+    """
+    Run git on the event loop. Returns (returncode, stdout, stderr, seconds),
+    or None when the loop can't spawn subprocesses (Windows selector loop).
+    seconds is how long git ran, without the wait for a git_procs slot.
+    """
+    async with git_procs.slot_async():
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "git", *args,
+                cwd=cwd,
+                env=_git_env(env),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except NotImplementedError:
+            return None
+        with metrics.git_call(args, cwd) as call:
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+            except BaseException:
+                # Timeout or cancellation: don't leave the git process behind
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                raise
+            if proc.returncode == 0:
+                call.outcome = "ok"
+    return (
+        proc.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+        call.seconds,
+    )
+
+
+async def run_git_async(args: list, cwd: str, timeout: int = 10) -> Optional[str]:
+    """Async run_git. Returns stdout string or None on failure."""
+    try:
+        result = await _exec_git_async(args, cwd, timeout)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return None
+    if result is None:
+        return await asyncio.to_thread(run_git, args, cwd, timeout)
+    returncode, stdout, _, _ = result
+    return stdout.strip() if returncode == 0 else None
+
+
+async def run_git_timed_async(
+    args: list, cwd: str, timeout: int = 10
+) -> Tuple[Optional[str], Optional[float]]:
+    """
+    run_git_async plus the seconds git ran, not counting the wait for a
+    git_procs slot. The seconds are None when git ran in a thread instead
+    (no subprocess support on the loop).
+    """
+    try:
+        result = await _exec_git_async(args, cwd, timeout)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return None, None
+    if result is None:
+        return await asyncio.to_thread(run_git, args, cwd, timeout), None
+    returncode, stdout, _, seconds = result
+    return (stdout.strip() if returncode == 0 else None), seconds
+
+
+async def run_git_out_async(
+    args: list, cwd: str, timeout: int = 10, env: Optional[dict] = None
+) -> Tuple[bool, str]:
+    """Async run_git_out. Returns (success, output) always."""
+    try:
+        result = await _exec_git_async(args, cwd, timeout, env)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        return False, str(e)
+    if result is None:
+        return await asyncio.to_thread(run_git_out, args, cwd, timeout, env)
+    returncode, stdout, stderr, _ = result
+    return returncode == 0, stdout.strip() or stderr.strip()
+
+
+def parse_status_v2(output: str) -> dict:
+    """
+    Parse `git status --porcelain=v2 --branch --show-stash` output.
+    Header lines give branch/upstream/ahead-behind/stash; entry lines are
+    counted as staged (X in MADRC), unstaged (Y in MD) and untracked.
+    """
+    info = {
+        "branch": None,
+        "oid": None,
+        "upstream": None,
+        "ahead": 0,
+        "behind": 0,
+        "stash_count": 0,
+        "is_dirty": False,
+        "staged": 0,
+        "unstaged": 0,
+        "untracked": 0,
+    }
+    for line in output.splitlines():
+        if line.startswith("# "):
+            key, _, value = line[2:].partition(" ")
+            if key == "branch.head":
+                # Match `rev-parse --abbrev-ref HEAD`, which prints HEAD when detached
+                info["branch"] = "HEAD" if value == "(detached)" else value
+            elif key == "branch.oid":
+                info["oid"] = None if value == "(initial)" else value
+            elif key == "branch.upstream":
+                info["upstream"] = value
+            elif key == "branch.ab":
+                parts = value.split()
+                if len(parts) == 2:
+                    try:
+                        info["ahead"], info["behind"] = int(parts[0]), -int(parts[1])
+                    except ValueError:
+                        pass
+            elif key == "stash":
+                info["stash_count"] = int(value) if value.isdigit() else 0
+        elif line.startswith(("1 ", "2 ")):
+            info["is_dirty"] = True
+            xy = line[2:4]
+            if xy[0] in "MADRC":
+                info["staged"] += 1
+            if xy[1] in "MD":
+                info["unstaged"] += 1
+        elif line.startswith("u "):
+            info["is_dirty"] = True
+        elif line.startswith("? "):
+            info["is_dirty"] = True
+            info["untracked"] += 1
+    return info
+
+
+_STATUS_ARGS = ["--no-optional-locks", "status", "--porcelain=v2", "--branch", "--show-stash"]
+_LAST_COMMIT_ARGS = ["log", "-1", "--pretty=format:%s%x00%ar%x00%H%x00%ct"]
+
+
+def _status_args(untracked: bool) -> list:
+    return _STATUS_ARGS if untracked else [*_STATUS_ARGS, "--untracked-files=no"]
+
+
+def get_status_summary(cwd: str, untracked: bool = True) -> Optional[dict]:
+    """
+    Branch, upstream divergence, stash count and file counts from a single
+    `git status` call. Returns None if git fails.
+    --no-optional-locks keeps status from rewriting .git/index, which would
+    change the repo fingerprint used by git_info_cache.
+    untracked=False skips the untracked-file walk (--untracked-files=no);
+    the untracked count is then 0 (see core.fast_status).
+    """
+    output = run_git(_status_args(untracked), cwd)
+    if output is None:
+        return None
+    return parse_status_v2(output)
+
+
+async def get_status_summary_async(cwd: str, untracked: bool = True) -> Optional[dict]:
+    """Async get_status_summary."""
+    output = await run_git_async(_status_args(untracked), cwd)
+    if output is None:
+        return None
+    return parse_status_v2(output)
+
+
+async def get_status_summary_timed_async(
+    cwd: str, untracked: bool = True, options: tuple = ()
+) -> Tuple[Optional[dict], Optional[float]]:
+    """
+    get_status_summary_async plus the seconds `git status` itself ran (see
+    run_git_timed_async). options are global git options placed before the
+    subcommand, e.g. ("-c", "core.untrackedCache=true").
+    """
+    output, seconds = await run_git_timed_async([*options, *_status_args(untracked)], cwd)
+    if output is None:
+        return None, seconds
+    return parse_status_v2(output), seconds
+
+
+@timed_phase("fs")
+def _native_last_commit(cwd: str, sha: Optional[str]) -> Optional[dict]:
+    """get_last_commit read in-process, or None to fall back to git."""
+    if not GIT_NATIVE_READER:
+        return None
+    try:
+        sha = sha or rev_parse(cwd, "HEAD")
+        if not sha:
+            raise NativeReadError("HEAD has no commits")
+        commit = read_commit(cwd, sha)
+    except (NativeReadError, ValueError):
+        return None
+    return {
+        "msg": commit["subject"],
+        "time": relative_time(commit["author_ts"], int(time.time())),
+        "hash": commit["sha"],
+        "ts": commit["committer_ts"],
+    }
+
+
+def _parse_last_commit(log: str) -> dict:
+    parts = log.split("\x00")
+    if len(parts) != 4:
+        return {"msg": "", "time": "", "hash": "", "ts": 0}
+    return {
+        "msg": parts[0],
+        "time": parts[1],
+        "hash": parts[2],
+        "ts": int(parts[3]) if parts[3].isdigit() else 0,
+    }
+
+
+def get_last_commit(cwd: str, sha: Optional[str] = None) -> dict:
+    """
+    Subject, relative author time, full hash and commit timestamp of HEAD
+    (or of sha, when the caller already knows HEAD's SHA).
+    Read in-process when possible, otherwise from one `git log -1` call.
+    """
+    native = _native_last_commit(cwd, sha)
+    if native is not None:
+        return native
+    return _parse_last_commit(run_git(_LAST_COMMIT_ARGS, cwd) or "")
+
+
+async def get_last_commit_async(cwd: str, sha: Optional[str] = None) -> dict:
+    """Async get_last_commit. The in-process read (zlib, pack files) runs in a worker thread."""
+    native = await asyncio.to_thread(_native_last_commit, cwd, sha)
+    if native is not None:
+        return native
+    return _parse_last_commit(await run_git_async(_LAST_COMMIT_ARGS, cwd) or "")
+
+
+@timed_phase("fs")
+def _native_current_branch(cwd: str) -> Optional[str]:
+    if GIT_NATIVE_READER:
+        dirs = resolve_git_dirs(cwd)
+        if dirs:
+            try:
+                branch, _ = read_head(dirs[0])
+                return branch or "HEAD"
+            except NativeReadError:
+                pass
+    return None
+
+
+def get_current_branch(cwd: str) -> str:
+    """Current branch name ("HEAD" when detached), like `rev-parse --abbrev-ref HEAD`."""
+    branch = _native_current_branch(cwd)
+    if branch is not None:
+        return branch
+    return run_git(["rev-parse", "--abbrev-ref", "HEAD"], cwd) or ""
+
+
+async def get_current_branch_async(cwd: str) -> str:
+    """Async get_current_branch."""
+    branch = _native_current_branch(cwd)
+    if branch is not None:
+        return branch
+    return await run_git_async(["rev-parse", "--abbrev-ref", "HEAD"], cwd) or ""
+
+
+@timed_phase("fs")
+def _native_branch_sha(branch: str, cwd: str, short: bool) -> Optional[str]:
+    """
+    Full SHA read in-process, "" for an unborn HEAD, or None to ask git.
+    short=True always goes to git: `rev-parse --short` picks the shortest
+    unique abbreviation (core.abbrev, scaled by object count), which a
+    plain sha[:7] doesn't match.
+    """
+    if GIT_NATIVE_READER and not short:
+        try:
+            return rev_parse(cwd, branch) or ""
+        except NativeReadError:
+            pass
+    return None
+
+
+def _rev_parse_args(branch: str, short: bool) -> list:
+    return ["rev-parse", "--short", branch] if short else ["rev-parse", branch]
+
+
 def get_branch_sha(branch: str, cwd: str, short: bool = False) -> str:
     """Get the SHA of a branch."""
-    args = ["rev-parse"]
-    if short:
-        args.append("--short")
-    args.append(branch)
-    return run_git(args, cwd) or ""
+    sha = _native_branch_sha(branch, cwd, short)
+    if sha is not None:
+        return sha
+    return run_git(_rev_parse_args(branch, short), cwd) or ""
 
 
-def get_worktree_age(path: str) -> str:
-    """Get the age of a worktree path as a human-readable string."""
+async def get_branch_sha_async(branch: str, cwd: str, short: bool = False) -> str:
+    """Async get_branch_sha. The in-process read (packed-refs) runs in a worker thread."""
+    sha = await asyncio.to_thread(_native_branch_sha, branch, cwd, short)
+    if sha is not None:
+        return sha
+    return await run_git_async(_rev_parse_args(branch, short), cwd) or ""
+
+
+async def abbreviate_shas_async(shas: list[str], cwd: str) -> dict[str, str]:
+    """
+    {full SHA: abbreviation} as git prints them (%h, like `rev-parse
+    --short`: core.abbrev, lengthened in large repos) from one git call for
+    all of shas. If git fails (e.g. an unknown SHA), every SHA falls back
+    to sha[:7].
+    """
+    unique = list(dict.fromkeys(s for s in shas if s))
+    if not unique:
+        return {}
+    output = await run_git_async(["log", "--no-walk=unsorted", "--format=%H %h", *unique], cwd)
+    short = dict(line.split(" ", 1) for line in (output or "").splitlines() if " " in line)
+    return {sha: short.get(sha) or sha[:7] for sha in unique}
+
+
+def get_worktree_mtime(path: str) -> Optional[float]:
+    """The mtime of a worktree path, or None if it can't be read."""
     try:
-        import time
-        age_seconds = time.time() - os.path.getmtime(path)
-        if age_seconds < 3600:
-            return f"{int(age_seconds / 60)}m"
-        elif age_seconds < 86400:
-            return f"{int(age_seconds / 3600)}h"
-        elif age_seconds < 604800:
-            return f"{int(age_seconds / 86400)}d"
-        else:
-            return f"{int(age_seconds / 604800)}w"
+        return os.path.getmtime(path)
     except OSError:
+        return None
+
+
+def worktree_age(mtime: Optional[float]) -> str:
+    """A worktree mtime as a human-readable age ("?" when unknown)."""
+    if mtime is None:
         return "?"
+    age_seconds = time.time() - mtime
+    if age_seconds < 3600:
+        return f"{int(age_seconds / 60)}m"
+    elif age_seconds < 86400:
+        return f"{int(age_seconds / 3600)}h"
+    elif age_seconds < 604800:
+        return f"{int(age_seconds / 86400)}d"
+    else:
+        return f"{int(age_seconds / 604800)}w"
+
+
+def get_worktree_age(path: str) -> str:
+    """Get the age of a worktree path as a human-readable string."""
+    return worktree_age(get_worktree_mtime(path))
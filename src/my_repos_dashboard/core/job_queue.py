@@ -0,0 +1,204 @@
+"""Queue for slow, state-changing dashboard operations.
+
+Merges, worktree create/remove, git actions and context capture go through
+one JobQueue instead of running inside the request handler:
+
+- Jobs on the same repo run one at a time in submission order, so two
+  merges (or a merge and a pull) on one repo never race.
+- At most JOB_WORKERS jobs run at once, on the queue's own thread pool.
+  Starlette's threadpool stays free for the read endpoints.
+- A queued job can be cancelled. A running job can be cancelled only if it
+  was submitted as interruptible. That is an async job whose git
+  subprocess is killed on cancellation, such as a fetch. A merge is left
+  to finish.
+
+Handlers either await the job (same response as before, just queued) or
+return its id at once with ?background=1 and let the client poll /jobs/{id}.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .config import JOB_WORKERS
+from .metrics import background_task
+
+# Finished jobs kept for /jobs lookups; older ones are dropped on submit
+_KEEP_FINISHED = 100
+
+
+class Job:
+    """One queued, running or finished operation."""
+
+    def __init__(self, kind: str, repo: str, interruptible: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.repo = repo
+        self.interruptible = interruptible
+        self.status = "queued"  # queued | running | done | error | cancelled
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._exception: Optional[BaseException] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error", "cancelled")
+
+    async def wait(self) -> Any:
+        """
+        The job's result, re-raising its exception. The wait is shielded, so
+        a client that disconnects doesn't cancel the job.
+        """
+        try:
+            await asyncio.shield(self.task)
+        except asyncio.CancelledError:
+            if self.status != "cancelled":
+                raise  # the waiter itself was cancelled
+        if self.status == "cancelled":
+            return {"success": False, "output": "Cancelled"}
+        if self._exception is not None:
+            raise self._exception
+        return self.result
+
+    def summary(self) -> dict:
+        """JSON-ready job state, including the result once finished."""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "repo": self.repo,
+            "status": self.status,
+            "interruptible": self.interruptible,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "queued_ms": round(((self.started or time.time()) - self.submitted) * 1000),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Bounded worker pool with per-repo FIFO serialization."""
+
+    def __init__(self, workers: int = JOB_WORKERS, keep_finished: int = _KEEP_FINISHED):
+        self.workers = max(1, workers)
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._repo_locks: dict[str, asyncio.Lock] = {}
+        self._jobs: dict[str, Job] = {}
+        self.submitted = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def repo_lock(self, repo: str) -> asyncio.Lock:
+        """The lock serializing work on repo (also usable outside the queue)."""
+        lock = self._repo_locks.get(repo)
+        if lock is None:
+            lock = self._repo_locks[repo] = asyncio.Lock()
+        return lock
+
+    def submit(
+        self,
+        kind: str,
+        repo: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        interruptible: bool = False,
+    ) -> Job:
+        """
+        Queue fn(*args) behind earlier jobs on repo (must be called from the
+        event loop). Sync functions run on the queue's thread pool; coroutine
+        functions run on the loop. Either way the job runs outside the
+        submitting request's context, so its git calls count as background.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        job = Job(kind, repo, interruptible)
+        self._prune()
+        self._jobs[job.id] = job
+        self.submitted += 1
+        job.task = background_task(self._run(job, fn, args))
+        return job
+
+    async def _run(self, job: Job, fn: Callable[..., Any], args: tuple) -> None:
+        try:
+            # Repo lock first, so a job waiting for its repo holds no worker
+            async with self.repo_lock(job.repo), self._slots:
+                job.status = "running"
+                job.started = time.time()
+                if inspect.iscoroutinefunction(fn):
+                    job.result = await fn(*args)
+                else:
+                    loop = asyncio.get_running_loop()
+                    job.result = await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+                job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            job.status = "error"
+            job.error = getattr(e, "detail", None) or str(e)
+            job._exception = e
+            self.failed += 1
+        finally:
+            job.finished = time.time()
+            if not job.started:
+                job.started = job.finished
+
+    def cancel(self, job: Job) -> tuple[bool, str]:
+        """Cancel a queued (or interruptible running) job."""
+        if job.done:
+            return False, f"Job already {job.status}"
+        if job.status == "running" and not job.interruptible:
+            return False, f"{job.kind} is running and can't be interrupted safely"
+        job.task.cancel()
+        return True, "Cancelled"
+
+    def cancel_all(self) -> None:
+        """Cancel queued and interruptible jobs (server shutdown)."""
+        for job in list(self._jobs.values()):
+            if not job.done and (job.status == "queued" or job.interruptible):
+                job.task.cancel()
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, repo: Optional[str] = None) -> list[Job]:
+        return [j for j in self._jobs.values() if repo is None or j.repo == repo]
+
+    def stats(self) -> dict:
+        """Counters for diagnostics."""
+        jobs = list(self._jobs.values())
+        return {
+            "workers": self.workers,
+            "queued": sum(1 for j in jobs if j.status == "queued"),
+            "running": sum(1 for j in jobs if j.status == "running"),
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "retained": len(jobs),
+        }
+
+
+# Process-wide queue for mutation endpoints
+job_queue = JobQueue()
+
+
+__all__ = ["Job", "JobQueue", "job_queue"]
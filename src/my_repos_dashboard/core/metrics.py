@@ -0,0 +1,360 @@
+"""Always-on instrumentation for git calls and HTTP requests.
+
+Every git subprocess (core.git_utils) is recorded with:
+- its command (status, log, for-each-ref ...) in a latency histogram;
+- its outcome: ok, error (non-zero exit or spawn failure), timeout or
+  cancelled;
+- the endpoint that caused it ("background" for the watcher, auto-fetch
+  and job workers);
+- the repo it ran in.
+
+/metrics renders all of it in Prometheus text format.
+
+ServerTimingMiddleware gives each request a RequestTiming through a
+ContextVar. Tasks and to_thread calls spawned by the handler share it,
+except detached work started with background_task() (queued jobs,
+deferred status counts, prewarming), which counts as "background".
+Git time, filesystem time (fingerprints, registry scans, in-process object
+reads) and serialization time add up there. They come back in a
+Server-Timing header:
+
+    Server-Timing: git;dur=41.2;desc="9 calls", fs;dur=3.1, ser;dur=0.8, app;dur=47.9
+
+git/fs/ser are summed across concurrent calls, so with parallel git
+processes they can exceed app (wall time).
+
+The cost per observation is a couple of perf_counter() calls and one
+uncontended lock; nothing is sampled or buffered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from functools import lru_cache, wraps
+from typing import Optional
+
+from .config import BASE_PATH
+
+# Latency histogram bucket upper bounds, seconds
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Git global options that take a value ("-C path", "-c key=value")
+_GIT_OPTS_WITH_VALUE = {"-C", "-c", "--git-dir", "--work-tree"}
+
+
+class RequestTiming:
+    """Per-request accumulators, shared by the tasks a handler spawns."""
+
+    __slots__ = ("scope", "git", "git_calls", "fs", "ser")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.git = 0.0
+        self.git_calls = 0
+        self.fs = 0.0
+        self.ser = 0.0
+
+    @property
+    def endpoint(self) -> str:
+        # The router stores the matched route in the scope once routing is done
+        route = self.scope.get("route") if self.scope else None
+        return getattr(route, "path", None) or "other"
+
+    def header(self, total: float) -> str:
+        return (
+            f'git;dur={self.git * 1000:.1f};desc="{self.git_calls} calls", '
+            f"fs;dur={self.fs * 1000:.1f}, ser;dur={self.ser * 1000:.1f}, "
+            f"app;dur={total * 1000:.1f}"
+        )
+
+
+_request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class _GitCall:
+    __slots__ = ("outcome", "seconds")
+
+    def __init__(self):
+        self.outcome = "error"  # ok | error | timeout | cancelled
+        self.seconds = 0.0      # set when the call ends
+
+
+def git_command(args: list) -> str:
+    """The git subcommand in an argument list, skipping global options."""
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in _GIT_OPTS_WITH_VALUE:
+            skip = True
+        elif not arg.startswith("-"):
+            return arg
+    return "git"
+
+
+@lru_cache(maxsize=4096)
+def _repo_label(cwd: str) -> str:
+    try:
+        rel = os.path.relpath(cwd, BASE_PATH) if cwd else "."
+    except ValueError:  # other drive (Windows)
+        rel = cwd
+    return rel.replace(os.sep, "/")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Process-wide counters and histograms; thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.git_latency: dict[str, _Histogram] = {}
+        self.git_outcomes: dict[tuple[str, str], int] = {}
+        self.git_by_endpoint: dict[str, list] = {}   # endpoint -> [calls, seconds]
+        self.git_by_repo: dict[str, list] = {}       # repo -> [calls, seconds]
+        self.status_by_repo: dict[tuple[str, str], list] = {}  # (repo, kind) -> [calls, seconds]
+        self.phases: dict[str, float] = {"fs": 0.0, "ser": 0.0}
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.request_latency: dict[str, _Histogram] = {}
+
+    # ── git ──────────────────────────────────────────────────────────────────
+    @contextmanager
+    def git_call(self, args: list, cwd: str):
+        """
+        Time one git subprocess. The caller sets call.outcome = "ok" on
+        success; timeouts (subprocess or asyncio) are detected here.
+        """
+        call = _GitCall()
+        start = time.perf_counter()
+        try:
+            yield call
+        except (subprocess.TimeoutExpired, TimeoutError):
+            call.outcome = "timeout"
+            raise
+        except asyncio.CancelledError:
+            call.outcome = "cancelled"
+            raise
+        finally:
+            call.seconds = time.perf_counter() - start
+            self.observe_git(args, cwd, call.seconds, call.outcome)
+
+    def observe_git(self, args: list, cwd: str, seconds: float, outcome: str) -> None:
+        command = git_command(args)
+        timing = _request_timing.get()
+        endpoint = timing.endpoint if timing is not None else "background"
+        repo = _repo_label(cwd)
+        with self._lock:
+            hist = self.git_latency.get(command)
+            if hist is None:
+                hist = self.git_latency[command] = _Histogram()
+            hist.observe(seconds)
+            key = (command, outcome)
+            self.git_outcomes[key] = self.git_outcomes.get(key, 0) + 1
+            for table, label in ((self.git_by_endpoint, endpoint), (self.git_by_repo, repo)):
+                row = table.get(label)
+                if row is None:
+                    row = table[label] = [0, 0.0]
+                row[0] += 1
+                row[1] += seconds
+            if timing is not None:
+                timing.git += seconds
+                timing.git_calls += 1
+
+    def observe_status(self, cwd: str, kind: str, seconds: float) -> None:
+        """
+        Time one dirty check of a repo, by kind: full (status with untracked
+        files), quick (--untracked-files=no) or untracked (the deferred count).
+        """
+        key = (_repo_label(cwd), kind)
+        with self._lock:
+            row = self.status_by_repo.get(key)
+            if row is None:
+                row = self.status_by_repo[key] = [0, 0.0]
+            row[0] += 1
+            row[1] += seconds
+
+    # ── filesystem / serialization phases ────────────────────────────────────
+    def add_phase(self, phase: str, seconds: float) -> None:
+        timing = _request_timing.get()
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            if timing is not None:
+                setattr(timing, phase, getattr(timing, phase) + seconds)
+
+    @contextmanager
+    def phase(self, phase: str):
+        """Attribute the time spent in the block to "fs" or "ser"."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(phase, time.perf_counter() - start)
+
+    # ── requests ─────────────────────────────────────────────────────────────
+    def observe_request(self, method: str, endpoint: str, status: int, seconds: float) -> None:
+        with self._lock:
+            key = (method, endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            hist = self.request_latency.get(endpoint)
+            if hist is None:
+                hist = self.request_latency[endpoint] = _Histogram()
+            hist.observe(seconds)
+
+    # ── export ───────────────────────────────────────────────────────────────
+    def prometheus(self, extra: Optional[dict[str, tuple[str, str, float]]] = None) -> str:
+        """
+        All metrics in Prometheus text exposition format (0.0.4). `extra`
+        adds unlabelled series from other components: name -> (type, help, value).
+        """
+        lines: list[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, label: str, hists: dict[str, _Histogram]) -> None:
+            for value, hist in sorted(hists.items()):
+                lv = f'{label}="{_escape(value)}"'
+                cumulative = 0
+                for bound, count in zip(_BUCKETS + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{{lv},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{lv}}} {hist.sum:.6f}")
+                lines.append(f"{name}_count{{{lv}}} {hist.count}")
+
+        with self._lock:
+            family("dashboard_git_command_seconds", "histogram", "Latency of git subprocesses by command.")
+            histogram("dashboard_git_command_seconds", "command", self.git_latency)
+
+            family("dashboard_git_commands_total", "counter", "Git subprocesses by command and outcome (ok, error, timeout, cancelled).")
+            for (command, outcome), n in sorted(self.git_outcomes.items()):
+                lines.append(f'dashboard_git_commands_total{{command="{_escape(command)}",outcome="{outcome}"}} {n}')
+
+            for label, table, what in (
+                ("endpoint", self.git_by_endpoint, "endpoint (background = watcher, auto-fetch, jobs)"),
+                ("repo", self.git_by_repo, "repo"),
+            ):
+                family(f"dashboard_git_{label}_calls_total", "counter", f"Git subprocesses per {what}.")
+                for value, (calls, _) in sorted(table.items()):
+                    lines.append(f'dashboard_git_{label}_calls_total{{{label}="{_escape(value)}"}} {calls}')
+                family(f"dashboard_git_{label}_seconds_total", "counter", f"Git subprocess time per {what}.")
+                for value, (_, seconds) in sorted(table.items()):
+                    lines.append(f'dashboard_git_{label}_seconds_total{{{label}="{_escape(value)}"}} {seconds:.6f}')
+
+            family("dashboard_status_calls_total", "counter", "Dirty checks per repo by kind (full, quick, untracked).")
+            for (repo, kind), (calls, _) in sorted(self.status_by_repo.items()):
+                lines.append(f'dashboard_status_calls_total{{repo="{_escape(repo)}",kind="{kind}"}} {calls}')
+            family("dashboard_status_seconds_total", "counter", "Dirty check time per repo by kind (full, quick, untracked).")
+            for (repo, kind), (_, seconds) in sorted(self.status_by_repo.items()):
+                lines.append(f'dashboard_status_seconds_total{{repo="{_escape(repo)}",kind="{kind}"}} {seconds:.6f}')
+
+            family("dashboard_phase_seconds_total", "counter", "Time in filesystem reads (fs) and response encoding (ser).")
+            for phase, seconds in sorted(self.phases.items()):
+                lines.append(f'dashboard_phase_seconds_total{{phase="{phase}"}} {seconds:.6f}')
+
+            family("dashboard_http_requests_total", "counter", "HTTP requests by method, route and status.")
+            for (method, endpoint, status), n in sorted(self.requests.items()):
+                lines.append(
+                    f'dashboard_http_requests_total{{method="{method}",endpoint="{_escape(endpoint)}",status="{status}"}} {n}'
+                )
+            family("dashboard_http_request_seconds", "histogram", "HTTP request latency by route (streams: full duration).")
+            histogram("dashboard_http_request_seconds", "endpoint", self.request_latency)
+
+        for name, (kind, help_text, value) in sorted((extra or {}).items()):
+            family(name, kind, help_text)
+            lines.append(f"{name} {value}")
+        family("dashboard_uptime_seconds", "gauge", "Seconds since the process started.")
+        lines.append(f"dashboard_uptime_seconds {time.time() - self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide metrics registry
+metrics = Metrics()
+
+
+def timed_phase(phase: str):
+    """Decorator form of metrics.phase() for hot helper functions."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.add_phase(phase, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def background_task(coro) -> asyncio.Task:
+    """
+    Start coro as a task in a fresh context, outside any request's timing.
+    Its git calls count as "background" instead of being added to whichever
+    request started it, possibly after that request finished.
+    """
+    return asyncio.get_running_loop().create_task(coro, context=Context())
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware: per-request timing context, Server-Timing header, request metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming(scope)
+        token = _request_timing.set(timing)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = timing.header(time.perf_counter() - start).encode("latin-1")
+                message["headers"] = [*message.get("headers", []), (b"server-timing", header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timing.reset(token)
+            metrics.observe_request(scope.get("method", ""), timing.endpoint, status, time.perf_counter() - start)
+
+
+__all__ = [
+    "Metrics",
+    "RequestTiming",
+    "ServerTimingMiddleware",
+    "background_task",
+    "git_command",
+    "metrics",
+    "timed_phase",
+]
@@ -0,0 +1,203 @@
+"""Versioned in-memory snapshot of the /projects payload.
+
+Each scan of BASE_PATH is folded into a ProjectStore: one compact
+ProjectRecord per repo. A record whose content changed gets the next value
+of a store-wide version counter. Unchanged records keep their version and
+their cached JSON encoding, so:
+
+- /projects joins the cached per-repo JSON instead of re-serializing
+  every repo on every call;
+- /projects?since=<version> returns only the repos changed (or removed)
+  after that version, plus the current order, for polling clients.
+
+Encoding goes through core.responses (orjson when installed). The full body
+is kept as one EncodedBody per version, so its gzip/brotli variants are
+compressed once per change, not once per request.
+
+The counter starts at the startup time in milliseconds. Versions therefore
+keep increasing across server restarts, and a client holding a version
+from before the restart gets a full payload, not a wrong delta.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .responses import EncodedBody, dumps
+
+# Removed repos remembered for deltas; older removals force a full payload
+_MAX_TOMBSTONES = 1000
+
+
+def same_git_info(a: Optional[dict], b: Optional[dict]) -> bool:
+    """
+    Compare git info ignoring last_time and the worktree ages, which drift
+    ("3 minutes ago", "2h") without any change to the repo. The client
+    formats them from last_ts and each worktree's mtime.
+    """
+    if a is None or b is None:
+        return a is b
+    return _without_drift(a) == _without_drift(b)
+
+
+def _without_drift(info: dict) -> dict:
+    stable = {**info, "last_time": None}
+    if info.get("worktrees"):
+        stable["worktrees"] = [{**w, "age": None} for w in info["worktrees"]]
+    return stable
+
+
+@dataclass(slots=True)
+class ProjectRecord:
+    """One repo as served by /projects."""
+    name: str
+    path: str
+    git: Optional[dict]
+    has_scratchpad: bool
+    is_pinned: bool
+    version: int = 0
+    _json: Optional[bytes] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_project(cls, project: dict) -> "ProjectRecord":
+        return cls(
+            project["name"],
+            project["path"],
+            project["git"],
+            project["hasScratchpad"],
+            project["isPinned"],
+        )
+
+    def same_content(self, other: "ProjectRecord") -> bool:
+        return (
+            self.path == other.path
+            and self.has_scratchpad == other.has_scratchpad
+            and self.is_pinned == other.is_pinned
+            and same_git_info(self.git, other.git)
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "git": self.git,
+            "hasScratchpad": self.has_scratchpad,
+            "isPinned": self.is_pinned,
+        }
+
+    def json(self) -> bytes:
+        """The record's JSON, encoded once per version."""
+        if self._json is None:
+            self._json = dumps(self.to_dict())
+        return self._json
+
+    def sort_key(self):
+        # Same ordering as the original /projects sort (used with reverse=True)
+        return (not self.is_pinned, self.git["last_ts"] if self.git else 0)
+
+
+class ProjectStore:
+    """Records by name, a version counter and tombstones for removed repos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: dict[str, ProjectRecord] = {}
+        self._order: list[ProjectRecord] = []
+        self._removed: dict[str, int] = {}
+        self._full: Optional[tuple[int, EncodedBody]] = None
+        self.version = int(time.time() * 1000)
+        # Deltas can't be computed from before this version
+        self._horizon = self.version
+        self.syncs = 0
+        self.changed = 0
+
+    def sync(self, projects: list[dict]) -> int:
+        """
+        Fold a complete scan into the store, bumping the version of every
+        new or changed repo and tombstoning the ones that disappeared.
+        Returns the current version.
+        """
+        with self._lock:
+            self.syncs += 1
+            seen = set()
+            for project in projects:
+                record = ProjectRecord.from_project(project)
+                seen.add(record.name)
+                current = self._records.get(record.name)
+                if current is not None and current.same_content(record):
+                    continue
+                self.version += 1
+                self.changed += 1
+                record.version = self.version
+                self._records[record.name] = record
+                self._removed.pop(record.name, None)
+            for name in set(self._records) - seen:
+                del self._records[name]
+                self.version += 1
+                self._removed[name] = self.version
+            if len(self._removed) > _MAX_TOMBSTONES:
+                dropped = sorted(self._removed.items(), key=lambda kv: kv[1])[: len(self._removed) - _MAX_TOMBSTONES]
+                for name, version in dropped:
+                    del self._removed[name]
+                    self._horizon = max(self._horizon, version)
+            self._order = sorted(self._records.values(), key=ProjectRecord.sort_key, reverse=True)
+            return self.version
+
+    def names(self) -> list[str]:
+        """Repo names in display order."""
+        with self._lock:
+            return [r.name for r in self._order]
+
+    def full_body(self) -> EncodedBody:
+        """The complete /projects body: cached records in display order."""
+        with self._lock:
+            order, version, cached = self._order, self.version, self._full
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        body = EncodedBody(self._projects_json(order, b'"version":' + str(version).encode()))
+        self._full = (version, body)
+        return body
+
+    def delta_body(self, since: int) -> EncodedBody:
+        """
+        Repos changed after `since`, removed names and the current order.
+        Falls back to the full body (with "full": true) when `since` is
+        older than the tombstone horizon or from another server run.
+        """
+        with self._lock:
+            order, version = self._order, self.version
+            if since < self._horizon or since > version:
+                return EncodedBody(self._projects_json(order, b'"full":true,"version":' + str(version).encode()))
+            changed = [r for r in order if r.version > since]
+            removed = [name for name, v in self._removed.items() if v > since]
+        return EncodedBody(self._projects_json(changed, b",".join([
+            b'"full":false',
+            b'"removed":' + dumps(removed),
+            b'"order":' + dumps([r.name for r in order]),
+            b'"version":' + str(version).encode(),
+        ])))
+
+    @staticmethod
+    def _projects_json(records: list[ProjectRecord], tail: bytes) -> bytes:
+        return b'{"projects":[' + b",".join(r.json() for r in records) + b"]," + tail + b"}"
+
+    def stats(self) -> dict:
+        """Counters for diagnostics."""
+        with self._lock:
+            return {
+                "version": self.version,
+                "records": len(self._records),
+                "tombstones": len(self._removed),
+                "syncs": self.syncs,
+                "changed": self.changed,
+            }
+
+
+# One store per /projects worktrees mode ("full" records carry worktree lists)
+project_stores = {"full": ProjectStore(), "count": ProjectStore()}
+
+
+__all__ = ["ProjectRecord", "ProjectStore", "project_stores", "same_git_info"]
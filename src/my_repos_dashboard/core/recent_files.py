@@ -0,0 +1,203 @@
+"""Bounded, cached "recently changed files" for the commit hover tooltip.
+
+The tooltip shows the paths touched by the last `depth` commits on
+HEAD's first-parent line, newest first, at most MAX_FILES of them. Before
+this module it ran a full `git diff --name-status HEAD~N..HEAD` and
+truncated afterwards. It fell back to diffing the whole tree when
+history was shorter than N. On large repos one hover could take seconds.
+
+Now the list comes from one streamed
+    git log -z --name-status --no-renames --first-parent -m --format= -n <depth> HEAD
+The output is parsed as it arrives, and git is killed once MAX_FILES
+distinct paths are in. The cost is bounded by the tooltip size, not by
+the diff size. A short history needs no fallback: the root commit simply
+lists its files as added. Rename detection is off, because it needs the
+whole diff before printing anything. A renamed file shows as D plus A.
+
+Results are cached by (repo, HEAD SHA, depth). HEAD is read in-process,
+so a repeat hover costs no git process until HEAD moves.
+schedule_prewarm() fills the cache for the repos the grid shows first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .git_utils import get_branch_sha, git_procs
+from .metrics import background_task, metrics
+
+MAX_FILES = 20
+_MAX_DEPTH = 50
+_CACHE_SIZE = 1024
+_TIMEOUT = 10
+_READ_SIZE = 8192
+
+
+def _stream_changed_files(repo_path: str, depth: int) -> Optional[tuple[list[dict], bool]]:
+    """(files, truncated) from the streamed git log, or None if git failed."""
+    args = ["log", "-z", "--name-status", "--no-renames", "--first-parent", "-m",
+            "--format=", f"-n{depth}", "HEAD"]
+    files: list[dict] = []
+    seen: set[str] = set()
+    truncated = False
+    with git_procs.slot(), metrics.git_call(args, repo_path) as call:
+        try:
+            proc = subprocess.Popen(
+                ["git", *args], cwd=repo_path,
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(_TIMEOUT, _kill)
+        timer.start()
+        try:
+            buf = b""
+            status: Optional[str] = None
+            while not truncated:
+                chunk = proc.stdout.read1(_READ_SIZE)
+                if not chunk:
+                    break
+                *tokens, buf = (buf + chunk).split(b"\x00")
+                for token in tokens:
+                    token = token.strip(b"\n")
+                    if not token:
+                        continue
+                    if status is None:
+                        status = token[:1].decode("ascii", "replace")
+                        continue
+                    path = token.decode("utf-8", "replace")
+                    if path not in seen:
+                        if len(files) == MAX_FILES:
+                            truncated = True
+                            break
+                        seen.add(path)
+                        files.append({"status": status, "path": path})
+                    status = None
+            if truncated:
+                proc.kill()  # everything after this is discarded anyway
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+            returncode = proc.wait()
+        if timed_out.is_set():
+            call.outcome = "timeout"
+            return None
+        if not truncated and returncode != 0:
+            return None
+        call.outcome = "ok"
+    return files, truncated
+
+
+class RecentFilesCache:
+    """LRU of tooltip file lists keyed by (repo path, HEAD SHA, depth)."""
+
+    def __init__(self, size: int = _CACHE_SIZE):
+        self.size = size
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.truncated = 0
+        self.prewarmed = 0
+        self.prewarm_errors = 0
+        self.last_error: Optional[str] = None
+        self._queue: list[tuple[str, int]] = []
+        self._draining = False
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, repo_path: str, depth: int = 1) -> dict:
+        """{"files": [...], "truncated": bool, "head": sha} for HEAD's last `depth` commits."""
+        depth = max(1, min(depth, _MAX_DEPTH))
+        head = get_branch_sha("HEAD", repo_path)
+        if not head:
+            return {"files": [], "truncated": False, "head": None}
+        key = (repo_path, head, depth)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        result = _stream_changed_files(repo_path, depth)
+        if result is None:
+            return {"files": [], "truncated": False, "head": head}
+        files, truncated = result
+        entry = {"files": files, "truncated": truncated, "head": head}
+        with self._lock:
+            self.truncated += truncated
+            self._entries[key] = entry
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return entry
+
+    # ── prewarming ───────────────────────────────────────────────────────────
+    def _drain(self) -> None:
+        """Fill the cache for queued repos one at a time (runs in a worker thread)."""
+        try:
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        # Same lock as schedule_prewarm's check: no queued repo is missed
+                        self._draining = False
+                        return
+                    repo_path, depth = self._queue.pop(0)
+                try:
+                    self.get(repo_path, depth)
+                except Exception as e:
+                    # Skip the repo; the tooltip retries it on hover
+                    self.prewarm_errors += 1
+                    self.last_error = f"{repo_path}: {type(e).__name__}: {e}"
+                    continue
+                self.prewarmed += 1
+        except BaseException:
+            with self._lock:
+                self._draining = False
+            raise
+
+    def schedule_prewarm(self, repo_paths: list[str], depth: int = 1) -> int:
+        """
+        Warm the cache for repo_paths in the background, in order. A newer
+        call replaces whatever is still queued: only the repos currently on
+        screen are worth the git calls. Returns the number queued.
+        """
+        with self._lock:
+            self._queue = [(p, depth) for p in repo_paths]
+            if self._draining:
+                return len(repo_paths)
+            self._draining = True
+        self._task = background_task(asyncio.to_thread(self._drain))
+        return len(repo_paths)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for diagnostics."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "truncated": self.truncated,
+                "entries": len(self._entries),
+                "prewarmed": self.prewarmed,
+                "prewarm_errors": self.prewarm_errors,
+                "last_error": self.last_error,
+                "queued": len(self._queue),
+            }
+
+
+# Process-wide cache shared by the tooltip endpoint and prewarming
+recent_files = RecentFilesCache()
+
+
+__all__ = ["MAX_FILES", "RecentFilesCache", "recent_files"]
@@ -0,0 +1,183 @@
+"""Cached registry of the repos and folders under BASE_PATH.
+
+Discovery walks BASE_PATH with os.scandir, up to REPO_SCAN_DEPTH levels, and
+classifies every entry as:
+  repo     - has a .git directory
+  worktree - has a .git file (linked worktree)
+  folder   - neither (shown as a "no git" card)
+
+Nested layouts: a folder that is not a repo but contains repos within the
+depth limit is a group. Groups are walked into, not listed themselves, and
+their repos are named by relative path with "/" ("group/repo").
+
+The result is reused while the mtimes of BASE_PATH, every group and every
+plain folder are unchanged. Adding or removing an entry changes its parent's
+mtime, and `git init` in a plain folder changes that folder's mtime. Checking
+the cache therefore costs one stat() per directory that was listed, never a
+directory listing.
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+import threading
+from typing import NamedTuple, Optional
+
+from .config import BASE_PATH, REPO_SCAN_DEPTH
+from .metrics import timed_phase
+
+# Never listed: the dashboard's own checkout and its data directory
+_EXCLUDED = {"my-dashboard", ".my_dashboard"}
+
+
+class InvalidRepoName(ValueError):
+    """A repo name that would resolve outside BASE_PATH."""
+
+
+class RepoEntry(NamedTuple):
+    name: str   # path relative to BASE_PATH, "/"-separated
+    path: str   # absolute path
+    kind: str   # "repo" | "worktree" | "folder"
+
+
+def _kind(path: str) -> str:
+    """Classify a directory from its .git child, with a single stat()."""
+    try:
+        st = os.stat(os.path.join(path, ".git"))
+    except OSError:
+        return "folder"
+    return "repo" if stat.S_ISDIR(st.st_mode) else "worktree"
+
+
+class RepoRegistry:
+    """Thread-safe, mtime-validated list of RepoEntry under a base path."""
+
+    def __init__(self, base_path: str = BASE_PATH, depth: int = REPO_SCAN_DEPTH):
+        self.base_path = base_path
+        self.depth = max(1, depth)
+        self._lock = threading.Lock()
+        self._entries: list[RepoEntry] = []
+        self._by_name: dict[str, RepoEntry] = {}
+        self._signature: dict[str, int] = {}
+        self.scans = 0
+        self.hits = 0
+
+    def _signature_valid(self) -> bool:
+        if not self._signature:
+            return False
+        for path, mtime in self._signature.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _scan(self) -> tuple[list[RepoEntry], dict[str, int]]:
+        entries: list[RepoEntry] = []
+        signature: dict[str, int] = {}
+
+        def walk(directory: str, prefix: str, levels_left: int) -> bool:
+            """Scan one level; returns True if any repo/worktree was found below."""
+            try:
+                signature[directory] = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as it:
+                    children = sorted(
+                        (e for e in it if e.is_dir() and e.name not in _EXCLUDED),
+                        key=lambda e: e.name,
+                    )
+            except OSError:
+                return False
+
+            found = False
+            for child in children:
+                # Hidden folders only count at the top level, as before nesting
+                if prefix and child.name.startswith("."):
+                    continue
+                name = prefix + child.name
+                kind = _kind(child.path)
+                if kind != "folder":
+                    entries.append(RepoEntry(name, child.path, kind))
+                    found = True
+                    continue
+                if levels_left > 1:
+                    mark = len(entries)
+                    if walk(child.path, name + "/", levels_left - 1):
+                        found = True  # a group: its repos are listed instead
+                        continue
+                    # No repos below: list the folder itself. The mtimes walk()
+                    # recorded stay, so a later `git init` inside is noticed.
+                    del entries[mark:]
+                else:
+                    try:
+                        signature[child.path] = child.stat().st_mtime_ns
+                    except OSError:
+                        pass
+                entries.append(RepoEntry(name, child.path, "folder"))
+            return found
+
+        walk(self.base_path, "", self.depth)
+        return entries, signature
+
+    @timed_phase("fs")
+    def entries(self) -> list[RepoEntry]:
+        """All entries, rescanning only if a listed directory changed."""
+        with self._lock:
+            if self._signature_valid():
+                self.hits += 1
+                return self._entries
+            entries, signature = self._scan()
+            self._entries = entries
+            self._by_name = {e.name: e for e in entries}
+            self._signature = signature
+            self.scans += 1
+            return entries
+
+    def names(self) -> list[str]:
+        return [e.name for e in self.entries()]
+
+    def get(self, name: str) -> Optional[RepoEntry]:
+        """Entry for name, or None if it isn't registered."""
+        self.entries()
+        return self._by_name.get(name)
+
+    def path_for(self, name: str) -> str:
+        """
+        Absolute path for a repo name. Unregistered names map under base_path
+        as before; names that would escape base_path raise InvalidRepoName.
+        """
+        entry = self.get(name)
+        if entry:
+            return entry.path
+        base = os.path.abspath(self.base_path)
+        path = os.path.abspath(os.path.join(base, *name.split("/")))
+        if os.path.commonpath([base, path]) != base:
+            raise InvalidRepoName(f"Invalid repo name: {name}")
+        return path
+
+    def name_for(self, path: str) -> str:
+        """Registry name of a path under base_path."""
+        return os.path.relpath(path, self.base_path).replace(os.sep, "/")
+
+    def stats(self) -> dict:
+        """Scan/hit counters for diagnostics."""
+        with self._lock:
+            kinds: dict[str, int] = {}
+            for e in self._entries:
+                kinds[e.kind] = kinds.get(e.kind, 0) + 1
+            return {
+                "entries": len(self._entries),
+                "kinds": kinds,
+                "depth": self.depth,
+                "scans": self.scans,
+                "hits": self.hits,
+                "watched_dirs": len(self._signature),
+            }
+
+
+# Process-wide registry shared by all endpoints and the watcher
+repo_registry = RepoRegistry()
+
+
+__all__ = ["InvalidRepoName", "RepoEntry", "RepoRegistry", "repo_registry"]
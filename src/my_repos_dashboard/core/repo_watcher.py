@@ -0,0 +1,346 @@
+"""Background watcher that pushes per-repo git info changes to subscribers.
+
+Runs as an asyncio task started with the app. Each tick it checks repo
+fingerprints (see core.git_cache) and recomputes git info only for the
+repos whose .git state changed. Subscribers (the /projects/events SSE
+stream) receive one small delta per changed repo:
+
+    {"type": "git", "name": "<repo>", "git": {...}}   # as /projects?worktrees=count
+    {"type": "rescan"}                                # folders added/removed
+
+With watchdog installed, filesystem events on each repo's git dir and
+refs/ narrow the fingerprint checks to repos that actually saw activity.
+Without it, or when the observer can't start (e.g. the inotify instance
+limit), every repo is fingerprinted each tick (a few stat() calls per repo).
+Working-tree edits don't touch .git, so a slow round-robin sweep also
+re-checks a few repos per tick.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+from typing import Optional
+
+from .config import REPO_WATCHER, WATCH_INTERVAL, WATCH_SWEEP_INTERVAL
+from .fast_status import fast_status
+from .git_cache import git_info_cache, repo_fingerprint, worktree_list_cache
+from .git_native import resolve_git_dirs
+from .project_store import same_git_info
+from .repo_registry import RepoRegistry, repo_registry
+from .singleflight import endpoint_flights
+from .worktree_ops import get_git_info_async
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional dependency
+    Observer = None
+    FileSystemEventHandler = object
+
+_QUEUE_SIZE = 256
+_WRITE_EVENTS = {"created", "deleted", "modified", "moved", "closed"}
+_UNSEEN = object()
+
+
+class _GitDirHandler(FileSystemEventHandler):
+    """Forwards watchdog events under a git dir to the watcher."""
+
+    def __init__(self, watcher: "RepoWatcher", names: list[str]):
+        self.watcher = watcher
+        self.names = names
+
+    def on_any_event(self, event):
+        # Only writes matter: open/close-without-write events come from our own
+        # reads and would wake the watcher in a loop. Object writes are noise;
+        # refs/HEAD/index changes are what matter.
+        if event.event_type not in _WRITE_EVENTS:
+            return
+        if f"{os.sep}objects{os.sep}" in event.src_path:
+            return
+        for name in self.names:
+            self.watcher.mark_pending(name)
+
+
+class RepoWatcher:
+    """Detects changed repos and fans their new git info out to subscribers."""
+
+    def __init__(
+        self,
+        registry: RepoRegistry = repo_registry,
+        interval: float = WATCH_INTERVAL,
+        sweep_interval: float = WATCH_SWEEP_INTERVAL,
+    ):
+        self.registry = registry
+        self.interval = interval
+        self.sweep_interval = sweep_interval
+        self._folders: list[str] = []
+        self._paths: dict[str, str] = {}
+        self._fingerprints: dict[str, Optional[tuple]] = {}
+        self._infos: dict[str, Optional[dict]] = {}
+        self._pending: set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._sweep_pos = 0
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._observer = None
+        self.observer_error: Optional[str] = None
+        self.ticks = 0
+        self.changes = 0
+        self.events_sent = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+    async def start(self) -> None:
+        """Start the polling task (and watchdog observer when installed)."""
+        if self._task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await asyncio.to_thread(self._baseline)
+        # Deferred untracked counts (fast status mode) push their changes too
+        fast_status.on_change = self.notify
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the polling task and the watchdog observer."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        fast_status.on_change = None
+        self._stop_observer()
+
+    # ── subscribers ───────────────────────────────────────────────────────────
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber queue that receives delta events."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, event: dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and tell it to reload everything
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "rescan"})
+            self.events_sent += 1
+
+    # ── change detection ──────────────────────────────────────────────────────
+    def mark_pending(self, name: str) -> None:
+        """Schedule a fingerprint check for name on the next tick (thread-safe)."""
+        with self._pending_lock:
+            self._pending.add(name)
+        if self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def notify(self, path: str) -> None:
+        """
+        Force a recompute of the repo at path, e.g. after a git action that
+        only touched the working tree (clean, reset). Thread-safe.
+        """
+        git_info_cache.invalidate(path)
+        worktree_list_cache.invalidate(path)
+        endpoint_flights.invalidate()
+        name = self.registry.name_for(path)
+        self._fingerprints.pop(name, None)
+        self.mark_pending(name)
+
+    def _refresh_folders(self) -> bool:
+        """Sync the folder list with the registry; True if it changed."""
+        entries = self.registry.entries()
+        paths = {e.name: e.path for e in entries}
+        if paths == self._paths:
+            return False
+        self._paths = paths
+        self._folders = [e.name for e in entries]
+        return True
+
+    def _path(self, name: str) -> str:
+        return self._paths.get(name) or self.registry.path_for(name)
+
+    def _baseline(self) -> None:
+        """Record current folders and fingerprints without publishing anything."""
+        self._refresh_folders()
+        for name in self._folders:
+            self._fingerprints[name] = repo_fingerprint(self._path(name))
+        self._start_observer()
+
+    def _poll(self) -> tuple[list[str], list[str], bool]:
+        """
+        Return (repos whose fingerprint changed, repos due for a sweep,
+        whether folders were added/removed).
+        """
+        # The registry rescans only when a listed directory's mtime changed
+        structure_changed = self._refresh_folders()
+        if structure_changed:
+            for name in set(self._fingerprints) - set(self._folders):
+                self._fingerprints.pop(name, None)
+                self._infos.pop(name, None)
+            self._restart_observer()
+
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+        if self._observer is None:
+            candidates = set(self._folders)
+        else:
+            candidates = pending & set(self._folders)
+
+        changed = []
+        for name in candidates:
+            fingerprint = repo_fingerprint(self._path(name))
+            if name not in self._fingerprints or fingerprint != self._fingerprints[name]:
+                self._fingerprints[name] = fingerprint
+                changed.append(name)
+
+        # Round-robin sweep: re-run git for a few repos per tick so
+        # working-tree-only edits eventually surface
+        swept = []
+        if self.sweep_interval > 0 and self._folders:
+            batch = math.ceil(len(self._folders) * self.interval / self.sweep_interval)
+            for _ in range(min(batch, len(self._folders))):
+                self._sweep_pos %= len(self._folders)
+                name = self._folders[self._sweep_pos]
+                self._sweep_pos += 1
+                if name not in changed and name not in swept:
+                    git_info_cache.invalidate(self._path(name))
+                    swept.append(name)
+        return changed, swept, structure_changed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self.ticks += 1
+            try:
+                changed, swept, structure_changed = await asyncio.to_thread(self._poll)
+            except Exception as e:
+                self._record_error(e)
+                continue
+            if structure_changed:
+                endpoint_flights.invalidate()
+                self._publish({"type": "rescan"})
+            for name in changed + swept:
+                try:
+                    await self._recompute(name, swept=name in swept)
+                except Exception as e:
+                    # Skip the repo; the next fingerprint change or sweep retries it
+                    self._record_error(e, name)
+
+    async def _recompute(self, name: str, swept: bool) -> None:
+        info = await get_git_info_async(self._path(name), worktrees="count")
+        previous = self._infos.get(name, _UNSEEN)
+        self._infos[name] = info
+        # Fingerprint changes are always pushed. Sweeps push only real
+        # differences; a sweep's first look at a repo is just a baseline
+        # (clients already have it from their /projects load).
+        if swept and (previous is _UNSEEN or same_git_info(previous, info)):
+            return
+        self.changes += 1
+        endpoint_flights.invalidate()
+        self._publish({"type": "git", "name": name, "git": info})
+
+    def _record_error(self, e: Exception, name: Optional[str] = None) -> None:
+        self.errors += 1
+        prefix = f"{name}: " if name else ""
+        self.last_error = f"{prefix}{type(e).__name__}: {e}"
+
+    # ── watchdog ──────────────────────────────────────────────────────────────
+    def _start_observer(self) -> None:
+        """
+        Watch each git dir (HEAD, index, packed-refs, FETCH_HEAD) without
+        recursion, plus the common dir's refs/. objects/ is left out: its 256
+        fan-out dirs would each cost an inotify watch. Every watched path is
+        its own inotify instance, usually capped at 128 per user; if the
+        observer can't start, the watcher polls instead.
+        """
+        if Observer is None:
+            return
+        watches: dict[tuple[str, bool], list[str]] = {}
+        for name in self._folders:
+            dirs = resolve_git_dirs(self._path(name))
+            if not dirs:
+                continue
+            git_dir, common_dir = dirs
+            # Linked worktrees share the common dir and refs with their main repo
+            for path, recursive in {(git_dir, False), (common_dir, False),
+                                    (os.path.join(common_dir, "refs"), True)}:
+                watches.setdefault((path, recursive), []).append(name)
+        observer = Observer()
+        for (path, recursive), names in watches.items():
+            try:
+                observer.schedule(_GitDirHandler(self, names), path, recursive=recursive)
+            except OSError:
+                continue
+        observer.daemon = True
+        try:
+            observer.start()
+        except OSError as e:
+            observer.stop()
+            self.observer_error = f"{type(e).__name__}: {e}"
+            self._observer = None
+            return
+        self.observer_error = None
+        self._observer = observer
+
+    def _stop_observer(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def _restart_observer(self) -> None:
+        if self._observer is not None:
+            self._stop_observer()
+            self._start_observer()
+
+    def stats(self) -> dict:
+        """Counters for diagnostics."""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "backend": "watchdog" if self._observer is not None else "polling",
+            "observer_error": self.observer_error,
+            "repos": len(self._folders),
+            "subscribers": len(self._subscribers),
+            "ticks": self.ticks,
+            "changes": self.changes,
+            "events_sent": self.events_sent,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "interval": self.interval,
+            "sweep_interval": self.sweep_interval,
+        }
+
+
+# Process-wide watcher, started by the app's startup hook
+repo_watcher = RepoWatcher()
+
+
+async def start_repo_watcher() -> None:
+    """Startup hook: start the watcher unless disabled with REPO_WATCHER=0."""
+    if REPO_WATCHER:
+        await repo_watcher.start()
+
+
+async def stop_repo_watcher() -> None:
+    """Shutdown hook."""
+    await repo_watcher.stop()
+
+
+__all__ = ["RepoWatcher", "repo_watcher", "start_repo_watcher", "stop_repo_watcher"]
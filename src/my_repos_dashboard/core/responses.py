@@ -0,0 +1,153 @@
+"""Encoded, compressed response bodies for the large JSON endpoints.
+
+JSON is encoded with orjson when installed (`pip install
+my-repos-dashboard[perf]`), else with the stdlib encoder using compact
+separators. An EncodedBody keeps the encoded bytes together with their
+gzip and brotli variants. Each variant is compressed at most once, so a
+snapshot served to many clients (or polled repeatedly) is encoded and
+compressed once until it changes.
+
+Compression is negotiated per request from Accept-Encoding: brotli
+(when installed) before gzip. Bodies under _MIN_COMPRESS bytes go out
+uncompressed. Every body carries an ETag, and a matching If-None-Match gets
+304 Not Modified. Streaming endpoints (NDJSON, SSE) don't use this, because
+compressing them would buffer the stream.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from .metrics import metrics
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+_MIN_COMPRESS = 1024
+_GZIP_LEVEL = 6
+_BROTLI_QUALITY = 5
+# Static files served through file_body(), keyed by path
+_file_bodies: dict[str, tuple[tuple[int, int], "EncodedBody"]] = {}
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode obj as compact UTF-8 JSON."""
+    with metrics.phase("ser"):
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """data compressed with "gzip" or "br"."""
+    with metrics.phase("ser"):
+        if encoding == "br":
+            return brotli.compress(data, quality=_BROTLI_QUALITY)
+        return gzip.compress(data, compresslevel=_GZIP_LEVEL, mtime=0)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding listed in an Accept-Encoding header."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 1.0
+        if q > 0:
+            accepted.add(token.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match check (RFC 9110): "*" or any listed tag equal to etag
+    under weak comparison, i.e. ignoring a W/ prefix on either side.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class EncodedBody:
+    """Encoded response bytes plus lazily built, cached compressed variants."""
+
+    __slots__ = ("raw", "media_type", "_variants", "_etag")
+
+    def __init__(self, raw: bytes, media_type: str = "application/json"):
+        self.raw = raw
+        self.media_type = media_type
+        self._variants: dict[str, bytes] = {}
+        self._etag: Optional[str] = None
+
+    @classmethod
+    def from_obj(cls, obj: Any) -> "EncodedBody":
+        return cls(dumps(obj))
+
+    @property
+    def etag(self) -> str:
+        if self._etag is None:
+            # Weak: the same ETag covers the identity, gzip and brotli variants
+            self._etag = 'W/"' + hashlib.sha1(self.raw).hexdigest()[:20] + '"'
+        return self._etag
+
+    def variant(self, encoding: Optional[str]) -> bytes:
+        if encoding is None or len(self.raw) < _MIN_COMPRESS:
+            return self.raw
+        data = self._variants.get(encoding)
+        if data is None:
+            # Concurrent first requests may both compress; the result is identical
+            data = self._variants[encoding] = compress(self.raw, encoding)
+        return data
+
+    def response(self, request: Request, headers: Optional[dict] = None) -> Response:
+        """
+        The body as a Response, compressed per the request's Accept-Encoding,
+        or 304 Not Modified when If-None-Match already has this ETag.
+        """
+        out = {"ETag": self.etag, "Vary": "Accept-Encoding", **(headers or {})}
+        if etag_matches(request.headers.get("if-none-match", ""), self.etag):
+            return Response(status_code=304, headers=out)
+        encoding = negotiate(request.headers.get("accept-encoding", ""))
+        content = self.variant(encoding)
+        if content is not self.raw:
+            out["Content-Encoding"] = encoding
+        return Response(content, media_type=self.media_type, headers=out)
+
+
+def file_body(path: str, media_type: str) -> EncodedBody:
+    """A file's contents as an EncodedBody, re-read only when mtime/size change."""
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _file_bodies.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(path, "rb") as f:
+        body = EncodedBody(f.read(), media_type)
+    _file_bodies[path] = (signature, body)
+    return body
+
+
+__all__ = ["EncodedBody", "dumps", "compress", "negotiate", "etag_matches", "file_body"]
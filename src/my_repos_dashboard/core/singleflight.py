@@ -0,0 +1,99 @@
+"""Single-flight coalescing for expensive read endpoints.
+
+Concurrent calls with the same key (endpoint + query) share one in-flight
+computation and all receive its result. A finished result is reused for a
+short TTL, so a burst of tabs or a monitoring script polling /projects
+doesn't rescan BASE_PATH once per request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from .config import SINGLE_FLIGHT_TTL
+
+
+class SingleFlight:
+    """Per-key shared computations plus a short-lived result cache."""
+
+    def __init__(self, ttl: float = SINGLE_FLIGHT_TTL):
+        self.ttl = ttl
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._results: dict[Hashable, tuple[float, Any]] = {}
+        self._generation = 0
+        self.calls = 0
+        self.computed = 0
+        self.coalesced = 0
+        self.ttl_hits = 0
+        self.errors = 0
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return compute()'s result, sharing it with concurrent callers of key."""
+        self.calls += 1
+        cached = self._results.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            self.ttl_hits += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._compute(key, compute))
+            task.add_done_callback(_consume_exception)
+            self._inflight[key] = task
+        # shield: one caller disconnecting must not cancel the others' result
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        generation = self._generation
+        try:
+            result = await compute()
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+        self.computed += 1
+        if self.ttl > 0 and generation == self._generation:
+            now = time.monotonic()
+            self._results = {k: v for k, v in self._results.items() if now - v[0] < self.ttl}
+            self._results[key] = (now, result)
+        return result
+
+    def invalidate(self) -> None:
+        """
+        Forget cached results and detach in-flight computations, which may
+        have read state from before the change. Safe to call from any thread.
+        """
+        self._generation += 1
+        self._results = {}
+        self._inflight = {}
+
+    def stats(self) -> dict:
+        """Coalescing counters for diagnostics."""
+        return {
+            "calls": self.calls,
+            "computed": self.computed,
+            "coalesced": self.coalesced,
+            "ttl_hits": self.ttl_hits,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+            "ttl": self.ttl,
+        }
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # Mark the exception retrieved when every waiter has gone away
+    if not task.cancelled():
+        task.exception()
+
+
+# Process-wide coalescer for the /projects and /stats endpoints
+endpoint_flights = SingleFlight()
+
+
+__all__ = ["SingleFlight", "endpoint_flights"]
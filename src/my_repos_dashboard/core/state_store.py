@@ -0,0 +1,266 @@
+"""Dashboard state in one SQLite database: pins, commands, contexts, scratchpads.
+
+Everything the dashboard itself remembers lives in
+.my_dashboard/state.db:
+  pinned      - pinned repo names
+  commands    - saved custom commands per repo (JSON list)
+  contexts    - last captured context per repo (JSON object)
+  scratchpads - scratchpad text per repo
+  status_modes - per-repo fast/full status override (core.fast_status)
+
+The database runs in WAL mode, so readers never block the writer, and
+every write is a single transaction (no torn files). All state is
+small, so it is held in memory and reads never touch the disk. Writes go
+to SQLite first and then update the memory copy.
+
+Before serving a read, the store compares PRAGMA data_version with the
+last value it saw. If another process (a second server, a reloader) has
+committed since, the memory copy is reloaded. That check is one SQL
+statement, not file I/O per repo.
+
+Migration: on first open, the old files are imported: commands.json,
+.my_dashboard/pinned_repos.json and .my_dashboard/repos/<name>/
+{context.json,scratch.md}. They are left in place as a backup and are not
+read again.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from .config import BASE_PATH, COMMANDS_FILE, PINNED_FILE
+
+DB_PATH = os.path.join(BASE_PATH, ".my_dashboard", "state.db")
+# Pre-database per-repo context.json / scratch.md files
+LEGACY_CONTEXT_DIR = os.path.join(BASE_PATH, ".my_dashboard", "repos")
+_SCHEMA_VERSION = "1"
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS pinned (name TEXT PRIMARY KEY, pinned_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS commands (name TEXT PRIMARY KEY, commands TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS contexts (name TEXT PRIMARY KEY, context TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS scratchpads (name TEXT PRIMARY KEY, content TEXT NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS status_modes (name TEXT PRIMARY KEY, mode TEXT NOT NULL)",
+]
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _legacy_files(context_dir: str) -> dict[str, dict]:
+    """name -> {"context": ..., "scratch": ...} from the old per-repo directories."""
+    found: dict[str, dict] = {}
+    for dirpath, _dirs, files in os.walk(context_dir):
+        name = os.path.relpath(dirpath, context_dir).replace(os.sep, "/")
+        if "context.json" in files:
+            context = _read_json(os.path.join(dirpath, "context.json"))
+            if isinstance(context, dict):
+                found.setdefault(name, {})["context"] = context
+        if "scratch.md" in files:
+            try:
+                with open(os.path.join(dirpath, "scratch.md"), "r", encoding="utf-8") as f:
+                    found.setdefault(name, {})["scratch"] = f.read()
+            except OSError:
+                pass
+    return found
+
+
+class StateStore:
+    """Write-through SQLite store with an in-memory copy of all state."""
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._pinned: set[str] = set()
+        self._commands: dict[str, list] = {}
+        self._contexts: dict[str, dict] = {}
+        self._scratch: dict[str, str] = {}
+        self._status_modes: dict[str, str] = {}
+        self.loads = 0
+        self.writes = 0
+
+    # ── connection, migration, cache ──────────────────────────────────────────
+    def _db(self) -> sqlite3.Connection:
+        """The shared connection, created (and migrated) on first use. Caller holds _lock."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+                if conn.execute("SELECT 1 FROM meta WHERE key = 'schema'").fetchone() is None:
+                    self._migrate(conn)
+                    conn.execute("INSERT INTO meta VALUES ('schema', ?)", (_SCHEMA_VERSION,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Import the pre-database JSON/markdown files (inside the caller's transaction)."""
+        now = time.time()
+        pinned = _read_json(PINNED_FILE)
+        if isinstance(pinned, dict):
+            conn.executemany(
+                "INSERT OR IGNORE INTO pinned VALUES (?, ?)",
+                [(name, now) for name in pinned.get("pinned", []) if isinstance(name, str)],
+            )
+        commands = _read_json(COMMANDS_FILE)
+        if isinstance(commands, dict):
+            conn.executemany(
+                "INSERT OR REPLACE INTO commands VALUES (?, ?)",
+                [(name, json.dumps(cmds)) for name, cmds in commands.items() if isinstance(cmds, list)],
+            )
+        for name, files in _legacy_files(LEGACY_CONTEXT_DIR).items():
+            if "context" in files:
+                conn.execute("INSERT OR REPLACE INTO contexts VALUES (?, ?)", (name, json.dumps(files["context"])))
+            if "scratch" in files:
+                conn.execute("INSERT OR REPLACE INTO scratchpads VALUES (?, ?, ?)", (name, files["scratch"], now))
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_at', ?)", (str(now),))
+
+    def _fresh(self) -> None:
+        """Reload the memory copy if any connection committed since the last load. Caller holds _lock."""
+        conn = self._db()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._pinned = {r[0] for r in conn.execute("SELECT name FROM pinned")}
+        self._commands = {r[0]: json.loads(r[1]) for r in conn.execute("SELECT name, commands FROM commands")}
+        self._contexts = {r[0]: json.loads(r[1]) for r in conn.execute("SELECT name, context FROM contexts")}
+        self._scratch = {r[0]: r[1] for r in conn.execute("SELECT name, content FROM scratchpads")}
+        self._status_modes = {r[0]: r[1] for r in conn.execute("SELECT name, mode FROM status_modes")}
+        self._data_version = version
+        self.loads += 1
+
+    def _write(self, sql: str, params: tuple) -> None:
+        """One statement in its own transaction. Caller holds _lock and has called _fresh()."""
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # Our own commits don't change data_version on this connection, and
+        # the memory copy is updated by the caller.
+        self.writes += 1
+
+    # ── pinned ───────────────────────────────────────────────────────────────
+    def pinned(self) -> frozenset[str]:
+        with self._lock:
+            self._fresh()
+            return frozenset(self._pinned)
+
+    def toggle_pinned(self, name: str) -> bool:
+        """Pin or unpin a repo; returns the new state."""
+        with self._lock:
+            self._fresh()
+            if name in self._pinned:
+                self._write("DELETE FROM pinned WHERE name = ?", (name,))
+                self._pinned.discard(name)
+                return False
+            self._write("INSERT OR REPLACE INTO pinned VALUES (?, ?)", (name, time.time()))
+            self._pinned.add(name)
+            return True
+
+    # ── commands ─────────────────────────────────────────────────────────────
+    def commands(self, name: str) -> list:
+        with self._lock:
+            self._fresh()
+            return list(self._commands.get(name, []))
+
+    def set_commands(self, name: str, commands: list) -> None:
+        with self._lock:
+            self._fresh()
+            self._write("INSERT OR REPLACE INTO commands VALUES (?, ?)", (name, json.dumps(commands)))
+            self._commands[name] = list(commands)
+
+    # ── captured context ─────────────────────────────────────────────────────
+    def context(self, name: str) -> Optional[dict]:
+        with self._lock:
+            self._fresh()
+            context = self._contexts.get(name)
+            return dict(context) if context is not None else None
+
+    def set_context(self, name: str, context: dict) -> None:
+        with self._lock:
+            self._fresh()
+            self._write("INSERT OR REPLACE INTO contexts VALUES (?, ?)", (name, json.dumps(context)))
+            self._contexts[name] = dict(context)
+
+    # ── scratchpads ──────────────────────────────────────────────────────────
+    def scratchpad(self, name: str) -> str:
+        with self._lock:
+            self._fresh()
+            return self._scratch.get(name, "")
+
+    def set_scratchpad(self, name: str, content: str) -> None:
+        with self._lock:
+            self._fresh()
+            self._write("INSERT OR REPLACE INTO scratchpads VALUES (?, ?, ?)", (name, content, time.time()))
+            self._scratch[name] = content
+
+    def scratchpad_names(self) -> frozenset[str]:
+        """Repos whose scratchpad has non-blank content (the grid's hasScratchpad)."""
+        with self._lock:
+            self._fresh()
+            return frozenset(name for name, content in self._scratch.items() if content.strip())
+
+    # ── status mode overrides ────────────────────────────────────────────────
+    def status_mode(self, name: str) -> Optional[str]:
+        """The repo's override: "fast", "full", or None to follow FAST_STATUS."""
+        with self._lock:
+            self._fresh()
+            return self._status_modes.get(name)
+
+    def set_status_mode(self, name: str, mode: Optional[str]) -> None:
+        with self._lock:
+            self._fresh()
+            if mode is None:
+                self._write("DELETE FROM status_modes WHERE name = ?", (name,))
+                self._status_modes.pop(name, None)
+            else:
+                self._write("INSERT OR REPLACE INTO status_modes VALUES (?, ?)", (name, mode))
+                self._status_modes[name] = mode
+
+    def stats(self) -> dict:
+        """Sizes and counters for diagnostics."""
+        with self._lock:
+            self._fresh()
+            return {
+                "pinned": len(self._pinned),
+                "commands": len(self._commands),
+                "contexts": len(self._contexts),
+                "scratchpads": len(self._scratch),
+                "status_modes": len(self._status_modes),
+                "loads": self.loads,
+                "writes": self.writes,
+            }
+
+
+# Process-wide store shared by all endpoints
+state_store = StateStore()
+
+
+__all__ = ["StateStore", "state_store", "DB_PATH"]
@@ -0,0 +1,168 @@
+"""Vectorized aggregation of commit timestamps for the stats endpoint.
+
+Timestamps come in as int64 buffers (array('q'), NumPy arrays or lists).
+Each buffer is converted to local day numbers (days since 1970-01-01 in
+local time) and local hours in one pass. Weekday/hour histograms, day
+windows and streaks are then derived from those integer arrays.
+
+NumPy is used when installed (`pip install my-repos-dashboard[perf]`).
+Otherwise the same algorithms run over plain arrays.
+
+Local time: the UTC offset is looked up once per distinct UTC hour rather
+than once per commit, so DST is handled without calling
+datetime.fromtimestamp per commit.
+"""
+
+from __future__ import annotations
+
+import time
+from array import array
+from datetime import date
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday (Monday == 0)
+
+
+def _utc_offset(hour_bucket: int) -> int:
+    return time.localtime(hour_bucket * 3600).tm_gmtoff
+
+
+def day_number(d: date) -> int:
+    """Local day number of a calendar date."""
+    return d.toordinal() - _EPOCH_ORDINAL
+
+
+def day_to_date(day: int) -> date:
+    """Calendar date of a local day number."""
+    return date.fromordinal(int(day) + _EPOCH_ORDINAL)
+
+
+def concat(buffers: Sequence[Sequence[int]]):
+    """Concatenate per-repo timestamp buffers into one int64 buffer."""
+    if np is not None:
+        if not buffers:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.asarray(b, dtype=np.int64) for b in buffers])
+    out = array("q")
+    for b in buffers:
+        out.extend(b)
+    return out
+
+
+def local_days_hours(ts: Sequence[int]):
+    """Return (local day numbers, local hours 0-23) for a timestamp buffer."""
+    if np is not None:
+        ts = np.asarray(ts, dtype=np.int64)
+        if not len(ts):
+            return ts, ts
+        buckets, inverse = np.unique(ts // 3600, return_inverse=True)
+        offsets = np.fromiter((_utc_offset(int(b)) for b in buckets), dtype=np.int64, count=len(buckets))
+        local = ts + offsets[inverse]
+        return local // 86400, (local % 86400) // 3600
+
+    offsets: dict[int, int] = {}
+    days = array("q")
+    hours = array("b")
+    for t in ts:
+        bucket = t // 3600
+        off = offsets.get(bucket)
+        if off is None:
+            off = offsets[bucket] = _utc_offset(bucket)
+        local = t + off
+        days.append(local // 86400)
+        hours.append((local % 86400) // 3600)
+    return days, hours
+
+
+def local_days(ts: Sequence[int]):
+    """Local day numbers for a timestamp buffer."""
+    return local_days_hours(ts)[0]
+
+
+def _bincount(values, size: int) -> list[int]:
+    if np is not None:
+        return np.bincount(np.asarray(values, dtype=np.int64), minlength=size)[:size].tolist()
+    counts = [0] * size
+    for v in values:
+        counts[v] += 1
+    return counts
+
+
+def weekday_counts(days) -> list[int]:
+    """Commits per weekday, Monday first."""
+    if np is not None:
+        return _bincount((np.asarray(days) + _EPOCH_WEEKDAY) % 7, 7)
+    return _bincount(((d + _EPOCH_WEEKDAY) % 7 for d in days), 7)
+
+
+def hour_counts(hours) -> list[int]:
+    """Commits per local hour of day."""
+    return _bincount(hours, 24)
+
+
+def window_counts(days, start_day: int, length: int = 7) -> list[int]:
+    """Commits per day for the `length` days starting at start_day."""
+    if np is not None:
+        days = np.asarray(days)
+        offsets = days - start_day
+        return _bincount(offsets[(offsets >= 0) & (offsets < length)], length)
+    return _bincount((d - start_day for d in days if 0 <= d - start_day < length), length)
+
+
+def streaks(days, today: int) -> dict:
+    """
+    Run-length encode the sorted unique commit days.
+    Returns current streak (run ending today or yesterday), longest streak,
+    and the first/last day of the most recent longest run.
+    Days after today (clock skew) are ignored.
+    """
+    if np is not None:
+        unique = np.unique(np.asarray(days, dtype=np.int64))
+        unique = unique[unique <= today]
+        if not len(unique):
+            return {"current": 0, "longest": 0, "start": None, "end": None}
+        breaks = np.flatnonzero(np.diff(unique) != 1)
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.concatenate((breaks, [len(unique) - 1]))
+        lengths = ends - starts + 1
+        # Most recent run among those of maximal length
+        best = len(lengths) - 1 - int(np.argmax(lengths[::-1]))
+        runs = list(zip(unique[starts].tolist(), unique[ends].tolist(), lengths.tolist()))
+    else:
+        unique = sorted({d for d in days if d <= today})
+        if not unique:
+            return {"current": 0, "longest": 0, "start": None, "end": None}
+        runs = []
+        run_start = prev = unique[0]
+        for d in unique[1:]:
+            if d != prev + 1:
+                runs.append((run_start, prev, prev - run_start + 1))
+                run_start = d
+            prev = d
+        runs.append((run_start, prev, prev - run_start + 1))
+        longest_len = max(r[2] for r in runs)
+        best = max(i for i, r in enumerate(runs) if r[2] == longest_len)
+
+    _, last_end, last_len = runs[-1]
+    current = last_len if last_end >= today - 1 else 0
+    best_start, best_end, best_len = runs[best]
+    return {"current": current, "longest": best_len, "start": best_start, "end": best_end}
+
+
+__all__ = [
+    "day_number",
+    "day_to_date",
+    "concat",
+    "local_days_hours",
+    "local_days",
+    "weekday_counts",
+    "hour_counts",
+    "window_counts",
+    "streaks",
+]
@@ -1,14 +1,34 @@
-"""Worktree operations and git info retrieval."""
+"""Worktree operations and git info retrieval.
+
+The git work is written once as coroutines on top of run_git_async, so the
+async routes and the watcher share the process-wide git limit without
+tying up threads. The plain functions are wrappers for code that runs
+outside an event loop (scripts, worker threads).
+"""
 
 from __future__ import annotations
 
+import asyncio
 import os
 from typing import Optional
 
-from .git_utils import run_git, get_branch_sha, get_worktree_age
-
-
-def get_merge_status(branch: str, parent_branch: str, cwd: str) -> tuple[str, str]:
+from .fast_status import fast_status
+from .git_cache import git_info_cache, worktree_list_cache
+from .git_native import resolve_git_dirs
+from .git_utils import (
+    abbreviate_shas_async,
+    run_git_async,
+    get_branch_sha_async,
+    get_current_branch_async,
+    get_worktree_mtime,
+    get_last_commit_async,
+    worktree_age,
+)
+
+
+def _classify_merge(
+    branch: str, branch_sha: str, parent_branch: str, parent_sha: str, merged: set[str]
+) -> tuple[str, str]:
     """
     Returns (status, color):
       FRESH      - branch SHA == parent SHA (no divergence yet)
@@ -18,125 +38,196 @@ def get_merge_status(branch: str, parent_branch: str, cwd: str) -> tuple[str, st
     """
     if not branch or not parent_branch or branch == parent_branch:
         return "N/A", "dim"
-
-    branch_sha = get_branch_sha(branch, cwd)
-    parent_sha = get_branch_sha(parent_branch, cwd)
-
     if not branch_sha or not parent_sha:
         return "ERROR", "red"
-
     if branch_sha == parent_sha:
         return "FRESH", "cyan"
-
-    merged_out = run_git(["branch", "--merged", parent_branch], cwd) or ""
-    merged_branches = [b.strip().lstrip("* ") for b in merged_out.splitlines()]
-    if branch in merged_branches:
+    if branch in merged:
         return "MERGED", "green"
-
     return "NOT MERGED", "yellow"
 
 
-def get_worktrees_for_repo(repo_path: str) -> list[dict]:
+async def _merged_branches(parent_branch: str, cwd: str) -> set[str]:
+    """Local branches fully merged into parent_branch, from one for-each-ref call."""
+    out = await run_git_async(
+        ["for-each-ref", f"--merged={parent_branch}", "--format=%(refname)", "refs/heads"], cwd
+    ) or ""
+    return {ref[len("refs/heads/"):] for ref in out.splitlines() if ref.startswith("refs/heads/")}
+
+
+def parse_worktree_porcelain(output: str) -> list[dict]:
+    """
+    Parse `git worktree list --porcelain` into [{path, head, branch}].
+    branch is None for detached and bare worktrees.
+    """
+    entries = []
+    for block in output.split("\n\n"):
+        entry = {"path": None, "head": "", "branch": None}
+        for line in block.splitlines():
+            key, _, value = line.partition(" ")
+            if key == "worktree":
+                entry["path"] = value
+            elif key == "HEAD":
+                entry["head"] = value
+            elif key == "branch":
+                entry["branch"] = value[len("refs/heads/"):] if value.startswith("refs/heads/") else value
+        if entry["path"]:
+            entries.append(entry)
+    return entries
+
+
+async def get_merge_status_async(branch: str, parent_branch: str, cwd: str) -> tuple[str, str]:
+    """Merge status of a single branch against parent_branch (see _classify_merge)."""
+    if not branch or not parent_branch or branch == parent_branch:
+        return "N/A", "dim"
+    branch_sha = await get_branch_sha_async(branch, cwd)
+    parent_sha = await get_branch_sha_async(parent_branch, cwd)
+    merged = set()
+    if branch_sha and parent_sha and branch_sha != parent_sha:
+        merged = await _merged_branches(parent_branch, cwd)
+    return _classify_merge(branch, branch_sha, parent_branch, parent_sha, merged)
+
+
+def count_worktrees(path: str) -> int:
+    """
+    Number of worktrees (main included) from the admin dirs under
+    .git/worktrees/, without running git. Matches the length of
+    get_worktrees_for_repo, which also lists prunable worktrees.
+    """
+    dirs = resolve_git_dirs(path)
+    if not dirs:
+        return 0
+    try:
+        with os.scandir(os.path.join(dirs[1], "worktrees")) as it:
+            return 1 + sum(1 for entry in it if entry.is_dir())
+    except OSError:
+        return 1
+
+
+async def get_worktrees_for_repo_async(repo_path: str) -> list[dict]:
+    """
+    Worktree list with merge status, served from worktree_list_cache while the
+    repo's .git fingerprint is unchanged. Ages are re-read on every call.
+    """
+    worktrees = await worktree_list_cache.get_or_compute_async(repo_path, _list_worktrees_async)
+    return await asyncio.to_thread(_with_ages, worktrees or [])
+
+
+def _with_ages(worktrees: list[dict]) -> list[dict]:
+    """
+    Copies of the cached entries with fresh mtimes and ages (one stat per
+    worktree). The grid formats ages from mtime; age is kept for other clients.
+    """
+    return [_with_age(w, get_worktree_mtime(w["path"])) for w in worktrees]
+
+
+def _with_age(worktree: dict, mtime: Optional[float]) -> dict:
+    return {**worktree, "mtime": mtime, "age": worktree_age(mtime)}
+
+
+async def _list_worktrees_async(repo_path: str) -> list[dict]:
     """
     Full worktree list with merge status, age, SHA.
     Mirrors wtm.py get_worktrees() logic.
+    Costs at most two git processes however many worktrees there are: the
+    porcelain listing carries each worktree's HEAD, and merge status for
+    every branch comes from one for-each-ref --merged call.
     """
-    output = run_git(["worktree", "list"], repo_path)
+    output = await run_git_async(["worktree", "list", "--porcelain"], repo_path)
     if not output:
         return []
 
-    parent_branch = run_git(["rev-parse", "--abbrev-ref", "HEAD"], repo_path) or ""
-    parent_sha = get_branch_sha(parent_branch, repo_path, short=True)
-    lines = output.splitlines()
+    parent_branch = await get_current_branch_async(repo_path)
+    parent_sha = await get_branch_sha_async(parent_branch, repo_path)
+    entries = parse_worktree_porcelain(output)
+
+    # A checked-out branch's tip is its worktree's HEAD
+    needs_merge_check = any(
+        e["branch"] and e["branch"] != parent_branch and e["head"] != parent_sha for e in entries
+    )
+    merged = await _merged_branches(parent_branch, repo_path) if needs_merge_check and parent_sha else set()
+    # Abbreviated like `rev-parse --short`, which sha[:7] doesn't match in large repos
+    short = await abbreviate_shas_async([parent_sha, *(e["head"] for e in entries if e["branch"])], repo_path)
 
     worktrees = []
-    for i, line in enumerate(lines):
-        parts = line.split()
-        if not parts:
-            continue
-        path = parts[0]
-        branch = next(
-            (p.strip("[]") for p in parts if p.startswith("[") and p.endswith("]")),
-            None,
-        )
-        age = get_worktree_age(path)
+    for i, entry in enumerate(entries):
+        path = entry["path"]
+        branch = entry["branch"]
         is_main = (i == 0)
 
         if branch:
-            branch_sha = get_branch_sha(branch, repo_path, short=True)
-            status, status_color = get_merge_status(branch, parent_branch, repo_path)
+            branch_sha = short.get(entry["head"], entry["head"][:7])
+            status, status_color = _classify_merge(branch, entry["head"], parent_branch, parent_sha, merged)
         else:
-            branch = None
             branch_sha = ""
             status, status_color = "DETACHED", "red"
 
-        worktrees.append({
+        worktrees.append(_with_age({
             "path": path,
             "branch": branch,
             "branch_sha": branch_sha,
             "status": status,
             "status_color": status_color,
-            "age": age,
             "is_main": is_main,
             "parent_branch": parent_branch,
-            "parent_sha": parent_sha,
-        })
+            "parent_sha": short.get(parent_sha, parent_sha[:7]),
+        }, get_worktree_mtime(path)))
 
     return worktrees
 
 
-def get_git_info(path: str) -> Optional[dict]:
-    """Get comprehensive git information for a repository."""
+async def get_git_info_async(path: str, worktrees: str = "full") -> Optional[dict]:
+    """
+    Get comprehensive git information for a repository.
+    Served from git_info_cache while the repo's .git fingerprint is unchanged.
+    worktrees="full" adds the worktree list with merge status; "count" leaves
+    it out and callers rely on worktree_count (fetch /wt/{name}/list on demand).
+    """
     if not os.path.exists(os.path.join(path, ".git")):
         return None
+    info = await git_info_cache.get_or_compute_async(path, _collect_git_info_async)
+    if info is None or worktrees != "full":
+        return info
+    return {**info, "worktrees": await get_worktrees_for_repo_async(path)}
+
 
-    branch = run_git(["rev-parse", "--abbrev-ref", "HEAD"], path)
-    if not branch:
+async def _collect_git_info_async(path: str) -> Optional[dict]:
+    """Run git to build the info dict for get_git_info (uncached, no worktree list)."""
+    status = await fast_status.summary_async(path)
+    # No branch/oid means git failed or HEAD is unborn (no commits yet)
+    if not status or not status["branch"] or not status["oid"]:
         return None
 
-    status_output = run_git(["status", "--porcelain"], path) or ""
-    is_dirty  = bool(status_output)
-    staged    = sum(1 for l in status_output.splitlines() if l and l[0] in "MADRC")
-    unstaged  = sum(1 for l in status_output.splitlines() if l and l[1] in "MD")
-    untracked = sum(1 for l in status_output.splitlines() if l.startswith("??"))
-
-    ahead, behind = 0, 0
-    ab = run_git(["rev-list", "--left-right", "--count", f"{branch}...@{{u}}"], path) or ""
-    if ab:
-        parts = ab.split()
-        if len(parts) == 2:
-            try:
-                ahead, behind = int(parts[0]), int(parts[1])
-            except ValueError:
-                pass
-
-    log = run_git(["log", "-1", "--pretty=format:%s|||%ar|||%H"], path) or ""
-    last_msg = last_time = last_hash = ""
-    if "|||" in log:
-        parts = log.split("|||")
-        last_msg  = parts[0]
-        last_time = parts[1] if len(parts) > 1 else ""
-        last_hash = parts[2][:7] if len(parts) > 2 else ""
-
-    ts_str  = run_git(["log", "-1", "--pretty=format:%ct"], path) or ""
-    last_ts = int(ts_str) if ts_str.isdigit() else 0
-
-    worktrees   = get_worktrees_for_repo(path)
-    stash_out   = run_git(["stash", "list"], path) or ""
-    stash_count = len(stash_out.splitlines()) if stash_out else 0
+    last = await get_last_commit_async(path, status["oid"])
 
     return {
-        "branch": branch,
-        "is_dirty": is_dirty,
-        "staged": staged,
-        "unstaged": unstaged,
-        "untracked": untracked,
-        "ahead": ahead,
-        "behind": behind,
-        "last_msg": last_msg,
-        "last_time": last_time,
-        "last_hash": last_hash,
-        "last_ts": last_ts,
-        "worktrees": worktrees,
-        "stash_count": stash_count,
+        "branch": status["branch"],
+        "is_dirty": status["is_dirty"],
+        "staged": status["staged"],
+        "unstaged": status["unstaged"],
+        "untracked": status["untracked"],
+        "ahead": status["ahead"],
+        "behind": status["behind"],
+        "last_msg": last["msg"],
+        "last_time": last["time"],
+        "last_hash": last["hash"][:7],
+        "last_ts": last["ts"],
+        "worktree_count": await asyncio.to_thread(count_worktrees, path),
+        "stash_count": status["stash_count"],
     }
+
+
+# ── blocking wrappers ─────────────────────────────────────────────────────────
+def get_merge_status(branch: str, parent_branch: str, cwd: str) -> tuple[str, str]:
+    """Blocking get_merge_status_async; don't call from a running event loop."""
+    return asyncio.run(get_merge_status_async(branch, parent_branch, cwd))
+
+
+def get_worktrees_for_repo(repo_path: str) -> list[dict]:
+    """Blocking get_worktrees_for_repo_async; don't call from a running event loop."""
+    return asyncio.run(get_worktrees_for_repo_async(repo_path))
+
+
+def get_git_info(path: str, worktrees: str = "full") -> Optional[dict]:
+    """Blocking get_git_info_async; don't call from a running event loop."""
+    return asyncio.run(get_git_info_async(path, worktrees))
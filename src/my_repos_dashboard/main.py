@@ -5,15 +5,25 @@ This module imports the app factory from core.config and includes all routers.
 
 from __future__ import annotations
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse
 
 # Import app factory (already configured with CORS and exception handler)
 from .core.config import app, STATIC_DIR
+from .core.auto_fetch import start_auto_fetch, stop_auto_fetch
+from .core.command_jobs import command_jobs
+from .core.commit_search import start_commit_search, stop_commit_search
+from .core.job_queue import job_queue
+from .core.metrics import ServerTimingMiddleware
+from .core.repo_registry import InvalidRepoName
+from .core.repo_watcher import start_repo_watcher, stop_repo_watcher
+from .core.responses import file_body
 
 # Import all routers (no circular imports - routers don't import main)
-from .api import projects, actions, git, worktrees, commands, context, pinned
+from .api import projects, actions, git, worktrees, commands, context, pinned, jobs, search, diagnostics
 
 # Include all routers
 app.include_router(projects.router)
@@ -23,15 +33,62 @@ app.include_router(worktrees.router)
 app.include_router(commands.router)
 app.include_router(context.router)
 app.include_router(pinned.router)
+app.include_router(jobs.router)
+app.include_router(search.router)
+app.include_router(diagnostics.router)
+
+
+@app.exception_handler(InvalidRepoName)
+async def invalid_repo_name_handler(request: Request, exc: InvalidRepoName):
+    """Repo names from {name:path} routes that point outside BASE_PATH."""
+    return JSONResponse(status_code=404, content={"success": False, "output": str(exc)})
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Start background services with the server and stop them on shutdown."""
+    await start_repo_watcher()
+    await start_auto_fetch()
+    await start_commit_search()
+    try:
+        yield
+    finally:
+        await stop_commit_search()
+        await stop_auto_fetch()
+        await stop_repo_watcher()
+        command_jobs.cancel_all()
+        job_queue.cancel_all()
+
+
+# The app instance is created in core.config, so attach the lifespan here
+app.router.lifespan_context = lifespan
+
+# Server-Timing header and per-route request metrics (see /metrics)
+app.add_middleware(ServerTimingMiddleware)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with a one-day max-age; after that, ETag revalidation."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", "public, max-age=86400")
+        return response
+
 
 # Mount static files
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+app.mount("/static", CachedStaticFiles(directory=str(STATIC_DIR)), name="static")
 
 
 @app.get("/")
-def serve_index():
-    """Serve the main dashboard page."""
-    return FileResponse(str(STATIC_DIR / "index.html"))
+def serve_index(request: Request):
+    """
+    Serve the main dashboard page, gzip/brotli-compressed. The page is
+    revalidated on every load (it isn't versioned) and unchanged copies get
+    304 Not Modified.
+    """
+    body = file_body(str(STATIC_DIR / "index.html"), "text/html; charset=utf-8")
+    return body.response(request, {"Cache-Control": "no-cache"})
 
 
 # Export app for uvicorn direct import
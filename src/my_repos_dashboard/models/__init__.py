@@ -8,6 +8,7 @@ from .schemas import (
     CreateWT,
     RemoveWTBody,
     MergeWTBody,
+    BulkActionBody,
 )
 
 __all__ = [
@@ -16,4 +17,5 @@ __all__ = [
     "CreateWT",
     "RemoveWTBody",
     "MergeWTBody",
+    "BulkActionBody",
 ]
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Literal, Optional, Union
 from pydantic import BaseModel
 
 
@@ -14,6 +14,7 @@ class CommandsBody(BaseModel):
 class RunCommandBody(BaseModel):
     """Request body for running a command."""
     cmd: str
+    timeout: Optional[float] = None  # seconds; None = COMMAND_TIMEOUT, 0 = no limit
 
 
 class CreateWT(BaseModel):
@@ -36,16 +37,36 @@ class MergeWTBody(BaseModel):
     delete_branch: bool = False
 
 
+class BulkActionBody(BaseModel):
+    """Request body for running one git action across many repos."""
+    action: str
+    repos: Union[list[str], Literal["all", "pinned"]] = "all"
+
+
 class ScratchpadBody(BaseModel):
     """Request body for saving scratchpad content."""
     content: str
 
 
+class PrewarmBody(BaseModel):
+    """Request body for warming the recent-files cache of the visible repos."""
+    repos: list[str]
+    depth: int = 1
+
+
+class StatusModeBody(BaseModel):
+    """Request body for a repo's status mode; "default" follows FAST_STATUS."""
+    mode: Literal["fast", "full", "default"]
+
+
 __all__ = [
     "CommandsBody",
     "RunCommandBody",
     "CreateWT",
     "RemoveWTBody",
     "MergeWTBody",
+    "BulkActionBody",
     "ScratchpadBody",
+    "PrewarmBody",
+    "StatusModeBody",
 ]
@@ -0,0 +1,51 @@
+"""Shared fixtures: throwaway git repos built with the git CLI."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+# Read at import by core.config; keep the app's state files out of the tree
+os.environ.setdefault("REPO_BASE_PATH", tempfile.mkdtemp(prefix="dashboard-tests-"))
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test Author",
+    "GIT_AUTHOR_EMAIL": "author@example.com",
+    "GIT_COMMITTER_NAME": "Test Committer",
+    "GIT_COMMITTER_EMAIL": "committer@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1",
+    "HOME": os.devnull,
+}
+
+
+def git(cwd, *args: str) -> str:
+    """Run git in cwd and return stripped stdout; fail the test on error."""
+    env = {**os.environ, **GIT_ENV}
+    result = subprocess.run(["git", *args], cwd=cwd, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, f"git {' '.join(args)}: {result.stderr}"
+    return result.stdout.strip()
+
+
+def commit(repo, path: str, content: str, message: str) -> str:
+    """Write path, commit it and return the new HEAD SHA."""
+    full = os.path.join(repo, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w", encoding="utf-8") as f:
+        f.write(content)
+    git(repo, "add", path)
+    git(repo, "commit", "-q", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def make_repo(tmp_path):
+    """Factory: make_repo(name) -> path of a fresh repo on branch main."""
+    def make(name: str = "repo") -> str:
+        path = str(tmp_path / name)
+        os.makedirs(path)
+        git(path, "init", "-q", "-b", "main")
+        return path
+    return make
@@ -0,0 +1,31 @@
+"""Request validation of the HTTP API (no repos needed)."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from my_repos_dashboard.main import app
+
+
+@pytest.fixture
+def client():
+    # Without the context manager the lifespan (watcher, auto-fetch) doesn't start
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("action", ["reset", "clean", "push", ""])
+def test_bulk_rejects_unsupported_action(client, action):
+    r = client.post("/git-bulk", json={"action": action, "repos": []})
+    assert r.status_code == 400
+    assert "not available in bulk" in r.json()["detail"]
+
+
+def test_bulk_accepts_supported_action(client):
+    r = client.post("/git-bulk", json={"action": "fetch", "repos": []})
+    assert r.status_code == 200
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert records[0] == {"type": "start", "action": "fetch", "total": 0}
+    assert records[-1]["type"] == "done"
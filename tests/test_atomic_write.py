@@ -0,0 +1,42 @@
+"""Concurrent saves of one file must never leave it torn or leak temp files."""
+
+from __future__ import annotations
+
+import os
+import threading
+
+import pytest
+
+from my_repos_dashboard.core import commit_index, commit_log
+
+
+@pytest.mark.parametrize("module", [commit_index, commit_log])
+def test_concurrent_atomic_writes(tmp_path, module):
+    path = str(tmp_path / "data.bin")
+    payloads = [bytes([i]) * (64 * 1024 + i) for i in range(16)]
+
+    def writer(data: bytes) -> None:
+        for _ in range(20):
+            module._atomic_write(path, data)
+
+    threads = [threading.Thread(target=writer, args=(p,)) for p in payloads]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with open(path, "rb") as f:
+        assert f.read() in payloads
+    assert os.listdir(tmp_path) == ["data.bin"]
+
+
+def test_failed_write_removes_temp_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.bin")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(commit_index.os, "replace", fail)
+    with pytest.raises(OSError):
+        commit_index._atomic_write(path, b"x")
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,119 @@
+"""Background fetches against a local bare remote."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from conftest import commit, git
+from my_repos_dashboard.core import auto_fetch as af
+from my_repos_dashboard.core.git_utils import get_status_summary
+from my_repos_dashboard.core.repo_registry import RepoEntry
+
+INTERVAL = 600
+
+
+class FakeRegistry:
+    def __init__(self, *paths: str):
+        self.paths = paths
+
+    def entries(self) -> list[RepoEntry]:
+        return [RepoEntry(os.path.basename(p), p, "repo") for p in self.paths]
+
+
+@pytest.fixture
+def remote(tmp_path, make_repo):
+    """(bare remote, clone tracking it, second clone that pushes to it)."""
+    origin = make_repo("origin")
+    commit(origin, "a.txt", "a", "first")
+    bare = str(tmp_path / "remote.git")
+    git(tmp_path, "clone", "-q", "--bare", origin, bare)
+    local = str(tmp_path / "local")
+    other = str(tmp_path / "other")
+    git(tmp_path, "clone", "-q", bare, local)
+    git(tmp_path, "clone", "-q", bare, other)
+    return bare, local, other
+
+
+def fetch_once(sched: af.AutoFetchScheduler) -> af._FetchTarget:
+    """Run one _fetch for the scheduler's only target, as _run would."""
+    async def run():
+        sched._slots = asyncio.Semaphore(1)
+        sched._sync_targets()
+        (target,) = sched._targets.values()
+        await sched._slots.acquire()
+        await sched._fetch(target)
+        return target
+    return asyncio.run(run())
+
+
+def test_fetch_updates_behind(remote):
+    _, local, other = remote
+    commit(other, "b.txt", "b", "second")
+    git(other, "push", "-q", "origin", "HEAD")
+    assert get_status_summary(local)["behind"] == 0
+
+    sched = af.AutoFetchScheduler(registry=FakeRegistry(local), interval=INTERVAL)
+    target = fetch_once(sched)
+
+    assert target.last_ok is True and target.failures == 0
+    assert sched.fetches == 1
+    assert target.next_due >= time.time() + INTERVAL - 5
+    assert get_status_summary(local)["behind"] == 1
+
+
+def test_failing_remote_backs_off(remote, tmp_path):
+    _, local, _ = remote
+    git(local, "remote", "set-url", "origin", str(tmp_path / "missing.git"))
+
+    sched = af.AutoFetchScheduler(registry=FakeRegistry(local), interval=INTERVAL)
+    target = fetch_once(sched)
+
+    assert target.last_ok is False
+    assert (target.failures, sched.failures, sched.fetches) == (1, 1, 0)
+    assert target.last_error
+    # First failure waits 2x the interval (+-10% jitter)
+    assert target.next_due >= time.time() + 2 * INTERVAL * 0.9 - 5
+    assert sched.stats()["repos"][0]["failures"] == 1
+
+
+def test_repo_without_remote_is_skipped(make_repo):
+    repo = make_repo("solo")
+    commit(repo, "a.txt", "a", "first")
+
+    sched = af.AutoFetchScheduler(registry=FakeRegistry(repo), interval=INTERVAL)
+    target = fetch_once(sched)
+
+    assert target.has_remote is False
+    assert target.last_ok is None
+    assert (sched.fetches, sched.failures) == (0, 0)
+    assert not os.path.exists(os.path.join(repo, ".git", "FETCH_HEAD"))
+
+
+def test_stop_cancels_in_flight_fetches(remote, monkeypatch):
+    _, local, _ = remote
+    started = asyncio.Event()
+
+    async def hanging_fetch(*args, **kwargs):
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(af, "run_git_out_async", hanging_fetch)
+    monkeypatch.setattr(af, "_FIRST_DELAY", 0.0)
+    monkeypatch.setattr(af, "_START_GAP", 0.0)
+
+    async def run():
+        sched = af.AutoFetchScheduler(registry=FakeRegistry(local), interval=INTERVAL)
+        sched._busy = lambda: False
+        await sched.start()
+        await asyncio.wait_for(started.wait(), 10)
+        (task,) = sched._fetch_tasks
+        await sched.stop()
+        return sched, task
+
+    sched, task = asyncio.run(run())
+    assert task.cancelled()
+    assert not sched._fetch_tasks and not sched._running
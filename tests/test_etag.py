@@ -0,0 +1,27 @@
+"""If-None-Match handling: list parsing, weak comparison and "*"."""
+
+from __future__ import annotations
+
+import pytest
+
+from my_repos_dashboard.core.responses import etag_matches
+
+TAG = '"aeee35eb9b4e10a5c1b6"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    (TAG, True),
+    (f'W/{TAG}', True),
+    (f'"other", {TAG}', True),
+    (f'"other",W/{TAG} ', True),
+    ("*", True),
+    ("", False),
+    ('"other"', False),
+    # Substrings of the header must not count as a match
+    (f'"x{TAG[1:]}', False),
+    ('"aeee35eb9b4e10a5c1b6aa"', False),
+    (f'"{TAG}"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, TAG) is expected
+    assert etag_matches(header, f"W/{TAG}") is expected
@@ -0,0 +1,81 @@
+"""Fast status mode: what gets timed and what gets written to .git/config."""
+
+from __future__ import annotations
+
+import asyncio
+import subprocess
+
+import pytest
+
+from conftest import commit
+from my_repos_dashboard.core import git_utils
+from my_repos_dashboard.core.fast_status import FastStatus
+
+
+@pytest.fixture
+def repo(make_repo):
+    path = make_repo()
+    commit(path, "a.txt", "a", "first")
+    return path
+
+
+def config_get(repo: str, key: str):
+    result = subprocess.run(["git", "config", "--get", key], cwd=repo, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def check(fs: FastStatus, repo: str):
+    """One summary_async, waiting for the deferred count it schedules."""
+    async def run():
+        status = await fs.summary_async(repo)
+        await asyncio.gather(*fs._tasks)
+        return status
+    return asyncio.run(run())
+
+
+def test_slot_wait_is_not_timed(repo, monkeypatch):
+    limiter = git_utils.GitProcessLimiter(1)
+    monkeypatch.setattr(git_utils, "git_procs", limiter)
+    fs = FastStatus(default="auto", threshold=0.5)
+
+    async def run():
+        # Another git call holds the only slot for longer than the threshold
+        await limiter.acquire_async()
+        asyncio.get_running_loop().call_later(0.8, limiter.release)
+        return await fs.summary_async(repo)
+
+    assert asyncio.run(run()) is not None
+    stats = fs.stats()["repos"]
+    (entry,) = stats.values()
+    assert entry["last_ms"]["full"] < 500
+    assert entry["mode"] == "full"
+
+
+def test_config_untouched_by_default(repo):
+    fs = FastStatus(default="on", write_config=False)
+    assert check(fs, repo)["branch"] == "main"
+    assert config_get(repo, "core.untrackedCache") is None
+    assert config_get(repo, "core.fsmonitor") is None
+    (entry,) = fs.stats()["repos"].values()
+    assert entry["settings"] == {
+        "core.untrackedCache": "true (per call)",
+        "core.fsmonitor": "not written",
+    }
+    assert "untracked" in entry["last_ms"]
+
+
+def test_write_config_opt_in(repo):
+    fs = FastStatus(default="on", write_config=True)
+    check(fs, repo)
+    assert config_get(repo, "core.untrackedCache") == "true"
+    (entry,) = fs.stats()["repos"].values()
+    assert entry["settings"]["core.untrackedCache"] == "true (written)"
+
+
+def test_existing_value_is_kept(repo):
+    subprocess.run(["git", "config", "core.untrackedCache", "false"], cwd=repo, check=True)
+    fs = FastStatus(default="on", write_config=True)
+    check(fs, repo)
+    assert config_get(repo, "core.untrackedCache") == "false"
+    (entry,) = fs.stats()["repos"].values()
+    assert entry["settings"]["core.untrackedCache"] == "false"
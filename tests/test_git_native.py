@@ -0,0 +1,118 @@
+"""The in-process git reader must agree with `git cat-file` / `git rev-parse`."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from conftest import commit, git
+from my_repos_dashboard.core.git_native import (
+    NativeReadError,
+    parse_commit,
+    read_commit,
+    read_object_from,
+    rev_parse,
+)
+from my_repos_dashboard.core.git_utils import get_branch_sha
+
+
+@pytest.fixture
+def history(make_repo):
+    """A repo with 30 commits to one growing file (good delta material), a tag and a branch."""
+    repo = make_repo()
+    lines = []
+    for i in range(30):
+        lines.append(f"line {i} " + "x" * 200)
+        commit(repo, "src/file.txt", "\n".join(lines), f"commit {i}\n\nbody of {i}")
+    git(repo, "tag", "v1", "HEAD~5")
+    git(repo, "branch", "feature", "HEAD~10")
+    return repo
+
+
+def all_objects(repo) -> list[tuple[str, str]]:
+    out = git(repo, "cat-file", "--batch-all-objects", "--batch-check=%(objectname) %(objecttype)")
+    return [tuple(line.split()) for line in out.splitlines()]
+
+
+def assert_objects_match(repo) -> None:
+    objects = os.path.join(repo, ".git", "objects")
+    for sha, obj_type in all_objects(repo):
+        native_type, body = read_object_from(objects, sha)
+        assert native_type == obj_type
+        expected = git(repo, "cat-file", obj_type, sha) if obj_type != "tree" else None
+        if expected is not None:
+            assert body.decode("utf-8").strip() == expected
+
+
+def pack_has_delta(repo) -> bool:
+    pack_dir = os.path.join(repo, ".git", "objects", "pack")
+    idx = next(f for f in os.listdir(pack_dir) if f.endswith(".idx"))
+    out = git(repo, "verify-pack", "-v", os.path.join(pack_dir, idx))
+    # Deltified entries have 7 columns: sha type size size-in-pack offset depth base
+    return any(len(line.split()) == 7 for line in out.splitlines())
+
+
+def test_loose_objects(history):
+    assert_objects_match(history)
+
+
+def test_packed_ofs_delta(history):
+    git(history, "repack", "-a", "-d", "-f", "-q")
+    git(history, "prune-packed")
+    assert "count: 0" in git(history, "count-objects", "-v")
+    assert pack_has_delta(history)
+    assert_objects_match(history)
+
+
+def test_packed_ref_delta(history):
+    git(history, "-c", "repack.useDeltaBaseOffset=false", "repack", "-a", "-d", "-f", "-q")
+    git(history, "prune-packed")
+    assert pack_has_delta(history)
+    assert_objects_match(history)
+
+
+def test_read_commit_matches_log(history):
+    git(history, "repack", "-a", "-d", "-f", "-q")
+    for sha in git(history, "rev-list", "HEAD").splitlines():
+        info = read_commit(history, sha)
+        subject, author, a_ts, c_ts = git(history, "log", "-1", "--format=%s%x00%an%x00%at%x00%ct", sha).split("\0")
+        assert (info["subject"], info["author"], info["author_ts"], info["committer_ts"]) == (
+            subject, author, int(a_ts), int(c_ts))
+
+
+def test_parse_commit_multiline_subject():
+    body = b"tree abc\nauthor A <a@b> 10 +0000\ncommitter C <c@d> 20 +0000\n\nfirst\nsecond\n\nbody\n"
+    info = parse_commit(body)
+    assert info["subject"] == "first second"
+    assert (info["author"], info["author_ts"], info["committer_ts"]) == ("A", 10, 20)
+
+
+@pytest.mark.parametrize("name", ["HEAD", "main", "feature", "v1", "refs/heads/feature", "tags/v1"])
+def test_rev_parse_refs(history, name):
+    assert rev_parse(history, name) == git(history, "rev-parse", name)
+
+
+def test_rev_parse_packed_refs(history):
+    git(history, "pack-refs", "--all")
+    for name in ("main", "feature", "v1"):
+        assert rev_parse(history, name) == git(history, "rev-parse", name)
+
+
+def test_rev_parse_unresolvable_raises(history):
+    # Abbreviated SHAs and unknown names are left to git
+    with pytest.raises(NativeReadError):
+        rev_parse(history, git(history, "rev-parse", "--short", "HEAD"))
+    with pytest.raises(NativeReadError):
+        rev_parse(history, "no-such-branch")
+
+
+def test_rev_parse_unborn_head(make_repo):
+    assert rev_parse(make_repo("empty"), "HEAD") is None
+
+
+def test_get_branch_sha_falls_back_to_git(history):
+    abbrev = git(history, "rev-parse", "--short", "HEAD~3")
+    assert get_branch_sha(abbrev, history) == git(history, "rev-parse", abbrev)
+    assert get_branch_sha("HEAD", history, short=True) == git(history, "rev-parse", "--short", "HEAD")
+    assert get_branch_sha("no-such-branch", history) == ""
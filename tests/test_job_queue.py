@@ -0,0 +1,36 @@
+"""Jobs run outside the submitting request's timing context."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from my_repos_dashboard.core import metrics as m
+from my_repos_dashboard.core.git_utils import run_git, run_git_async
+from my_repos_dashboard.core.job_queue import JobQueue
+
+
+def background_calls() -> int:
+    return m.metrics.git_by_endpoint.get("background", [0, 0.0])[0]
+
+
+@pytest.mark.parametrize("fn", [run_git_async, run_git], ids=["async", "sync"])
+def test_job_git_calls_count_as_background(make_repo, fn):
+    repo = make_repo()
+    queue = JobQueue(workers=1)
+    timing = m.RequestTiming()
+
+    async def handler():
+        # What ServerTimingMiddleware does around every request
+        token = m._request_timing.set(timing)
+        try:
+            job = queue.submit("test", "repo", fn, ["rev-parse", "--git-dir"], repo)
+            return await job.wait()
+        finally:
+            m._request_timing.reset(token)
+
+    before = background_calls()
+    assert asyncio.run(handler()) == ".git"
+    assert timing.git_calls == 0
+    assert background_calls() == before + 1
@@ -0,0 +1,39 @@
+"""ProjectStore versions: only real changes to a repo bump its version."""
+
+from __future__ import annotations
+
+from my_repos_dashboard.core.project_store import ProjectStore
+
+
+def project(name: str = "repo", **git) -> dict:
+    info = {"branch": "main", "is_dirty": False, "last_ts": 1700000000, "last_time": "3 minutes ago"}
+    return {"name": name, "path": f"/base/{name}", "git": {**info, **git},
+            "hasScratchpad": False, "isPinned": False}
+
+
+def test_drifting_last_time_is_not_a_change():
+    store = ProjectStore()
+    version = store.sync([project()])
+    assert store.sync([project(last_time="4 minutes ago")]) == version
+
+
+def test_real_change_bumps_version():
+    store = ProjectStore()
+    version = store.sync([project()])
+    assert store.sync([project(is_dirty=True)]) > version
+    assert store.sync([project(is_dirty=True, last_ts=1700000100)]) > version + 1
+
+
+def test_repo_without_git_info():
+    store = ProjectStore()
+    version = store.sync([{**project(), "git": None}])
+    assert store.sync([{**project(), "git": None}]) == version
+    assert store.sync([project()]) > version
+
+
+def test_drifting_worktree_ages_are_not_a_change():
+    worktree = {"path": "/base/wt", "branch": "fix", "status": "MERGED", "mtime": 1700000000.0, "age": "5m"}
+    store = ProjectStore()
+    version = store.sync([project(worktrees=[worktree])])
+    assert store.sync([project(worktrees=[{**worktree, "age": "6m"}])]) == version
+    assert store.sync([project(worktrees=[{**worktree, "status": "NOT MERGED"}])]) > version
@@ -0,0 +1,35 @@
+"""Recent-files prewarming keeps going past a failing repo."""
+
+from __future__ import annotations
+
+import asyncio
+
+from conftest import commit
+from my_repos_dashboard.core.recent_files import RecentFilesCache
+
+
+def test_prewarm_skips_failing_repo(make_repo, monkeypatch):
+    good = make_repo("good")
+    commit(good, "a.txt", "a", "first")
+    cache = RecentFilesCache()
+    real_get = cache.get
+
+    def get(repo_path, depth=1):
+        if repo_path == "bad":
+            raise OSError("unreadable")
+        return real_get(repo_path, depth)
+
+    monkeypatch.setattr(cache, "get", get)
+
+    async def prewarm(paths):
+        cache.schedule_prewarm(paths)
+        await cache._task
+
+    asyncio.run(prewarm(["bad", good]))
+    stats = cache.stats()
+    assert (stats["prewarmed"], stats["prewarm_errors"], stats["entries"]) == (1, 1, 1)
+    assert stats["last_error"] == "bad: OSError: unreadable"
+
+    # The drain flag was reset, so a later prewarm runs again
+    asyncio.run(prewarm([good]))
+    assert cache.stats()["prewarmed"] == 2
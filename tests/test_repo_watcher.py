@@ -0,0 +1,94 @@
+"""RepoWatcher: observer fallback and per-repo error isolation."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+
+from conftest import commit
+from my_repos_dashboard.core import repo_watcher as rw
+from my_repos_dashboard.core.repo_registry import RepoRegistry
+
+
+@pytest.fixture
+def base(tmp_path, make_repo):
+    for name in ("good", "bad"):
+        commit(make_repo(name), "a.txt", "a", "first")
+    return str(tmp_path)
+
+
+class FakeObserver:
+    """Records schedule() calls; start() fails like a full inotify instance table."""
+
+    fail = True
+
+    def __init__(self):
+        self.watches = []
+        self.stopped = False
+        FakeObserver.last = self
+
+    def schedule(self, handler, path, recursive=False):
+        self.watches.append((path, recursive))
+
+    def start(self):
+        if self.fail:
+            raise OSError(24, "inotify instance limit reached")
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_observer_failure_falls_back_to_polling(base, monkeypatch):
+    monkeypatch.setattr(rw, "Observer", FakeObserver)
+    watcher = rw.RepoWatcher(registry=RepoRegistry(base))
+    watcher._baseline()
+    stats = watcher.stats()
+    assert stats["backend"] == "polling"
+    assert "Errno 24" in stats["observer_error"]
+    assert FakeObserver.last.stopped
+
+
+def test_observer_skips_objects(base, monkeypatch):
+    monkeypatch.setattr(FakeObserver, "fail", False)
+    monkeypatch.setattr(rw, "Observer", FakeObserver)
+    watcher = rw.RepoWatcher(registry=RepoRegistry(base))
+    watcher._baseline()
+    assert watcher.stats()["backend"] == "watchdog"
+    git_dir = os.path.join(base, "good", ".git")
+    watches = FakeObserver.last.watches
+    assert (git_dir, False) in watches
+    assert (os.path.join(git_dir, "refs"), True) in watches
+    assert all(recursive is False or path.endswith("refs") for path, recursive in watches)
+
+
+def test_failing_repo_does_not_stop_the_watcher(base, monkeypatch):
+    monkeypatch.setattr(rw, "Observer", None)
+    real = rw.get_git_info_async
+
+    async def get_git_info(path, **kwargs):
+        if os.path.basename(path) == "bad":
+            raise RuntimeError("boom")
+        return await real(path, **kwargs)
+
+    monkeypatch.setattr(rw, "get_git_info_async", get_git_info)
+
+    async def run():
+        watcher = rw.RepoWatcher(registry=RepoRegistry(base), interval=0.05, sweep_interval=0)
+        await watcher.start()
+        queue = watcher.subscribe()
+        try:
+            for round_ in range(2):
+                for name in ("bad", "good"):
+                    commit(os.path.join(base, name), "a.txt", f"round {round_}", f"change {round_}")
+                event = await asyncio.wait_for(queue.get(), 10)
+                assert (event["type"], event["name"]) == ("git", "good")
+            return watcher.stats()
+        finally:
+            await watcher.stop()
+
+    stats = asyncio.run(run())
+    assert stats["running"] is True
+    assert stats["errors"] >= 2
+    assert stats["last_error"] == "bad: RuntimeError: boom"
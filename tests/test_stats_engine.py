@@ -0,0 +1,73 @@
+"""The NumPy and pure-Python paths of stats_engine must give identical results."""
+
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from my_repos_dashboard.core import stats_engine as se
+
+pytestmark = pytest.mark.skipif(se.np is None, reason="needs numpy to compare both paths")
+
+NOW = int(time.time())
+TODAY = se.day_number(datetime.fromtimestamp(NOW).date())
+
+
+def sample_timestamps(seed: int) -> list[int]:
+    rng = random.Random(seed)
+    ts = [NOW - rng.randrange(0, 400 * 86400) for _ in range(2000)]
+    # A dense run ending today and a future commit (clock skew)
+    ts += [NOW - d * 86400 for d in range(12)]
+    ts.append(NOW + 3 * 86400)
+    return ts
+
+
+def run_all(ts: list[int]) -> dict:
+    days, hours = se.local_days_hours(se.concat([ts[:500], ts[500:]]))
+    return {
+        "days": list(map(int, days)),
+        "hours": list(map(int, hours)),
+        "weekday": se.weekday_counts(days),
+        "hour": se.hour_counts(hours),
+        "window": se.window_counts(days, TODAY - 6),
+        "streaks": se.streaks(days, TODAY),
+    }
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_numpy_and_python_paths_agree(monkeypatch, seed):
+    ts = sample_timestamps(seed)
+    with_numpy = run_all(ts)
+    monkeypatch.setattr(se, "np", None)
+    assert run_all(ts) == with_numpy
+
+
+def test_local_days_match_datetime():
+    ts = sample_timestamps(4)
+    days, hours = se.local_days_hours(ts)
+    for t, day, hour in zip(ts, days, hours):
+        local = datetime.fromtimestamp(t)
+        assert (int(day), int(hour)) == (se.day_number(local.date()), local.hour)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_streaks(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(se, "np", None)
+    today = 1000
+    # Runs: 980-984 (5 days), 990-994 (5 days, most recent longest), 999-1000 (current)
+    days = [*range(980, 985), *range(990, 995), 999, 1000, 1000, 1005]
+    assert se.streaks(days, today) == {"current": 2, "longest": 5, "start": 990, "end": 994}
+    # A run ending yesterday still counts as current; one ending before doesn't
+    assert se.streaks([998, 999], today)["current"] == 2
+    assert se.streaks([997, 998], today)["current"] == 0
+    assert se.streaks([], today) == {"current": 0, "longest": 0, "start": None, "end": None}
+
+
+def test_day_number_round_trip():
+    d = datetime(2024, 2, 29).date()
+    assert se.day_to_date(se.day_number(d)) == d
+    assert se.day_number(d + timedelta(days=1)) == se.day_number(d) + 1
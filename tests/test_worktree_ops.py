@@ -0,0 +1,34 @@
+"""Worktree list SHAs are abbreviated the way git abbreviates them."""
+
+from __future__ import annotations
+
+import asyncio
+
+from conftest import commit, git
+from my_repos_dashboard.core.git_utils import abbreviate_shas_async
+from my_repos_dashboard.core.worktree_ops import _list_worktrees_async
+
+
+def test_worktree_shas_match_rev_parse_short(make_repo, tmp_path):
+    repo = make_repo()
+    commit(repo, "a.txt", "a", "first")
+    git(repo, "worktree", "add", "-q", str(tmp_path / "wt"), "-b", "feature")
+    commit(str(tmp_path / "wt"), "b.txt", "b", "second")
+    # A longer abbreviation, as git picks on its own for large repos
+    git(repo, "config", "core.abbrev", "12")
+
+    worktrees = asyncio.run(_list_worktrees_async(repo))
+    main, wt = worktrees
+    assert main["parent_sha"] == git(repo, "rev-parse", "--short", "main")
+    assert len(main["parent_sha"]) == 12
+    assert wt["branch_sha"] == git(repo, "rev-parse", "--short", "feature")
+
+
+def test_abbreviate_shas(make_repo):
+    repo = make_repo()
+    head = commit(repo, "a.txt", "a", "first")
+    git(repo, "config", "core.abbrev", "10")
+    assert asyncio.run(abbreviate_shas_async([head, head, ""], repo)) == {head: head[:10]}
+    # git fails on an unknown SHA: plain 7-character prefixes instead
+    missing = "f" * 40
+    assert asyncio.run(abbreviate_shas_async([head, missing], repo)) == {head: head[:7], missing: "fffffff"}